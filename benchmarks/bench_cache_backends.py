@@ -0,0 +1,60 @@
+'''
+Measure get and set latency of each cache backend, for a session id and for a compressed data model.
+
+Redis is measured at REDIS_HOST:REDIS_PORT, and skipped if it can't be reached.
+
+    python -m benchmarks.bench_cache_backends --operations 2000
+'''
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.bench_cache_format import datamodel
+from smartconnect import cache, serialization
+from smartconnect.cache_backends import MemoryCache, FileCache
+
+
+def measure(backend, key, value, operations):
+    started = time.perf_counter()
+    for _ in range(operations):
+        backend.set(key, value)
+    set_time = (time.perf_counter() - started) / operations
+
+    started = time.perf_counter()
+    for _ in range(operations):
+        backend.get(key)
+    get_time = (time.perf_counter() - started) / operations
+    backend.delete(key)
+    return set_time, get_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--operations', type=int, default=2000)
+    parser.add_argument('--categories', type=int, default=500)
+    args = parser.parse_args()
+
+    values = {
+        'session': os.urandom(16).hex(),
+        'datamodel': serialization.dumps(datamodel(args.categories, 4, 3, 8), format='zlib'),
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        backends = {'memory': MemoryCache(), 'file': FileCache(directory=directory)}
+        redis_backend = cache.create_backend('redis')
+        try:
+            redis_backend.ping()
+            backends['redis'] = redis_backend
+        except Exception as ex:
+            print(f'Skipping redis: {ex}')
+
+        print(f'{"backend":<8}{"value":<11}{"bytes":>9}{"set us":>10}{"get us":>10}')
+        for name, backend in backends.items():
+            for label, value in values.items():
+                set_time, get_time = measure(backend, f'bench:{label}', value, args.operations)
+                print(f'{name:<8}{label:<11}{len(value):>9,}{set_time * 1e6:>10.1f}{get_time * 1e6:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
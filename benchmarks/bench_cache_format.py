@@ -0,0 +1,84 @@
+'''
+Compare the size of a cached data model, and the time to encode and decode it, in each cache format.
+
+The synthetic model has many categories and deep TREE attributes, like the data models of large Conservation Areas.
+
+    python -m benchmarks.bench_cache_format --categories 2000 --tree-depth 4 --tree-fanout 8
+'''
+import argparse
+import json
+import time
+
+from smartconnect import serialization
+
+
+def tree_options(prefix, depth, fanout):
+    for i in range(fanout):
+        key = f'{prefix}.node{i}' if prefix else f'node{i}'
+        yield {'key': key, 'display': f'Tree node {key.replace(".", " / ")}'}
+        if depth > 1:
+            yield from tree_options(key, depth - 1, fanout)
+
+
+def datamodel(categories, attributes, tree_depth, tree_fanout):
+    return {
+        'categories': [
+            {
+                'path': f'group{i // 50}.category{i}',
+                'ismultiple': 'false',
+                'isactive': 'true',
+                'attributes': [{'key': f'attribute{j}', 'isactive': True} for j in range(i % 10)],
+                'display': f'Category {i}',
+            }
+            for i in range(categories)
+        ],
+        'attributes': [
+            {
+                'key': f'attribute{i}',
+                'type': 'TREE',
+                'isrequired': False,
+                'display': f'Attribute {i}',
+                'options': list(tree_options('', tree_depth, tree_fanout)),
+            }
+            for i in range(attributes)
+        ],
+        'revision': 42,
+    }
+
+
+def measure(model, format, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        encoded = serialization.dumps(model, format=format)
+    encode = (time.perf_counter() - started) / repeat
+
+    # Redis hands back bytes.
+    stored = encoded.encode('utf-8') if isinstance(encoded, str) else encoded
+    started = time.perf_counter()
+    for _ in range(repeat):
+        serialization.loads(stored)
+    decode = (time.perf_counter() - started) / repeat
+    return len(stored), encode, decode
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--categories', type=int, default=2000)
+    parser.add_argument('--attributes', type=int, default=10)
+    parser.add_argument('--tree-depth', type=int, default=4)
+    parser.add_argument('--tree-fanout', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    model = datamodel(args.categories, args.attributes, args.tree_depth, args.tree_fanout)
+    baseline = len(json.dumps(model).encode('utf-8'))
+
+    formats = ['json', 'zlib'] + (['zstd'] if serialization.zstandard is not None else [])
+    print(f'{"format":<8}{"size":>14}{"ratio":>9}{"encode ms":>12}{"decode ms":>12}')
+    for format in formats:
+        size, encode, decode = measure(model, format, args.repeat)
+        print(f'{format:<8}{size:>14,}{size / baseline:>9.2f}{encode * 1000:>12.1f}{decode * 1000:>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+'''
+Compare the time for a freshly started process to get a usable data model: parsing the SMART server's XML, decoding
+the cached entry, and loading the on-disk snapshot.
+
+The first lookup is timed as well as the load, since a snapshot only decodes categories when they are first used.
+The synthetic model is the one of bench_cache_format.
+
+    python -m benchmarks.bench_cold_start --categories 2000 --tree-depth 4 --tree-fanout 8
+'''
+import argparse
+import os
+import tempfile
+import time
+
+from smartconnect import serialization
+from smartconnect.models import DataModel
+from smartconnect.snapshots import SnapshotStore
+
+from benchmarks.bench_cache_format import datamodel
+
+XML_PATH = os.path.join(os.path.dirname(__file__), '..', 'tests', 'data', 'datamodel.xml')
+
+KEY = 'cache:smart-ca:bench:datamodel'
+
+
+def timed(func, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat
+
+
+def report(label, seconds):
+    print(f'{label:<40}{seconds * 1000:>10.2f} ms')
+
+
+def from_cache(entry, path):
+    model = DataModel()
+    model.import_from_dict(serialization.loads(entry))
+    model.get_category(path=path)
+
+
+def from_snapshot(store, path):
+    store.load(KEY, 'en').get_category(path=path)
+
+
+def from_snapshot_full(store):
+    model = store.load(KEY, 'en')
+    model.get_category(path='')
+    model.get_attribute(key='')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--categories', type=int, default=2000)
+    parser.add_argument('--attributes', type=int, default=10)
+    parser.add_argument('--tree-depth', type=int, default=4)
+    parser.add_argument('--tree-fanout', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    model = DataModel()
+    model.import_from_dict(datamodel(args.categories, args.attributes, args.tree_depth, args.tree_fanout))
+    path = model._categories[-1]['path']
+
+    with open(XML_PATH) as f:
+        xml = f.read()
+    report('XML parse (tests/data/datamodel.xml)', timed(lambda: DataModel().load(xml), args.repeat))
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = SnapshotStore(directory=directory)
+        store.save(KEY, model, 'en')
+        print(f'Synthetic model: {args.categories:,} categories, '
+              f'{os.path.getsize(store._path(KEY, "en")):,} bytes on disk')
+
+        for format in ['json', 'zlib'] + (['zstd'] if serialization.zstandard is not None else []):
+            entry = serialization.dumps(model.export_as_dict(), format=format)
+            entry = entry.encode('utf-8') if isinstance(entry, str) else entry
+            report(f'cache entry ({format}) + lookup', timed(lambda: from_cache(entry, path), args.repeat))
+
+        report('snapshot load', timed(lambda: store.load(KEY, 'en'), args.repeat))
+        report('snapshot load + category lookup', timed(lambda: from_snapshot(store, path), args.repeat))
+        report('snapshot load + all fields', timed(lambda: from_snapshot_full(store), args.repeat))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+'''
+Compare HTTP/1.1 and HTTP/2 throughput of AsyncSmartClient.post_smart_request against a local stand-in for a
+SMART Connect server.
+
+Requires the benchmark-only packages hypercorn and trustme, plus h2:
+
+    pip install hypercorn trustme h2
+    python -m benchmarks.bench_http2 --requests 500 --latency 0.02
+'''
+import argparse
+import asyncio
+import ssl
+import threading
+import time
+
+import trustme
+from hypercorn.asyncio import serve
+from hypercorn.config import Config
+
+from smartconnect import AsyncSmartClient, smart_settings
+
+CA_UUID = '123ac748-6e05-4299-892f-335d21fd4ce6'
+
+FEATURE = {
+    'type': 'Feature',
+    'geometry': {'coordinates': [11.41, -9.2], 'type': 'Point'},
+    'properties': {
+        'dateTime': '2023-11-26T10:00:00',
+        'smartDataType': 'incident',
+        'smartFeatureType': 'waypoint/new',
+        'smartAttributes': {'comment': 'Benchmark'},
+    },
+}
+
+
+class StandInServer:
+    '''
+    Just enough of SMART Connect for the login flow and data posts. Each post waits `latency` seconds to stand in for
+    server-side processing.
+    '''
+
+    def __init__(self, *, port: int, latency: float):
+        self.port = port
+        self.latency = latency
+        self.connections = set()
+        self.ca = trustme.CA()
+        self._shutdown = None
+        self._started = threading.Event()
+
+    async def app(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while (message := await receive())['type'] != 'lifespan.shutdown':
+                await send({'type': 'lifespan.startup.complete'})
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+        self.connections.add((scope['http_version'], tuple(scope['client'])))
+        while (await receive()).get('more_body'):
+            pass
+
+        headers = [(b'content-type', b'application/json')]
+        if scope['path'].endswith('/j_security_check'):
+            status, headers = 302, headers + [(b'set-cookie', b'JSESSIONID=benchmark; Path=/')]
+        elif scope['path'].startswith('/server/api/data/'):
+            await asyncio.sleep(self.latency)
+            status = 200
+        else:
+            status = 200
+
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': b'{"message": "ok", "warnings": null}'})
+
+    def start(self):
+        threading.Thread(target=asyncio.run, args=(self._serve(),), daemon=True).start()
+        self._started.wait()
+
+    def stop(self):
+        self._loop.call_soon_threadsafe(self._shutdown.set)
+
+    async def _serve(self):
+        config = Config()
+        config.bind = [f'localhost:{self.port}']
+        config.loglevel = 'WARNING'
+        config.accesslog = None
+        server_cert = self.ca.issue_cert('localhost')
+        with server_cert.private_key_and_cert_chain_pem.tempfile() as certfile:
+            config.certfile = config.keyfile = certfile
+            self._loop = asyncio.get_running_loop()
+            self._shutdown = asyncio.Event()
+            self._loop.call_later(0.5, self._started.set)
+            await serve(self.app, config, shutdown_trigger=self._shutdown.wait)
+
+    def ssl_context(self):
+        context = ssl.create_default_context()
+        self.ca.configure_trust(context)
+        return context
+
+
+async def run(server: StandInServer, *, http2: bool, requests: int):
+    server.connections.clear()
+    client = AsyncSmartClient(api=f'https://localhost:{server.port}/server', username='benchmark', password='benchmark',
+                              http2=http2)
+    await client.ensure_login()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[client.post_smart_request(json=FEATURE, ca_uuid=CA_UUID) for _ in range(requests)])
+    elapsed = time.perf_counter() - start
+    await client.close()
+
+    protocols = sorted({version for version, _ in server.connections})
+    print(f"{'HTTP/2' if http2 else 'HTTP/1.1':>8}: {requests} posts in {elapsed:.2f}s "
+          f"({requests / elapsed:.0f} req/s) over {len(server.connections)} connection(s), protocol {', '.join(protocols)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=500, help='Concurrent posts per run')
+    parser.add_argument('--latency', type=float, default=0.02, help='Simulated server processing time per post')
+    parser.add_argument('--port', type=int, default=8443)
+    args = parser.parse_args()
+
+    server = StandInServer(port=args.port, latency=args.latency)
+    server.start()
+    smart_settings.SMART_SSL_VERIFY = server.ssl_context()
+    try:
+        for http2 in (False, True):
+            asyncio.run(run(server, http2=http2, requests=args.requests))
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
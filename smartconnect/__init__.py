@@ -1,8 +1,11 @@
 import json
 import logging
+import threading
+import time
 import uuid
-from datetime import datetime
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, tzinfo
+from typing import Iterable, List, Optional
 from functools import wraps
 
 import pytz
@@ -10,20 +13,25 @@ import httpx
 from pydantic import parse_obj_as
 from pydantic.main import BaseModel
 
-from smartconnect import models, cache, smart_settings, data
-from .exceptions import SMARTClientException, SMARTClientServerError, SMARTClientClientError, SMARTClientServerUnreachableError, SMARTClientUnauthorizedError
+from smartconnect import models, cache, smart_settings, data, session, connection_pool, retry, rate_limit, circuit_breaker, \
+    compression, timeouts, serialization, utils, snapshots
+from .exceptions import SMARTClientException, SMARTClientServerError, SMARTClientClientError, SMARTClientServerUnreachableError, SMARTClientUnauthorizedError, \
+    SMARTClientSessionExpiredError, SMARTClientCircuitOpenError, SMARTClientNotFoundError
 from .async_client import AsyncSmartClient
 
 logger = logging.getLogger(__name__)
 
 from smartconnect.models import SMARTRequest, SMARTResponse, Patrol, PatrolDataModel, DataModel, ConservationArea, \
-    ConfigurableDataModel, SmartConnectApiInfo
+    ConfigurableDataModel, SmartConnectApiInfo, ConservationAreaIndex
 
 # Manually bump this.
 __version__ = '1.5.1'
 
 DEFAULT_TIMEOUT = (smart_settings.SMART_DEFAULT_CONNECT_TIMEOUT, smart_settings.SMART_DEFAULT_TIMEOUT)
 
+# Answers to a metadata download meaning the server doesn't have what was asked for, rather than failing to send it.
+NOT_FOUND_STATUS_CODES = (400, 404)
+
 
 def with_login_session():
 
@@ -31,7 +39,14 @@ def with_login_session():
         @wraps(func)
         def wrapper(self, *args, **kwargs):
             self.ensure_login()
-            return func(self, *args, **kwargs)
+            session_id = self._session_id()
+            try:
+                return func(self, *args, **kwargs)
+            except SMARTClientSessionExpiredError:
+                # Re-authenticate once and replay the call; a second expiry is raised to the caller.
+                self.logger.info(f"SMART Connect session expired for {self.api}, logging in again.")
+                self.renew_login(expired_session_id=session_id)
+                return func(self, *args, **kwargs)
         return wrapper
     return decorator
 class SmartClient:
@@ -39,7 +54,12 @@ class SmartClient:
     # TODO: Figure out how to specify timezone.
     SMARTCONNECT_DATFORMAT = '%Y-%m-%dT%H:%M:%S'
 
-    def __init__(self, *, api=None, username=None, password=None, use_language_code='en', version="7.5"):
+    def __init__(self, *, api=None, username=None, password=None, use_language_code='en', version="7.5",
+                 use_session_store=None, use_shared_pool=None, retry_policy=None,
+                 max_requests_per_second=None, distributed_rate_limit=None, use_circuit_breaker=None,
+                 compress_requests=None, timeout_profiles=None, adaptive_timeouts=None, use_local_cache=None,
+                 revision_aware_cache=None, stale_while_revalidate=None, single_flight_fill=None,
+                 cache_ca_list=None, negative_cache=None, use_snapshots=None):
 
         self.api = api.rstrip('/')  # trim trailing slash in case configured into portal with one
         self.username = username
@@ -49,41 +69,312 @@ class SmartClient:
 
         self.logger = logging.getLogger(SmartClient.__name__)
         self.verify_ssl = smart_settings.SMART_SSL_VERIFY
+        # Reuse sessions logged in by other processes, see smartconnect.session.
+        self.use_session_store = smart_settings.SMART_SESSION_STORE if use_session_store is None else use_session_store
+        # Keep models read from the cache in process, see smartconnect.cache.LocalCache.
+        self.use_local_cache = smart_settings.SMART_LOCAL_CACHE if use_local_cache is None else use_local_cache
+        # Refresh cached models when their Conservation Area's revision moves, see _ca_revision().
+        self.revision_aware_cache = smart_settings.SMART_REVISION_AWARE_CACHE if revision_aware_cache is None \
+            else revision_aware_cache
+        self._ca_revisions = {}
+        self._revisions_polled_at = float('-inf')
+        self._revisions_lock = threading.Lock()
+        # Serve cached models while they are refreshed in the background, see _revalidate().
+        self.stale_while_revalidate = smart_settings.SMART_STALE_WHILE_REVALIDATE if stale_while_revalidate is None \
+            else stale_while_revalidate
+        self._revalidating = set()
+        self._revalidating_lock = threading.Lock()
+        # Let one process at a time download a model missing from the cache, see _fill().
+        self.single_flight_fill = smart_settings.SMART_SINGLE_FLIGHT_FILL if single_flight_fill is None \
+            else single_flight_fill
+        # Keep the list of Conservation Areas, see get_conservation_area_index().
+        self.cache_ca_list = smart_settings.SMART_CA_LIST_CACHE if cache_ca_list is None else cache_ca_list
+        self._ca_index = None
+        self._ca_index_lock = threading.Lock()
+        # Remember Conservation Areas and configurable models the server doesn't have, see _is_known_missing().
+        self.negative_cache = smart_settings.SMART_NEGATIVE_CACHE if negative_cache is None else negative_cache
+        # Fall back to on-disk snapshots of data models before downloading them, see smartconnect.snapshots.
+        self.use_snapshots = smart_settings.SMART_SNAPSHOTS if use_snapshots is None else use_snapshots
 
         # Configure httpx client with timeout and retries
         self.max_retries = smart_settings.SMART_DEFAULT_CONNECT_RETRIES
-        transport = httpx.HTTPTransport(retries=self.max_retries)
+        self.use_shared_pool = smart_settings.SMART_SHARED_CONNECTION_POOL if use_shared_pool is None else use_shared_pool
+        if self.use_shared_pool:
+            transport = connection_pool.registry.transport(self.api, verify=self.verify_ssl, retries=self.max_retries)
+        else:
+            transport = httpx.HTTPTransport(verify=self.verify_ssl, retries=self.max_retries)
+
+        # Per-endpoint read and write timeouts, see smartconnect.timeouts. Innermost, so that adaptive timeouts only see
+        # time spent on the server.
+        self.timeout_profiles = smart_settings.SMART_TIMEOUT_PROFILES if timeout_profiles is None else timeout_profiles
+        if self.timeout_profiles:
+            transport = timeouts.TimeoutTransport(transport, timeouts.TimeoutProfiles(
+                adaptive=smart_settings.SMART_ADAPTIVE_TIMEOUTS if adaptive_timeouts is None else adaptive_timeouts))
+
+        # Compress large data posts, see smartconnect.compression.
+        self.compress_requests = smart_settings.SMART_COMPRESS_REQUESTS if compress_requests is None else compress_requests
+        if self.compress_requests:
+            transport = compression.CompressionTransport(transport, compression.RequestCompressor())
+
+        # Wait for a token from the bucket shared by all clients of this host, see smartconnect.rate_limit.
+        self.max_requests_per_second = smart_settings.SMART_RATE_LIMIT if max_requests_per_second is None \
+            else max_requests_per_second
+        if self.max_requests_per_second:
+            bucket = rate_limit.get_bucket(
+                self.api, rate=self.max_requests_per_second, capacity=smart_settings.SMART_RATE_LIMIT_BURST,
+                distributed=smart_settings.SMART_RATE_LIMIT_REDIS if distributed_rate_limit is None else distributed_rate_limit)
+            transport = rate_limit.RateLimitTransport(transport, bucket)
+        # Fail fast while the host is down, see smartconnect.circuit_breaker.
+        self.use_circuit_breaker = smart_settings.SMART_CIRCUIT_BREAKER if use_circuit_breaker is None else use_circuit_breaker
+        if self.use_circuit_breaker:
+            transport = circuit_breaker.CircuitBreakerTransport(transport, circuit_breaker.get_breaker(self.api))
+
+        # Retry 5xx and 429 responses, see smartconnect.retry. Each attempt waits for its own token.
+        self.retry_policy = retry_policy or retry.RetryPolicy()
+        if self.retry_policy.max_retries:
+            transport = retry.RetryTransport(transport, self.retry_policy)
+
         connect_timeout = smart_settings.SMART_DEFAULT_CONNECT_TIMEOUT
         data_timeout = smart_settings.SMART_DEFAULT_TIMEOUT
         timeout = httpx.Timeout(data_timeout, connect=connect_timeout, pool=connect_timeout)
         
-        self._session = httpx.Client(transport=transport, timeout=timeout, verify=self.verify_ssl)
+        self._session = httpx.Client(transport=transport, timeout=timeout, verify=self.verify_ssl,
+                                     event_hooks={'response': [self._raise_on_session_expired]})
+        # Guards the login handshake, so that threads sharing this client share a single login.
+        self._login_lock = threading.Lock()
+
+    def _session_id(self):
+        for k, v in self._session.cookies.items():
+            if k == 'JSESSIONID' and v:
+                return v
+        return None
+
+    def _raise_on_session_expired(self, response):
+        if session.is_session_expired(response):
+            raise SMARTClientSessionExpiredError(f"SMART Connect session expired. Status code: {response.status_code}")
 
     def ensure_login(self):
         '''
         Login flow for SMART Connect. If the session already has a JSESSIONID cookie, it is assumed to be logged in.
+        Threads calling this while a login is in progress wait for it instead of running their own.
         '''
-        for k, v in self._session.cookies.items():
-            if k == 'JSESSIONID' and v:
+        # The landing page's cookie isn't authenticated until the login completes, so always check under the lock.
+        with self._login_lock:
+            if self._session_id() or self._restore_session():
                 return self._session
-        
-        # Request the landing page to prime the session.
-        landing_page = self._session.get(f'{self.api}/connect/home')
-        if not landing_page.is_success:
-            raise SMARTClientServerUnreachableError(f"Failed to retrieve landing page {landing_page.url}. Status code: {landing_page.status_code}")
-        
-        login_result = self._session.post(f'{self.api}/j_security_check',
-                                          data={"j_username": self.username, "j_password": self.password})
 
-        if login_result.is_success or login_result.is_redirect:
-            return self._session
+            return self._login()
 
-        if login_result.status_code == 401:
-            raise SMARTClientUnauthorizedError(f"Failed to login to SMART Connect {login_result.url}. Status code: {login_result.status_code}")
-        
-        logger.error(f"Failed to login to SMART Connect {login_result.url}. Status code: {login_result.status_code}, {login_result.text[:250]}")
-        exception_class = SMARTClientClientError if login_result.is_client_error else SMARTClientServerError
-        raise exception_class(f"Failed to login to SMART Connect {login_result.url}. Status code: {login_result.status_code}")
+    def renew_login(self, *, expired_session_id=None):
+        '''
+        Discard an expired session and login again, unless it has already been replaced.
+        '''
+        with self._login_lock:
+            session_id = self._session_id()
+            if session_id and session_id != expired_session_id:
+                return self._session
+
+            self._session.cookies.clear()
+            if self._restore_session(expired_session_id=expired_session_id):
+                return self._session
+            return self._login()
+
+    def _restore_session(self, *, expired_session_id=None):
+        if not self.use_session_store:
+            return False
+
+        session_id = session.get_session_id(self.api, self.username)
+        if not session_id or session_id == expired_session_id:
+            return False
+
+        self.logger.debug(f"Reusing stored SMART Connect session for {self.api}.")
+        self._session.cookies.set('JSESSIONID', session_id)
+        return True
+
+    def _save_session(self):
+        if self.use_session_store and (session_id := self._session_id()):
+            session.save_session_id(self.api, self.username, session_id)
+
+    def _ca_revision(self, ca_uuid):
+        '''
+        Current revision of a Conservation Area, from a get_conservation_areas() poll made at most
+        SMART_REVISION_POLL_INTERVAL seconds ago and shared by concurrent callers. None if it can't be told, in which
+        case cached models are used as is.
+
+        With cache_ca_list, revisions are read from the list kept for get_conservation_area_index() instead, so they
+        are at most SMART_CA_LIST_TTL seconds old.
+        '''
+        if self.cache_ca_list:
+            try:
+                conservation_area = self.get_conservation_area_index().get(ca_uuid)
+            except Exception:
+                self.logger.warning(f"Failed polling Conservation Area revisions from {self.api}.", exc_info=True)
+                return None
+            return conservation_area.revision if conservation_area else None
+
+        if self._revisions_expired():
+            with self._revisions_lock:
+                # Callers that waited for another's poll use its result.
+                if self._revisions_expired():
+                    try:
+                        self._ca_revisions = {ca.uuid: ca.revision for ca in self.get_conservation_areas()}
+                        self._revisions_polled_at = time.monotonic()
+                    except Exception:
+                        self.logger.warning(f"Failed polling Conservation Area revisions from {self.api}.",
+                                            exc_info=True)
+                        return None
+
+        try:
+            return self._ca_revisions.get(uuid.UUID(ca_uuid))
+        except ValueError:
+            return None
+
+    def _revisions_expired(self):
+        return time.monotonic() - self._revisions_polled_at >= smart_settings.SMART_REVISION_POLL_INTERVAL
+
+    def _is_current(self, model, revision):
+        if revision is None or model.revision == revision:
+            return True
+
+        self.logger.info(f"Cached model is at revision {model.revision}, its Conservation Area is at {revision}. "
+                         f"Downloading it again.")
+        return False
+
+    def _revalidate(self, key, refresh, *args, **kwargs):
+        '''
+        Run refresh(*args, **kwargs) on a background thread to replace the cached model at key, unless it is already
+        being refreshed.
+        '''
+        with self._revalidating_lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+
+        def run():
+            try:
+                refresh(*args, **kwargs)
+            except Exception:
+                self.logger.exception(f"Failed refreshing {key} in the background.")
+            finally:
+                with self._revalidating_lock:
+                    self._revalidating.discard(key)
+
+        self.logger.debug(f"Serving {key} while refreshing it in the background.")
+        threading.Thread(target=run, name='smartconnect-revalidate', daemon=True).start()
+
+    def _fill(self, read, download, *, cache_key, **kwargs):
+        '''
+        Run download(cache_key=cache_key, **kwargs) to fill the cache entry at cache_key, holding its fill lock so
+        that other processes missing the same entry wait and read what this one stores instead of downloading it too.
+        '''
+        if not self.single_flight_fill:
+            return download(cache_key=cache_key, **kwargs)
+
+        try:
+            lock = cache.fill_lock(cache_key)
+            acquired = lock.acquire()
+        except Exception:
+            logger.warning('Failed acquiring cache fill lock.', extra={'cache_key': cache_key})
+            return download(cache_key=cache_key, **kwargs)
+
+        if acquired:
+            try:
+                return download(cache_key=cache_key, **kwargs)
+            finally:
+                try:
+                    lock.release()
+                except Exception:
+                    logger.warning('Failed releasing cache fill lock.', extra={'cache_key': cache_key})
+
+        self.logger.debug(f"Waiting for another process to fill {cache_key}.")
+        deadline = time.monotonic() + smart_settings.SMART_FILL_WAIT_TIMEOUT
+        try:
+            while lock.locked() and time.monotonic() < deadline:
+                time.sleep(smart_settings.SMART_FILL_POLL_INTERVAL)
+        except Exception:
+            logger.warning('Failed waiting on cache fill lock.', extra={'cache_key': cache_key})
+
+        # Not from a snapshot: it may be older than what the other process was downloading.
+        if (model := read(cache_key, use_local=False, use_snapshot=False)) is not None:
+            return model
+
+        # The other process failed, or took too long.
+        return download(cache_key=cache_key, **kwargs)
+
+    def _is_known_missing(self, cache_key):
+        '''
+        Whether the server recently didn't have what would be cached at cache_key, see _mark_missing().
+        '''
+        if not self.negative_cache:
+            return False
+        try:
+            return bool(cache.cache.get(f'{cache_key}:missing'))
+        except Exception:
+            logger.warning('Failed reading negative cache entry.', extra={'cache_key': cache_key})
+            return False
+
+    def _mark_missing(self, cache_key):
+        if self.negative_cache:
+            try:
+                cache.cache.set(f'{cache_key}:missing', 1, ex=smart_settings.SMART_NEGATIVE_CACHE_TTL)
+            except Exception:
+                logger.warning('Failed writing negative cache entry.', extra={'cache_key': cache_key})
+
+    def _read_snapshot(self, cache_key):
+        if not self.use_snapshots:
+            return None
+        try:
+            model = snapshots.store.load(cache_key, self.use_language_code)
+        except Exception:
+            logger.warning('Failed reading data model snapshot.', extra={'cache_key': cache_key}, exc_info=True)
+            return None
+
+        if model is not None:
+            self._set_local(cache_key, model)
+            self.logger.debug(f"Using snapshot of SMART Datamodel", extra={"cached_key": cache_key})
+        return model
+
+    def _save_snapshot(self, cache_key, model):
+        if self.use_snapshots:
+            try:
+                snapshots.store.save(cache_key, model, self.use_language_code)
+            except Exception:
+                logger.warning('Failed saving data model snapshot.', extra={'cache_key': cache_key}, exc_info=True)
+
+    def _get_local(self, cache_key):
+        if self.use_local_cache:
+            return cache.local_cache.get(cache_key, self.use_language_code)
+        return None
+
+    def _set_local(self, cache_key, model):
+        if self.use_local_cache:
+            cache.local_cache.set(cache_key, model, self.use_language_code)
+
+    def _login(self):
+        try:
+            # Request the landing page to prime the session.
+            landing_page = self._session.get(f'{self.api}/connect/home')
+            if not landing_page.is_success:
+                raise SMARTClientServerUnreachableError(f"Failed to retrieve landing page {landing_page.url}. Status code: {landing_page.status_code}")
+
+            login_result = self._session.post(f'{self.api}/j_security_check',
+                                              data={"j_username": self.username, "j_password": self.password})
+
+            if login_result.is_success or login_result.is_redirect:
+                self._save_session()
+                return self._session
+
+            if login_result.status_code == 401:
+                raise SMARTClientUnauthorizedError(f"Failed to login to SMART Connect {login_result.url}. Status code: {login_result.status_code}")
+
+            logger.error(f"Failed to login to SMART Connect {login_result.url}. Status code: {login_result.status_code}, {login_result.text[:250]}")
+            exception_class = SMARTClientClientError if login_result.is_client_error else SMARTClientServerError
+            raise exception_class(f"Failed to login to SMART Connect {login_result.url}. Status code: {login_result.status_code}")
+        except BaseException:
+            # The landing page's cookie was never authenticated. Drop it, or later callers would take it for a
+            # logged in session.
+            self._session.cookies.clear()
+            raise
     
     @with_login_session()
     def get_server_api_info(self):
@@ -96,23 +387,44 @@ class SmartClient:
             return SmartConnectApiInfo.parse_obj(cas.json())
 
     @with_login_session()
-    def get_conservation_area(self, *, ca_uuid: str = None, force: bool = False):
+    def get_conservation_area(self, *, ca_uuid: str = None, force: bool = False, stale_while_revalidate: bool = None):
 
         cache_key = f"cache:smart-ca:{ca_uuid}:metadata"
-        if not force:
-            self.logger.info(f"Looking up CA cached at {cache_key}.")
-            try:
-                cached_data = cache.cache.get(cache_key)
-                if cached_data:
-                    self.logger.info(f"Found CA cached at {cache_key}.")
-                    conservation_area = ConservationArea.parse_raw(cached_data)
+        if stale_while_revalidate is None:
+            stale_while_revalidate = self.stale_while_revalidate
+        if not force or stale_while_revalidate:
+            if (conservation_area := self._read_conservation_area(cache_key)) is not None:
+                if not force:
                     return conservation_area
+                self._revalidate(cache_key, self._download_conservation_area, ca_uuid=ca_uuid, cache_key=cache_key,
+                                 force=True)
+                return conservation_area
 
-                self.logger.info(f"Cache miss for {cache_key}")
-            except:
-                self.logger.info(f"Cache miss/error for {cache_key}")
-                pass
+        if not force and self._is_known_missing(cache_key):
+            self.logger.info(f"Conservation Area {ca_uuid} was recently not found, not looking it up again yet.")
+            return None
 
+        return self._download_conservation_area(ca_uuid=ca_uuid, cache_key=cache_key, force=force)
+
+    def _read_conservation_area(self, cache_key):
+        if (conservation_area := self._get_local(cache_key)) is not None:
+            return conservation_area
+
+        self.logger.info(f"Looking up CA cached at {cache_key}.")
+        try:
+            cached_data = cache.cache.get(cache_key)
+            if cached_data:
+                self.logger.info(f"Found CA cached at {cache_key}.")
+                conservation_area = ConservationArea.parse_raw(cached_data)
+                self._set_local(cache_key, conservation_area)
+                return conservation_area
+
+            self.logger.info(f"Cache miss for {cache_key}")
+        except:
+            self.logger.info(f"Cache miss/error for {cache_key}")
+            pass
+
+    def _download_conservation_area(self, *, ca_uuid, cache_key, force=False):
         try:
             self.logger.info(
                 "Querying Smart Connect for CAs at endpoint: %s, username: %s",
@@ -120,22 +432,23 @@ class SmartClient:
                 self.username,
             )
 
-            for ca in self.get_conservation_areas():
-                if ca.uuid == uuid.UUID(ca_uuid):
-                    conservation_area = ca
-                    break
-            else:
+            index = self.get_conservation_area_index(force=force)
+            if (conservation_area := index.get(ca_uuid)) is None and self.cache_ca_list and not force:
+                # It may have been added since the list was cached.
+                conservation_area = self.get_conservation_area_index(force=True).get(ca_uuid)
+
+            if conservation_area is None:
                 logger.error(
                     f"Can't find a Conservation Area with UUID: {ca_uuid}"
                 )
-                conservation_area = None
-
-            if conservation_area:
+                self._mark_missing(cache_key)
+            else:
                 self.logger.info(f"Caching CA metadata at {cache_key}")
                 cache.cache.set(
                     name=cache_key,
                     value=json.dumps(dict(conservation_area), default=str),
                 )
+                self._set_local(cache_key, conservation_area)
 
             return conservation_area
 
@@ -145,6 +458,65 @@ class SmartClient:
             )
             raise SMARTClientException(f"Failed to get SMART Conservation Areas") from ex
 
+    def get_conservation_area_index(self, *, force: bool = False) -> ConservationAreaIndex:
+        '''
+        Get all Conservation Areas of the server, indexed by uuid and label.
+
+        With cache_ca_list, the list is kept in the cache and in this client for SMART_CA_LIST_TTL seconds from when it
+        was downloaded, so that looking up many Conservation Areas downloads it once. Concurrent callers share one
+        download.
+        '''
+        if not self.cache_ca_list:
+            return ConservationAreaIndex(self.get_conservation_areas())
+
+        known = self._ca_index
+        if not force and self._ca_index_is_fresh():
+            return known
+
+        with self._ca_index_lock:
+            # Another caller refreshed the list while this one waited.
+            if self._ca_index is not known:
+                return self._ca_index
+
+            if not force and (index := self._read_ca_index()) is not None:
+                self._ca_index = index
+                return index
+
+            index = ConservationAreaIndex(self.get_conservation_areas())
+            try:
+                cache.cache.set(self._ca_index_key, json.dumps(index.export_as_dict()),
+                                ex=smart_settings.SMART_CA_LIST_TTL)
+            except Exception:
+                logger.warning('Failed caching the list of Conservation Areas.', extra={'api': self.api})
+            self._ca_index = index
+            return index
+
+    def _ca_index_is_fresh(self):
+        return self._ca_index is not None and self._ca_index.fetched_at + smart_settings.SMART_CA_LIST_TTL > time.time()
+
+    @property
+    def _ca_index_key(self):
+        return f'cache:smart-ca:list:{self.api}'
+
+    def _read_ca_index(self):
+        try:
+            if cached_data := cache.cache.get(self._ca_index_key):
+                return ConservationAreaIndex.import_from_dict(json.loads(cached_data))
+        except Exception:
+            logger.exception('Failed on reading the list of Conservation Areas from cache.', extra={'api': self.api})
+
+    def guess_ca_timezone(self, ca_uuid: str) -> Optional[tzinfo]:
+        '''
+        Guess a Conservation Area's timezone from its boundary, see utils.guess_ca_timezone(). With cache_ca_list,
+        guesses are kept along with the list.
+        '''
+        index = self.get_conservation_area_index()
+        if (conservation_area := index.get(ca_uuid)) is None:
+            return None
+        if conservation_area.uuid not in index.timezones:
+            index.timezones[conservation_area.uuid] = utils.guess_ca_timezone(conservation_area)
+        return index.timezones[conservation_area.uuid]
+
     @with_login_session()
     def get_conservation_areas(self) -> List[models.ConservationArea]:
         cas = self._session.get(f'{self.api}/api/conservationarea',
@@ -209,6 +581,8 @@ class SmartClient:
                 f'Failed to download data model for  configurable model {cm_uuid}. Status_code is: {config_datamodel.status_code}',
                 extra=dict(**extra_dict,
                            status_code=config_datamodel.status_code))
+            if config_datamodel.status_code in NOT_FOUND_STATUS_CODES:
+                raise SMARTClientNotFoundError(f'Configurable data model {cm_uuid} not found')
             raise Exception('Failed to download Data Model')
 
         cdm = ConfigurableDataModel(cm_uuid=cm_uuid, use_language_code=self.use_language_code)
@@ -217,37 +591,70 @@ class SmartClient:
         return cdm
 
     @with_login_session()
-    def get_configurable_data_model(self, *, cm_uuid: str = None, force: bool = False):
-        # TODO: version consideration
+    def get_configurable_data_model(self, *, cm_uuid: str = None, ca_uuid: str = None, force: bool = False,
+                                    stale_while_revalidate: bool = None):
         # TODO: Implement caching
 
-        ca_uuid = 'na'
-        cache_key = f'cache:smart-ca:{ca_uuid}:cdm:{cm_uuid}'
+        # ca_uuid is the CA the model belongs to, which is only needed to check the model's revision.
+        cache_key = f'cache:smart-ca:na:cdm:{cm_uuid}'
 
-        if not force:
-            try:
-                cached_data = cache.cache.get(cache_key)
-                if cached_data:
+        revision = self._ca_revision(ca_uuid) if self.revision_aware_cache and ca_uuid else None
+        if stale_while_revalidate is None:
+            stale_while_revalidate = self.stale_while_revalidate
+        if not force or stale_while_revalidate:
+            if (model := self._read_configurable_data_model(cache_key)) is not None:
+                if not force and self._is_current(model, revision):
+                    return model
+                if stale_while_revalidate:
+                    self._revalidate(cache_key, self._fill, self._read_configurable_data_model,
+                                     self._download_configurable_data_model, cm_uuid=cm_uuid, cache_key=cache_key,
+                                     revision=revision)
+                    return model
 
-                    cm = ConfigurableDataModel(use_language_code=self.use_language_code)
-                    cm.import_from_dict(json.loads(cached_data))
+        if not force and self._is_known_missing(cache_key):
+            raise SMARTClientNotFoundError(f"Configurable data model {cm_uuid} was recently not found.")
 
-                    self.logger.debug(
-                        f"Using cached SMART Configurable Data Model", extra={"cached_key": cache_key}
-                    )
-                    return cm
+        return self._fill(self._read_configurable_data_model, self._download_configurable_data_model, cm_uuid=cm_uuid,
+                          cache_key=cache_key, revision=revision)
 
-            except Exception as ex:
-                logger.exception('Failed on reading configurable model from cache.', extra={'cache_key': cache_key})
+    def _read_configurable_data_model(self, cache_key, use_local=True, use_snapshot=True):
+        if use_local and (model := self._get_local(cache_key)) is not None:
+            return model
+
+        try:
+            cached_data = cache.cache.get(cache_key)
+            if cached_data:
 
+                cm = ConfigurableDataModel(use_language_code=self.use_language_code)
+                cm.import_from_dict(serialization.loads(cached_data))
+                self._set_local(cache_key, cm)
+
+                self.logger.debug(
+                    f"Using cached SMART Configurable Data Model", extra={"cached_key": cache_key}
+                )
+                return cm
+
+        except Exception as ex:
+            logger.exception('Failed on reading configurable model from cache.', extra={'cache_key': cache_key})
+
+        return self._read_snapshot(cache_key) if use_snapshot else None
+
+    def _download_configurable_data_model(self, *, cm_uuid, cache_key, revision):
         # Re-download and cache.
-        ca_config_datamodel = self.download_configurable_datamodel(
-            cm_uuid=cm_uuid
-        )
-        cache.cache.set(cache_key, json.dumps(ca_config_datamodel.export_as_dict()))
+        try:
+            ca_config_datamodel = self.download_configurable_datamodel(
+                cm_uuid=cm_uuid
+            )
+        except SMARTClientNotFoundError:
+            self._mark_missing(cache_key)
+            raise
+        ca_config_datamodel.revision = revision
+        self._save_snapshot(cache_key, ca_config_datamodel)
+        cache.cache.set(cache_key, serialization.dumps(ca_config_datamodel.export_as_dict()))
+        self._set_local(cache_key, ca_config_datamodel)
         return ca_config_datamodel
 
-    def get_data_model(self, *, ca_uuid: str = None, force: bool = False):
+    def get_data_model(self, *, ca_uuid: str = None, force: bool = False, stale_while_revalidate: bool = None):
 
         # CA Data Model is not available for versions below 7. Use a blank data model.
         if self.version.startswith("6"):
@@ -256,22 +663,47 @@ class SmartClient:
             return blank_datamodel
 
         cache_key = f"cache:smart-ca:{ca_uuid}:datamodel"
-        if not force:
-            try:
-                cached_data = cache.cache.get(cache_key)
-                if cached_data:
-                    dm = DataModel(use_language_code=self.use_language_code)
-                    dm.import_from_dict(json.loads(cached_data))
-                    self.logger.debug(
-                        f"Using cached SMART Datamodel", extra={"cached_key": cache_key}
-                    )
-                    return dm
-
-            except Exception as ex:
-                logger.exception('Failed on reading data model from cache.', extra={'cache_key': cache_key})
+        revision = self._ca_revision(ca_uuid) if self.revision_aware_cache else None
+        if stale_while_revalidate is None:
+            stale_while_revalidate = self.stale_while_revalidate
+        if not force or stale_while_revalidate:
+            if (model := self._read_data_model(cache_key)) is not None:
+                if not force and self._is_current(model, revision):
+                    return model
+                if stale_while_revalidate:
+                    self._revalidate(cache_key, self._fill, self._read_data_model, self._download_data_model,
+                                     ca_uuid=ca_uuid, cache_key=cache_key, revision=revision)
+                    return model
 
             logger.debug(f"Cache miss for SMART Datamodel", extra={"cached_key": cache_key})
 
+        return self._fill(self._read_data_model, self._download_data_model, ca_uuid=ca_uuid, cache_key=cache_key,
+                          revision=revision)
+
+    def _read_data_model(self, cache_key, use_local=True, use_snapshot=True):
+        if use_local and (model := self._get_local(cache_key)) is not None:
+            return model
+
+        try:
+            cached_data = cache.cache.get(cache_key)
+            if cached_data:
+                return self._load_data_model(cache_key, cached_data)
+
+        except Exception as ex:
+            logger.exception('Failed on reading data model from cache.', extra={'cache_key': cache_key})
+
+        return self._read_snapshot(cache_key) if use_snapshot else None
+
+    def _load_data_model(self, cache_key, cached_data):
+        dm = DataModel(use_language_code=self.use_language_code)
+        dm.import_from_dict(serialization.loads(cached_data))
+        self._set_local(cache_key, dm)
+        self.logger.debug(
+            f"Using cached SMART Datamodel", extra={"cached_key": cache_key}
+        )
+        return dm
+
+    def _download_data_model(self, *, ca_uuid, cache_key, revision):
         try:
             ca_datamodel = self.download_datamodel(
                 ca_uuid=ca_uuid
@@ -281,13 +713,68 @@ class SmartClient:
             raise SMARTClientException(f"Failed downloading SMART Datamodel for CA {ca_uuid}") from e
 
         if ca_datamodel:
+            ca_datamodel.revision = revision
+            self._save_snapshot(cache_key, ca_datamodel)
             cache.cache.set(
                 name=cache_key,
-                value=json.dumps(ca_datamodel.export_as_dict()),
+                value=serialization.dumps(ca_datamodel.export_as_dict()),
             )
+            self._set_local(cache_key, ca_datamodel)
 
         return ca_datamodel
 
+    def get_data_models(self, *, ca_uuids: Iterable[str], force: bool = False, max_workers: int = None) -> dict:
+        '''
+        Get the data models of many Conservation Areas, see get_data_model().
+
+        Cached models are read with a single MGET and the others are downloaded on up to max_workers threads. Returns a
+        dict of each CA uuid's data model or, if downloading it failed, the exception raised.
+        '''
+        ca_uuids = list(dict.fromkeys(ca_uuids))
+        if self.version.startswith("6"):
+            return {ca_uuid: self.get_data_model(ca_uuid=ca_uuid) for ca_uuid in ca_uuids}
+
+        cache_keys = {ca_uuid: f"cache:smart-ca:{ca_uuid}:datamodel" for ca_uuid in ca_uuids}
+        revisions = {ca_uuid: self._ca_revision(ca_uuid) if self.revision_aware_cache else None for ca_uuid in ca_uuids}
+        models = {} if force else {ca_uuid: model for ca_uuid, model in self._read_data_models(cache_keys).items()
+                                   if self._is_current(model, revisions[ca_uuid])}
+
+        missing = [ca_uuid for ca_uuid in ca_uuids if ca_uuid not in models]
+        if missing:
+            logger.debug(f"Cache miss for {len(missing)} of {len(ca_uuids)} SMART Datamodels")
+        models.update(zip(missing, self._map(self._fill, [
+            dict(read=self._read_data_model, download=self._download_data_model, ca_uuid=ca_uuid,
+                 cache_key=cache_keys[ca_uuid], revision=revisions[ca_uuid])
+            for ca_uuid in missing
+        ], max_workers=max_workers)))
+        return {ca_uuid: models[ca_uuid] for ca_uuid in ca_uuids}
+
+    def _read_data_models(self, cache_keys: dict) -> dict:
+        models = {}
+        for ca_uuid, cache_key in cache_keys.items():
+            if (model := self._get_local(cache_key)) is not None:
+                models[ca_uuid] = model
+
+        if not (remote := {ca_uuid: cache_key for ca_uuid, cache_key in cache_keys.items() if ca_uuid not in models}):
+            return models
+        try:
+            cached = cache.cache.mget(list(remote.values()))
+        except Exception:
+            logger.exception('Failed on reading data models from cache.', extra={'cache_keys': list(remote.values())})
+            cached = [None] * len(remote)
+
+        for (ca_uuid, cache_key), cached_data in zip(remote.items(), cached):
+            if cached_data:
+                try:
+                    models[ca_uuid] = self._load_data_model(cache_key, cached_data)
+                except Exception:
+                    logger.exception('Failed on reading data model from cache.', extra={'cache_key': cache_key})
+
+        for ca_uuid, cache_key in remote.items():
+            if ca_uuid not in models and (model := self._read_snapshot(cache_key)) is not None:
+                models[ca_uuid] = model
+        return models
+
     @with_login_session()
     def download_datamodel(self, *, ca_uuid: str = None):
 
@@ -395,6 +882,38 @@ class SmartClient:
         if response_data and isinstance(response_data, list):
             return parse_obj_as(List[SMARTResponse], response_data)
 
+    def map_get_incident(self, incident_uuids: Iterable[str], *, max_workers: int = None) -> list:
+        '''
+        Look up many incidents in parallel, see map_post().
+        '''
+        return self._map(self.get_incident, [dict(incident_uuid=incident_uuid) for incident_uuid in incident_uuids],
+                         max_workers=max_workers)
+
+    def map_post(self, requests: Iterable[str], *, ca_uuid: str = None, max_workers: int = None) -> list:
+        '''
+        Post many SMART requests to a CA in parallel, on up to max_workers threads.
+
+        Returns a list in the same order as the requests, holding each call's result or, if it failed, the exception
+        it raised. Login happens once up front; if it fails the error is raised instead.
+        '''
+        return self._map(self.post_smart_request, [dict(json=json, ca_uuid=ca_uuid) for json in requests],
+                         max_workers=max_workers)
+
+    def _map(self, func, calls: List[dict], *, max_workers: int = None) -> list:
+        if not calls:
+            return []
+        self.ensure_login()
+
+        def call(kwargs):
+            try:
+                return func(**kwargs)
+            except Exception as ex:
+                return ex
+
+        with ThreadPoolExecutor(max_workers=min(len(calls), max_workers or smart_settings.SMART_MAX_WORKERS),
+                                thread_name_prefix='smartconnect') as executor:
+            return list(executor.map(call, calls))
+
     def generate_patrol_label(self, *, device_id=None, prefix='wildlife', ts=None):
 
         ts = ts or datetime.now(tz=pytz.utc)
@@ -1,24 +1,36 @@
+import asyncio
 import json
 import logging
+import time
 import uuid
-from datetime import datetime
-from typing import List, Union
+from datetime import datetime, tzinfo
+from typing import Iterable, List, Optional, Union
 from functools import wraps
 
 import pytz
 import httpx
 from pydantic import parse_obj_as
 
-from .exceptions import SMARTClientException, SMARTClientServerError, SMARTClientClientError, SMARTClientServerUnreachableError, SMARTClientUnauthorizedError
-from smartconnect import models, cache, smart_settings, data
+try:
+    import h2  # noqa: F401 -- Optional, enables HTTP/2 in httpx. Install with the smartconnect-client[http2] extra.
+except ImportError:
+    h2 = None
+
+from .exceptions import SMARTClientException, SMARTClientServerError, SMARTClientClientError, SMARTClientServerUnreachableError, SMARTClientUnauthorizedError, \
+    SMARTClientSessionExpiredError, SMARTClientNotFoundError
+from smartconnect import models, cache, smart_settings, data, session, connection_pool, concurrency, retry, rate_limit, \
+    circuit_breaker, compression, dedup, timeouts, serialization, utils, snapshots
 
 logger = logging.getLogger(__name__)
 
 from smartconnect.models import SMARTRequest, SMARTResponse, Patrol, PatrolDataModel, DataModel, ConservationArea, \
-    ConfigurableDataModel, SmartConnectApiInfo
+    ConfigurableDataModel, SmartConnectApiInfo, WarmupReport, ConservationAreaIndex
 
 DEFAULT_TIMEOUT = (smart_settings.SMART_DEFAULT_CONNECT_TIMEOUT, smart_settings.SMART_DEFAULT_TIMEOUT)
 
+# Answers to a metadata download meaning the server doesn't have what was asked for, rather than failing to send it.
+NOT_FOUND_STATUS_CODES = (400, 404)
+
 
 def with_login_session():
 
@@ -27,7 +39,14 @@ def with_login_session():
         async def wrapper(self, *args, **kwargs):
             # async with self._session as session:
             await self.ensure_login()
-            return await func(self, *args, **kwargs)
+            session_id = self._session_id()
+            try:
+                return await func(self, *args, **kwargs)
+            except SMARTClientSessionExpiredError:
+                # Re-authenticate once and replay the call; a second expiry is raised to the caller.
+                self.logger.info(f"SMART Connect session expired for {self.api}, logging in again.")
+                await self.renew_login(expired_session_id=session_id)
+                return await func(self, *args, **kwargs)
         return wrapper
     return decorator
 
@@ -47,47 +66,396 @@ class AsyncSmartClient:
 
         self.logger = logging.getLogger(AsyncSmartClient.__name__)
         self.verify_ssl = smart_settings.SMART_SSL_VERIFY
+        # Reuse sessions logged in by other processes, see smartconnect.session.
+        self.use_session_store = kwargs.get('use_session_store', smart_settings.SMART_SESSION_STORE)
+        # Keep models read from the cache in process, see smartconnect.cache.LocalCache.
+        self.use_local_cache = kwargs.get('use_local_cache', smart_settings.SMART_LOCAL_CACHE)
+        # Refresh cached models when their Conservation Area's revision moves, see _ca_revision().
+        self.revision_aware_cache = kwargs.get('revision_aware_cache', smart_settings.SMART_REVISION_AWARE_CACHE)
+        self._ca_revisions = {}
+        self._revisions_polled_at = float('-inf')
+        self._revisions_lock = asyncio.Lock()
+        # Serve cached models while they are refreshed in the background, see _revalidate().
+        self.stale_while_revalidate = kwargs.get('stale_while_revalidate', smart_settings.SMART_STALE_WHILE_REVALIDATE)
+        self._revalidations = {}
+        # Let one process at a time download a model missing from the cache, see _fill().
+        self.single_flight_fill = kwargs.get('single_flight_fill', smart_settings.SMART_SINGLE_FLIGHT_FILL)
+        # Keep the list of Conservation Areas, see get_conservation_area_index().
+        self.cache_ca_list = kwargs.get('cache_ca_list', smart_settings.SMART_CA_LIST_CACHE)
+        self._ca_index = None
+        self._ca_index_lock = asyncio.Lock()
+        # Remember Conservation Areas and configurable models the server doesn't have, see _is_known_missing().
+        self.negative_cache = kwargs.get('negative_cache', smart_settings.SMART_NEGATIVE_CACHE)
+        # Fall back to on-disk snapshots of data models before downloading them, see smartconnect.snapshots.
+        self.use_snapshots = kwargs.get('use_snapshots', smart_settings.SMART_SNAPSHOTS)
         # Retries and timeouts settings
         self.max_retries = kwargs.get('max_http_retries', smart_settings.SMART_DEFAULT_CONNECT_RETRIES)
-        transport = httpx.AsyncHTTPTransport(retries=self.max_retries)
+        # Share connections with other clients for the same host, see smartconnect.connection_pool.
+        self.use_shared_pool = kwargs.get('use_shared_pool', smart_settings.SMART_SHARED_CONNECTION_POOL)
+        # Multiplex concurrent requests over one connection when the server negotiates HTTP/2.
+        self.http2 = kwargs.get('http2', smart_settings.SMART_HTTP2)
+        if self.http2 and h2 is None:
+            self.logger.warning("HTTP/2 was requested but the 'h2' package is not installed. Falling back to HTTP/1.1.")
+            self.http2 = False
+        if self.use_shared_pool:
+            transport = connection_pool.registry.async_transport(self.api, verify=self.verify_ssl, retries=self.max_retries,
+                                                                 http2=self.http2)
+        else:
+            transport = httpx.AsyncHTTPTransport(verify=self.verify_ssl, retries=self.max_retries, http2=self.http2)
+
+        # Per-endpoint read and write timeouts, see smartconnect.timeouts. Innermost, so that adaptive timeouts only see
+        # time spent on the server, not waiting for a token or a concurrency slot.
+        self.timeout_profiles = kwargs.get('timeout_profiles', smart_settings.SMART_TIMEOUT_PROFILES)
+        if self.timeout_profiles:
+            transport = timeouts.AsyncTimeoutTransport(transport, timeouts.TimeoutProfiles(
+                adaptive=kwargs.get('adaptive_timeouts', smart_settings.SMART_ADAPTIVE_TIMEOUTS)))
+
+        # Compress large data posts, see smartconnect.compression.
+        self.compress_requests = kwargs.get('compress_requests', smart_settings.SMART_COMPRESS_REQUESTS)
+        if self.compress_requests:
+            transport = compression.AsyncCompressionTransport(transport, compression.RequestCompressor())
+
+        # Adapt the number of concurrent data posts and metadata downloads to what the server handles.
+        self._limiter = None
+        if kwargs.get('adaptive_concurrency', smart_settings.SMART_ADAPTIVE_CONCURRENCY):
+            self._limiter = concurrency.AdaptiveConcurrencyLimiter(
+                initial_limit=kwargs.get('initial_concurrency'),
+                max_limit=kwargs.get('max_concurrency'),
+            )
+            transport = concurrency.AdaptiveConcurrencyTransport(transport, self._limiter)
+
+        # Wait for a token from the bucket shared by all clients of this host, see smartconnect.rate_limit. This sits
+        # outside the concurrency limiter so that time spent waiting for a token isn't mistaken for server latency.
+        self.max_requests_per_second = kwargs.get('max_requests_per_second', smart_settings.SMART_RATE_LIMIT)
+        if self.max_requests_per_second:
+            bucket = rate_limit.get_bucket(
+                self.api, rate=self.max_requests_per_second, capacity=smart_settings.SMART_RATE_LIMIT_BURST,
+                distributed=kwargs.get('distributed_rate_limit', smart_settings.SMART_RATE_LIMIT_REDIS))
+            transport = rate_limit.AsyncRateLimitTransport(transport, bucket)
+        # Fail fast while the host is down, see smartconnect.circuit_breaker.
+        self.use_circuit_breaker = kwargs.get('use_circuit_breaker', smart_settings.SMART_CIRCUIT_BREAKER)
+        if self.use_circuit_breaker:
+            transport = circuit_breaker.AsyncCircuitBreakerTransport(transport, circuit_breaker.get_breaker(self.api))
+
+        # Retry 5xx and 429 responses, see smartconnect.retry. Each attempt waits for its own rate limit token and
+        # concurrency slot.
+        self.retry_policy = kwargs.get('retry_policy') or retry.RetryPolicy()
+        if self.retry_policy.max_retries:
+            transport = retry.AsyncRetryTransport(transport, self.retry_policy)
+
+        # Serve identical concurrent GETs from one call, see smartconnect.dedup. Outermost, so that waiters share its
+        # retries and don't take rate limit tokens or concurrency slots of their own.
+        self.deduplicate_requests = kwargs.get('deduplicate_requests', smart_settings.SMART_DEDUPLICATE_REQUESTS)
+        if self.deduplicate_requests:
+            transport = dedup.AsyncDeduplicationTransport(transport)
+
         connect_timeout = kwargs.get('connect_timeout', smart_settings.SMART_DEFAULT_CONNECT_TIMEOUT)
         data_timeout = kwargs.get('data_timeout', smart_settings.SMART_DEFAULT_TIMEOUT)
         timeout = httpx.Timeout(data_timeout, connect=connect_timeout, pool=connect_timeout)
 
+        # Connections to open on __aenter__, see warmup().
+        self.warmup_connections = kwargs.get('warmup_connections', smart_settings.SMART_WARMUP_CONNECTIONS)
+
         # Session
-        self._session = httpx.AsyncClient(transport=transport, timeout=timeout, verify=self.verify_ssl)
+        self._transport = transport
+        self._session = httpx.AsyncClient(transport=transport, timeout=timeout, verify=self.verify_ssl,
+                                          event_hooks={'response': [self._raise_on_session_expired]})
+        # Guards the login handshake so concurrent callers share a single in-flight login.
+        self._login_lock = asyncio.Lock()
+
+    @property
+    def concurrency_limit(self):
+        '''
+        Current adaptive concurrency limit, or None when adaptive concurrency is disabled.
+        '''
+        return self._limiter.limit if self._limiter else None
+
+    def _session_id(self):
+        for k, v in self._session.cookies.items():
+            if k == 'JSESSIONID' and v:
+                return v
+        return None
+
+    async def _raise_on_session_expired(self, response):
+        if session.is_session_expired(response):
+            raise SMARTClientSessionExpiredError(f"SMART Connect session expired. Status code: {response.status_code}")
 
     async def ensure_login(self):
         '''
         Login flow for SMART Connect. If the session already has a JSESSIONID cookie, it is assumed to be logged in.
+        Concurrent callers wait on the same login instead of each running their own handshake.
         '''
-        for k, v in self._session.cookies.items():
-            if k == 'JSESSIONID' and v:
+        # While a login is in progress the cookie set by the landing page isn't authenticated yet.
+        if self._session_id() and not self._login_lock.locked():
+            return self._session
+
+        async with self._login_lock:
+            # Another coroutine may have completed the login while we were waiting for the lock.
+            if self._session_id() or await self._restore_session():
                 return self._session
-        
-        # Request the landing page to prime the session.
-        landing_page = await self._session.get(f'{self.api}/connect/home')
-        if not landing_page.is_success:
-            raise SMARTClientServerUnreachableError(f"Failed to retrieve landing page {landing_page.url}. Status code: {landing_page.status_code}")
-        
-        login_result = await self._session.post(f'{self.api}/j_security_check', data={"j_username": self.username, "j_password": self.password})
+            return await self._login()
 
-        if login_result.is_success or login_result.is_redirect:
-            return self._session
-        
-        if login_result.status_code == 401:
-            raise SMARTClientUnauthorizedError(f"Failed to login to SMART Connect {login_result.url}. Status code: {login_result.status_code}")
-      
-        logger.error(f"Failed to login to SMART Connect {login_result.url}. Status code: {login_result.status_code}, {login_result.text[:250]}")
-        exception_class = SMARTClientClientError if login_result.is_client_error else SMARTClientServerError
-        raise exception_class(f"Failed to login to SMART Connect {login_result.url}. Status code: {login_result.status_code}")
+    async def renew_login(self, *, expired_session_id=None):
+        '''
+        Discard an expired session and login again. Callers that hit the same expired session share one re-login.
+        '''
+        async with self._login_lock:
+            session_id = self._session_id()
+            if session_id and session_id != expired_session_id:
+                return self._session
+
+            self._session.cookies.clear()
+            if await self._restore_session(expired_session_id=expired_session_id):
+                return self._session
+            return await self._login()
+
+    async def _restore_session(self, *, expired_session_id=None):
+        if not self.use_session_store:
+            return False
+
+        session_id = await session.aget_session_id(self.api, self.username)
+        if not session_id or session_id == expired_session_id:
+            return False
+
+        self.logger.debug(f"Reusing stored SMART Connect session for {self.api}.")
+        self._session.cookies.set('JSESSIONID', session_id)
+        return True
+
+    async def _save_session(self):
+        if self.use_session_store and (session_id := self._session_id()):
+            await session.asave_session_id(self.api, self.username, session_id)
+
+    async def _ca_revision(self, ca_uuid):
+        '''
+        Current revision of a Conservation Area, from a get_conservation_areas() poll made at most
+        SMART_REVISION_POLL_INTERVAL seconds ago and shared by concurrent callers. None if it can't be told, in which
+        case cached models are used as is.
+
+        With cache_ca_list, revisions are read from the list kept for get_conservation_area_index() instead, so they
+        are at most SMART_CA_LIST_TTL seconds old.
+        '''
+        if self.cache_ca_list:
+            try:
+                conservation_area = (await self.get_conservation_area_index()).get(ca_uuid)
+            except Exception:
+                self.logger.warning(f"Failed polling Conservation Area revisions from {self.api}.", exc_info=True)
+                return None
+            return conservation_area.revision if conservation_area else None
+
+        if self._revisions_expired():
+            async with self._revisions_lock:
+                # Callers that waited for another's poll use its result.
+                if self._revisions_expired():
+                    try:
+                        self._ca_revisions = {ca.uuid: ca.revision for ca in await self.get_conservation_areas()}
+                        self._revisions_polled_at = time.monotonic()
+                    except Exception:
+                        self.logger.warning(f"Failed polling Conservation Area revisions from {self.api}.",
+                                            exc_info=True)
+                        return None
+
+        try:
+            return self._ca_revisions.get(uuid.UUID(ca_uuid))
+        except ValueError:
+            return None
+
+    def _revisions_expired(self):
+        return time.monotonic() - self._revisions_polled_at >= smart_settings.SMART_REVISION_POLL_INTERVAL
+
+    def _is_current(self, model, revision):
+        if revision is None or model.revision == revision:
+            return True
+
+        self.logger.info(f"Cached model is at revision {model.revision}, its Conservation Area is at {revision}. "
+                         f"Downloading it again.")
+        return False
+
+    def _revalidate(self, key, refresh, *args, **kwargs):
+        '''
+        Run refresh(*args, **kwargs) in a background task to replace the cached model at key, unless it is already being
+        refreshed.
+        '''
+        if key in self._revalidations:
+            return
+
+        async def run():
+            try:
+                await refresh(*args, **kwargs)
+            except Exception:
+                self.logger.exception(f"Failed refreshing {key} in the background.")
+            finally:
+                del self._revalidations[key]
+
+        self.logger.debug(f"Serving {key} while refreshing it in the background.")
+        # Keep a reference, the event loop only holds weak references to tasks.
+        self._revalidations[key] = asyncio.ensure_future(run())
+
+    async def _fill(self, read, download, *, cache_key, **kwargs):
+        '''
+        Await download(cache_key=cache_key, **kwargs) to fill the cache entry at cache_key, holding its fill lock so
+        that other processes missing the same entry wait and read what this one stores instead of downloading it too.
+        '''
+        if not self.single_flight_fill:
+            return await download(cache_key=cache_key, **kwargs)
+
+        try:
+            lock = cache.fill_lock(cache_key, cache.get_async_cache())
+            acquired = await lock.acquire()
+        except Exception:
+            logger.warning('Failed acquiring cache fill lock.', extra={'cache_key': cache_key})
+            return await download(cache_key=cache_key, **kwargs)
+
+        if acquired:
+            try:
+                return await download(cache_key=cache_key, **kwargs)
+            finally:
+                try:
+                    await lock.release()
+                except Exception:
+                    logger.warning('Failed releasing cache fill lock.', extra={'cache_key': cache_key})
+
+        self.logger.debug(f"Waiting for another process to fill {cache_key}.")
+        deadline = time.monotonic() + smart_settings.SMART_FILL_WAIT_TIMEOUT
+        try:
+            while await lock.locked() and time.monotonic() < deadline:
+                await asyncio.sleep(smart_settings.SMART_FILL_POLL_INTERVAL)
+        except Exception:
+            logger.warning('Failed waiting on cache fill lock.', extra={'cache_key': cache_key})
+
+        # Not from a snapshot: it may be older than what the other process was downloading.
+        if (model := await read(cache_key, use_local=False, use_snapshot=False)) is not None:
+            return model
+
+        # The other process failed, or took too long.
+        return await download(cache_key=cache_key, **kwargs)
+
+    async def _is_known_missing(self, cache_key):
+        '''
+        Whether the server recently didn't have what would be cached at cache_key, see _mark_missing().
+        '''
+        if not self.negative_cache:
+            return False
+        try:
+            return bool(await cache.get_async_cache().get(f'{cache_key}:missing'))
+        except Exception:
+            logger.warning('Failed reading negative cache entry.', extra={'cache_key': cache_key})
+            return False
+
+    async def _mark_missing(self, cache_key):
+        if self.negative_cache:
+            try:
+                await cache.get_async_cache().set(f'{cache_key}:missing', 1, ex=smart_settings.SMART_NEGATIVE_CACHE_TTL)
+            except Exception:
+                logger.warning('Failed writing negative cache entry.', extra={'cache_key': cache_key})
+
+    async def _read_snapshot(self, cache_key):
+        if not self.use_snapshots:
+            return None
+        try:
+            model = await asyncio.to_thread(snapshots.store.load, cache_key, self.use_language_code)
+        except Exception:
+            logger.warning('Failed reading data model snapshot.', extra={'cache_key': cache_key}, exc_info=True)
+            return None
+
+        if model is not None:
+            self._set_local(cache_key, model)
+            self.logger.debug(f"Using snapshot of SMART Datamodel", extra={"cached_key": cache_key})
+        return model
+
+    async def _save_snapshot(self, cache_key, model):
+        if self.use_snapshots:
+            try:
+                await asyncio.to_thread(snapshots.store.save, cache_key, model, self.use_language_code)
+            except Exception:
+                logger.warning('Failed saving data model snapshot.', extra={'cache_key': cache_key}, exc_info=True)
+
+    def _get_local(self, cache_key):
+        if self.use_local_cache:
+            return cache.local_cache.get(cache_key, self.use_language_code)
+        return None
+
+    def _set_local(self, cache_key, model):
+        if self.use_local_cache:
+            cache.local_cache.set(cache_key, model, self.use_language_code)
+
+    async def _login(self):
+        try:
+            # Request the landing page to prime the session.
+            landing_page = await self._session.get(f'{self.api}/connect/home')
+            if not landing_page.is_success:
+                raise SMARTClientServerUnreachableError(f"Failed to retrieve landing page {landing_page.url}. Status code: {landing_page.status_code}")
+
+            login_result = await self._session.post(f'{self.api}/j_security_check', data={"j_username": self.username, "j_password": self.password})
+
+            if login_result.is_success or login_result.is_redirect:
+                await self._save_session()
+                return self._session
+
+            if login_result.status_code == 401:
+                raise SMARTClientUnauthorizedError(f"Failed to login to SMART Connect {login_result.url}. Status code: {login_result.status_code}")
+
+            logger.error(f"Failed to login to SMART Connect {login_result.url}. Status code: {login_result.status_code}, {login_result.text[:250]}")
+            exception_class = SMARTClientClientError if login_result.is_client_error else SMARTClientServerError
+            raise exception_class(f"Failed to login to SMART Connect {login_result.url}. Status code: {login_result.status_code}")
+        except BaseException:
+            # The landing page's cookie was never authenticated. Drop it, or later callers would take it for a
+            # logged in session.
+            self._session.cookies.clear()
+            raise
 
     async def close(self):
         await self._session.aclose()
 
+    async def warmup(self, *, connections: int = None) -> WarmupReport:
+        '''
+        Open `connections` pooled connections to the server while logging in, so that the first requests don't pay for
+        DNS, TCP, TLS and the login handshake in sequence. Idle connections are closed by the pool after its keep-alive
+        expiry, so warm up shortly before the client is needed.
+        '''
+        connections = self.warmup_connections if connections is None else connections
+        started = time.monotonic()
+
+        async def connect_phase():
+            phases = await asyncio.gather(*[self._open_connection() for _ in range(connections)])
+            return phases, time.monotonic() - started
+
+        async def login_phase():
+            await self.ensure_login()
+            return time.monotonic() - started
+
+        (phases, connect), login = await asyncio.gather(connect_phase(), login_phase())
+        tcp = [phase['tcp'] for phase in phases if 'tcp' in phase]
+        tls = [phase['tls'] for phase in phases if 'tls' in phase]
+        report = WarmupReport(connections=connections, connect=connect, tcp=max(tcp, default=None),
+                              tls=max(tls, default=None), login=login, total=time.monotonic() - started)
+        self.logger.info(f"Warmed up SMART Connect client for {self.api}.", extra=dict(warmup=report.dict()))
+        return report
+
+    async def _open_connection(self):
+        '''
+        Send a HEAD request for the landing page straight to the transport, so that its cookies don't end up in the
+        session while the login is in progress. Returns how long the TCP and TLS handshakes took, if they happened.
+        '''
+        phases, started = {}, {}
+
+        async def trace(event, info):
+            name, _, stage = event.rpartition('.')
+            if stage == 'started':
+                started[name] = time.monotonic()
+            elif stage == 'complete' and name in started:
+                phases[name] = time.monotonic() - started[name]
+
+        request = self._session.build_request('HEAD', f'{self.api}/connect/home', extensions={'trace': trace})
+        response = await self._transport.handle_async_request(request)
+        await response.aclose()
+        return {phase: phases[f'connection.{event}'] for phase, event in (('tcp', 'connect_tcp'), ('tls', 'start_tls'))
+                if f'connection.{event}' in phases}
+
     # Support using this client as an async context manager.
     async def __aenter__(self):
         await self._session.__aenter__()
+        if self.warmup_connections:
+            await self.warmup()
         return self
 
     async def __aexit__(self, exc_type, exc_value, traceback):
@@ -111,23 +479,45 @@ class AsyncSmartClient:
             logger.warning(f'The SMART Connect server at {self.api} might not support the /api/info request.')
 
     @with_login_session()
-    async def get_conservation_area(self, *, ca_uuid: str = None, force: bool = False):
+    async def get_conservation_area(self, *, ca_uuid: str = None, force: bool = False,
+                                    stale_while_revalidate: bool = None):
 
         cache_key = f"cache:smart-ca:{ca_uuid}:metadata"
-        if not force:
-            self.logger.info(f"Looking up CA cached at {cache_key}.")
-            try:
-                cached_data = cache.cache.get(cache_key)
-                if cached_data:
-                    self.logger.info(f"Found CA cached at {cache_key}.")
-                    conservation_area = ConservationArea.parse_raw(cached_data)
+        if stale_while_revalidate is None:
+            stale_while_revalidate = self.stale_while_revalidate
+        if not force or stale_while_revalidate:
+            if (conservation_area := await self._read_conservation_area(cache_key)) is not None:
+                if not force:
                     return conservation_area
+                self._revalidate(cache_key, self._download_conservation_area, ca_uuid=ca_uuid, cache_key=cache_key,
+                                 force=True)
+                return conservation_area
+
+        if not force and await self._is_known_missing(cache_key):
+            self.logger.info(f"Conservation Area {ca_uuid} was recently not found, not looking it up again yet.")
+            return None
+
+        return await self._download_conservation_area(ca_uuid=ca_uuid, cache_key=cache_key, force=force)
 
-                self.logger.info(f"Cache miss for {cache_key}")
-            except:
-                self.logger.info(f"Cache miss/error for {cache_key}")
-                pass
+    async def _read_conservation_area(self, cache_key):
+        if (conservation_area := self._get_local(cache_key)) is not None:
+            return conservation_area
 
+        self.logger.info(f"Looking up CA cached at {cache_key}.")
+        try:
+            cached_data = await cache.get_async_cache().get(cache_key)
+            if cached_data:
+                self.logger.info(f"Found CA cached at {cache_key}.")
+                conservation_area = ConservationArea.parse_raw(cached_data)
+                self._set_local(cache_key, conservation_area)
+                return conservation_area
+
+            self.logger.info(f"Cache miss for {cache_key}")
+        except:
+            self.logger.info(f"Cache miss/error for {cache_key}")
+            pass
+
+    async def _download_conservation_area(self, *, ca_uuid, cache_key, force=False):
         try:
             self.logger.info(
                 "Querying Smart Connect for CAs at endpoint: %s, username: %s",
@@ -135,22 +525,23 @@ class AsyncSmartClient:
                 self.username,
             )
 
-            for ca in await self.get_conservation_areas():
-                if ca.uuid == uuid.UUID(ca_uuid):
-                    conservation_area = ca
-                    break
-            else:
+            index = await self.get_conservation_area_index(force=force)
+            if (conservation_area := index.get(ca_uuid)) is None and self.cache_ca_list and not force:
+                # It may have been added since the list was cached.
+                conservation_area = (await self.get_conservation_area_index(force=True)).get(ca_uuid)
+
+            if conservation_area is None:
                 logger.error(
                     f"Can't find a Conservation Area with UUID: {ca_uuid}"
                 )
-                conservation_area = None
-
-            if conservation_area:
+                await self._mark_missing(cache_key)
+            else:
                 self.logger.info(f"Caching CA metadata at {cache_key}")
-                cache.cache.set(
+                await cache.get_async_cache().set(
                     name=cache_key,
                     value=json.dumps(dict(conservation_area), default=str),
                 )
+                self._set_local(cache_key, conservation_area)
 
             return conservation_area
 
@@ -160,6 +551,67 @@ class AsyncSmartClient:
             )
             raise SMARTClientException(f"Failed to get SMART Conservation Areas") from ex
 
+    async def get_conservation_area_index(self, *, force: bool = False) -> ConservationAreaIndex:
+        '''
+        Get all Conservation Areas of the server, indexed by uuid and label.
+
+        With cache_ca_list, the list is kept in the cache and in this client for SMART_CA_LIST_TTL seconds from when it
+        was downloaded, so that looking up many Conservation Areas downloads it once. Concurrent callers share one
+        download.
+        '''
+        if not self.cache_ca_list:
+            return ConservationAreaIndex(await self.get_conservation_areas())
+
+        known = self._ca_index
+        if not force and self._ca_index_is_fresh():
+            return known
+
+        async with self._ca_index_lock:
+            # Another caller refreshed the list while this one waited.
+            if self._ca_index is not known:
+                return self._ca_index
+
+            if not force and (index := await self._read_ca_index()) is not None:
+                self._ca_index = index
+                return index
+
+            index = ConservationAreaIndex(await self.get_conservation_areas())
+            try:
+                await cache.get_async_cache().set(self._ca_index_key, json.dumps(index.export_as_dict()),
+                                                  ex=smart_settings.SMART_CA_LIST_TTL)
+            except Exception:
+                logger.warning('Failed caching the list of Conservation Areas.', extra={'api': self.api})
+            self._ca_index = index
+            return index
+
+    def _ca_index_is_fresh(self):
+        return self._ca_index is not None and self._ca_index.fetched_at + smart_settings.SMART_CA_LIST_TTL > time.time()
+
+    @property
+    def _ca_index_key(self):
+        return f'cache:smart-ca:list:{self.api}'
+
+    async def _read_ca_index(self):
+        try:
+            if cached_data := await cache.get_async_cache().get(self._ca_index_key):
+                return ConservationAreaIndex.import_from_dict(json.loads(cached_data))
+        except Exception:
+            logger.exception('Failed on reading the list of Conservation Areas from cache.', extra={'api': self.api})
+
+    async def guess_ca_timezone(self, ca_uuid: str) -> Optional[tzinfo]:
+        '''
+        Guess a Conservation Area's timezone from its boundary, see utils.guess_ca_timezone(). With cache_ca_list,
+        guesses are kept along with the list.
+        '''
+        index = await self.get_conservation_area_index()
+        if (conservation_area := index.get(ca_uuid)) is None:
+            return None
+        if conservation_area.uuid not in index.timezones:
+            # Loading the timezone data blocks.
+            index.timezones[conservation_area.uuid] = await asyncio.to_thread(utils.guess_ca_timezone,
+                                                                              conservation_area)
+        return index.timezones[conservation_area.uuid]
+
     @with_login_session()
     async def get_conservation_areas(self) -> List[models.ConservationArea]:
 
@@ -235,6 +687,8 @@ class AsyncSmartClient:
                 self.logger.error(
                     f'Failed to download data model for  configurable model {cm_uuid}. Status_code is: {config_datamodel.status_code}',
                     extra=dict(**extra_dict, status_code=config_datamodel.status_code))
+                if config_datamodel.status_code in NOT_FOUND_STATUS_CODES:
+                    raise SMARTClientNotFoundError(f'Configurable data model {cm_uuid} not found')
                 raise Exception('Failed to download Data Model')
 
             cdm = ConfigurableDataModel(cm_uuid=cm_uuid, use_language_code=self.use_language_code)
@@ -243,37 +697,70 @@ class AsyncSmartClient:
             return cdm
 
     @with_login_session()
-    async def get_configurable_data_model(self, *, cm_uuid: str = None, force: bool = False):
-        # TODO: version consideration
+    async def get_configurable_data_model(self, *, cm_uuid: str = None, ca_uuid: str = None, force: bool = False,
+                                          stale_while_revalidate: bool = None):
         # TODO: Implement caching
 
-        ca_uuid = 'na'
-        cache_key = f'cache:smart-ca:{ca_uuid}:cdm:{cm_uuid}'
+        # ca_uuid is the CA the model belongs to, which is only needed to check the model's revision.
+        cache_key = f'cache:smart-ca:na:cdm:{cm_uuid}'
 
-        if not force:
-            try:
-                cached_data = cache.cache.get(cache_key)
-                if cached_data:
-                    cm = ConfigurableDataModel(use_language_code=self.use_language_code)
-                    cm.import_from_dict(json.loads(cached_data))
+        revision = await self._ca_revision(ca_uuid) if self.revision_aware_cache and ca_uuid else None
+        if stale_while_revalidate is None:
+            stale_while_revalidate = self.stale_while_revalidate
+        if not force or stale_while_revalidate:
+            if (model := await self._read_configurable_data_model(cache_key)) is not None:
+                if not force and self._is_current(model, revision):
+                    return model
+                if stale_while_revalidate:
+                    self._revalidate(cache_key, self._fill, self._read_configurable_data_model,
+                                     self._download_configurable_data_model, cm_uuid=cm_uuid, cache_key=cache_key,
+                                     revision=revision)
+                    return model
+
+        if not force and await self._is_known_missing(cache_key):
+            raise SMARTClientNotFoundError(f"Configurable data model {cm_uuid} was recently not found.")
+
+        return await self._fill(self._read_configurable_data_model, self._download_configurable_data_model,
+                                cm_uuid=cm_uuid, cache_key=cache_key, revision=revision)
+
+    async def _read_configurable_data_model(self, cache_key, use_local=True, use_snapshot=True):
+        if use_local and (model := self._get_local(cache_key)) is not None:
+            return model
+
+        try:
+            cached_data = await cache.get_async_cache().get(cache_key)
+            if cached_data:
+                cm = ConfigurableDataModel(use_language_code=self.use_language_code)
+                cm.import_from_dict(serialization.loads(cached_data))
+                self._set_local(cache_key, cm)
+
+                self.logger.debug(
+                    f"Using cached SMART Configurable Data Model", extra={"cached_key": cache_key}
+                )
+                return cm
 
-                    self.logger.debug(
-                        f"Using cached SMART Configurable Data Model", extra={"cached_key": cache_key}
-                    )
-                    return cm
+        except Exception as ex:
+            logger.exception('Failed on reading configurable model from cache.', extra={'cache_key': cache_key})
 
-            except Exception as ex:
-                logger.exception('Failed on reading configurable model from cache.', extra={'cache_key': cache_key})
+        return await self._read_snapshot(cache_key) if use_snapshot else None
 
+    async def _download_configurable_data_model(self, *, cm_uuid, cache_key, revision):
         # Re-download and cache.
-        ca_config_datamodel = await self.download_configurable_datamodel(
-            cm_uuid=cm_uuid
-        )
-        cache.cache.set(cache_key, json.dumps(ca_config_datamodel.export_as_dict()))
+        try:
+            ca_config_datamodel = await self.download_configurable_datamodel(
+                cm_uuid=cm_uuid
+            )
+        except SMARTClientNotFoundError:
+            await self._mark_missing(cache_key)
+            raise
+        ca_config_datamodel.revision = revision
+        await self._save_snapshot(cache_key, ca_config_datamodel)
+        await cache.get_async_cache().set(cache_key, serialization.dumps(ca_config_datamodel.export_as_dict()))
+        self._set_local(cache_key, ca_config_datamodel)
         return ca_config_datamodel
 
     @with_login_session()
-    async def get_data_model(self, *, ca_uuid: str = None, force: bool = False):
+    async def get_data_model(self, *, ca_uuid: str = None, force: bool = False, stale_while_revalidate: bool = None):
 
         # CA Data Model is not available for versions below 7. Use a blank data model.
         if self.version.startswith("6"):
@@ -282,22 +769,47 @@ class AsyncSmartClient:
             return blank_datamodel
 
         cache_key = f"cache:smart-ca:{ca_uuid}:datamodel"
-        if not force:
-            try:
-                cached_data = cache.cache.get(cache_key)
-                if cached_data:
-                    dm = DataModel(use_language_code=self.use_language_code)
-                    dm.import_from_dict(json.loads(cached_data))
-                    self.logger.debug(
-                        f"Using cached SMART Datamodel", extra={"cached_key": cache_key}
-                    )
-                    return dm
-
-            except Exception as ex:
-                logger.exception('Failed on reading data model from cache.', extra={'cache_key': cache_key})
+        revision = await self._ca_revision(ca_uuid) if self.revision_aware_cache else None
+        if stale_while_revalidate is None:
+            stale_while_revalidate = self.stale_while_revalidate
+        if not force or stale_while_revalidate:
+            if (model := await self._read_data_model(cache_key)) is not None:
+                if not force and self._is_current(model, revision):
+                    return model
+                if stale_while_revalidate:
+                    self._revalidate(cache_key, self._fill, self._read_data_model, self._download_data_model,
+                                     ca_uuid=ca_uuid, cache_key=cache_key, revision=revision)
+                    return model
 
             logger.debug(f"Cache miss for SMART Datamodel", extra={"cached_key": cache_key})
 
+        return await self._fill(self._read_data_model, self._download_data_model, ca_uuid=ca_uuid, cache_key=cache_key,
+                                revision=revision)
+
+    async def _read_data_model(self, cache_key, use_local=True, use_snapshot=True):
+        if use_local and (model := self._get_local(cache_key)) is not None:
+            return model
+
+        try:
+            cached_data = await cache.get_async_cache().get(cache_key)
+            if cached_data:
+                return self._load_data_model(cache_key, cached_data)
+
+        except Exception as ex:
+            logger.exception('Failed on reading data model from cache.', extra={'cache_key': cache_key})
+
+        return await self._read_snapshot(cache_key) if use_snapshot else None
+
+    def _load_data_model(self, cache_key, cached_data):
+        dm = DataModel(use_language_code=self.use_language_code)
+        dm.import_from_dict(serialization.loads(cached_data))
+        self._set_local(cache_key, dm)
+        self.logger.debug(
+            f"Using cached SMART Datamodel", extra={"cached_key": cache_key}
+        )
+        return dm
+
+    async def _download_data_model(self, *, ca_uuid, cache_key, revision):
         try:
             ca_datamodel = await self.download_datamodel(
                 ca_uuid=ca_uuid
@@ -307,13 +819,73 @@ class AsyncSmartClient:
             raise SMARTClientException(f"Failed downloading SMART Datamodel for CA {ca_uuid}") from e
 
         if ca_datamodel:
-            cache.cache.set(
+            ca_datamodel.revision = revision
+            await self._save_snapshot(cache_key, ca_datamodel)
+            await cache.get_async_cache().set(
                 name=cache_key,
-                value=json.dumps(ca_datamodel.export_as_dict()),
+                value=serialization.dumps(ca_datamodel.export_as_dict()),
             )
+            self._set_local(cache_key, ca_datamodel)
 
         return ca_datamodel
 
+    async def get_data_models(self, *, ca_uuids: Iterable[str], force: bool = False, max_workers: int = None) -> dict:
+        '''
+        Get the data models of many Conservation Areas, see get_data_model().
+
+        Cached models are read with a single MGET and the others are downloaded, at most max_workers at a time. Returns
+        a dict of each CA uuid's data model or, if downloading it failed, the exception raised.
+        '''
+        ca_uuids = list(dict.fromkeys(ca_uuids))
+        if self.version.startswith("6"):
+            return {ca_uuid: await self.get_data_model(ca_uuid=ca_uuid) for ca_uuid in ca_uuids}
+
+        cache_keys = {ca_uuid: f"cache:smart-ca:{ca_uuid}:datamodel" for ca_uuid in ca_uuids}
+        revisions = {ca_uuid: await self._ca_revision(ca_uuid) if self.revision_aware_cache else None
+                     for ca_uuid in ca_uuids}
+        models = {} if force else {ca_uuid: model for ca_uuid, model in (await self._read_data_models(cache_keys)).items()
+                                   if self._is_current(model, revisions[ca_uuid])}
+
+        slots = asyncio.Semaphore(max_workers or smart_settings.SMART_MAX_WORKERS)
+
+        async def download(ca_uuid):
+            async with slots:
+                return await self._fill(self._read_data_model, self._download_data_model, ca_uuid=ca_uuid,
+                                        cache_key=cache_keys[ca_uuid], revision=revisions[ca_uuid])
+
+        if missing := [ca_uuid for ca_uuid in ca_uuids if ca_uuid not in models]:
+            logger.debug(f"Cache miss for {len(missing)} of {len(ca_uuids)} SMART Datamodels")
+            await self.ensure_login()
+            models.update(zip(missing, await asyncio.gather(*[download(ca_uuid) for ca_uuid in missing],
+                                                            return_exceptions=True)))
+        return {ca_uuid: models[ca_uuid] for ca_uuid in ca_uuids}
+
+    async def _read_data_models(self, cache_keys: dict) -> dict:
+        models = {}
+        for ca_uuid, cache_key in cache_keys.items():
+            if (model := self._get_local(cache_key)) is not None:
+                models[ca_uuid] = model
+
+        if not (remote := {ca_uuid: cache_key for ca_uuid, cache_key in cache_keys.items() if ca_uuid not in models}):
+            return models
+        try:
+            cached = await cache.get_async_cache().mget(list(remote.values()))
+        except Exception:
+            logger.exception('Failed on reading data models from cache.', extra={'cache_keys': list(remote.values())})
+            cached = [None] * len(remote)
+
+        for (ca_uuid, cache_key), cached_data in zip(remote.items(), cached):
+            if cached_data:
+                try:
+                    models[ca_uuid] = self._load_data_model(cache_key, cached_data)
+                except Exception:
+                    logger.exception('Failed on reading data model from cache.', extra={'cache_key': cache_key})
+
+        for ca_uuid, cache_key in remote.items():
+            if ca_uuid not in models and (model := await self._read_snapshot(cache_key)) is not None:
+                models[ca_uuid] = model
+        return models
+
     @with_login_session()
     async def download_datamodel(self, *, ca_uuid: str = None):
         extra_dict = dict(
@@ -1,14 +1,140 @@
+import asyncio
 import json
+import threading
+import time
+import weakref
+from collections import OrderedDict
 
 import redis
+import redis.asyncio
 
-from smartconnect import smart_settings
+from smartconnect import smart_settings, snapshots
+from smartconnect.cache_backends import MemoryCache, FileCache, AsyncCacheBackend
 
 state_key_base = 'er.function.state'
 
-cache = redis.Redis(
-    host=smart_settings.REDIS_HOST, port=smart_settings.REDIS_PORT, db=smart_settings.REDIS_DB
-)
+BACKENDS = ('redis', 'memory', 'file')
+
+
+def create_backend(name: str):
+    '''
+    Create the cache backend called name: a Redis client, or one of smartconnect.cache_backends.
+    '''
+    if name == 'redis':
+        return redis.Redis(host=smart_settings.REDIS_HOST, port=smart_settings.REDIS_PORT, db=smart_settings.REDIS_DB)
+    if name == 'memory':
+        return MemoryCache(maxsize=smart_settings.SMART_MEMORY_CACHE_SIZE)
+    if name == 'file':
+        return FileCache(directory=smart_settings.SMART_CACHE_DIR)
+    raise ValueError(f"Unsupported cache backend {name}, expected one of {', '.join(BACKENDS)}")
+
+
+cache = create_backend(smart_settings.SMART_CACHE_BACKEND)
+
+# Asyncio clients by event loop, or for backends other than Redis the one client, see get_async_cache().
+_async_caches = weakref.WeakKeyDictionary()
+_async_backend = None
+
+
+def get_async_cache():
+    '''
+    Get the asyncio client to the cache for the running event loop, for use from coroutines instead of `cache`, which
+    blocks the loop. Redis connections can't be shared between loops, so with Redis each loop gets a client with its
+    own connection pool.
+    '''
+    global _async_backend
+    if not isinstance(cache, redis.Redis):
+        if _async_backend is None or _async_backend.backend is not cache:
+            _async_backend = AsyncCacheBackend(cache)
+        return _async_backend
+
+    loop = asyncio.get_running_loop()
+    if (async_cache := _async_caches.get(loop)) is None:
+        async_cache = _async_caches[loop] = redis.asyncio.Redis(connection_pool=redis.asyncio.ConnectionPool(
+            host=smart_settings.REDIS_HOST, port=smart_settings.REDIS_PORT, db=smart_settings.REDIS_DB,
+            max_connections=smart_settings.REDIS_ASYNC_MAX_CONNECTIONS,
+        ))
+    return async_cache
+
+
+class LocalCache:
+    '''
+    Bounded in-process LRU cache with a TTL, holding model objects already built from what is cached in Redis.
+
+    Entries are stored under the Redis cache key they were built from, plus a variant such as the language code the
+    model was built for, so that invalidate() with the Redis key drops every variant. Models handed out are shared by
+    every caller in the process and must not be modified.
+    '''
+
+    def __init__(self, *, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: str, variant: str = None):
+        with self._lock:
+            entry = self._entries.get((key, variant))
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[(key, variant)]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end((key, variant))
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value, variant: str = None):
+        with self._lock:
+            self._entries[(key, variant)] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end((key, variant))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: str):
+        with self._lock:
+            for entry_key in [entry_key for entry_key in self._entries if entry_key[0] == key]:
+                del self._entries[entry_key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return dict(size=len(self._entries), hits=self.hits, misses=self.misses, evictions=self.evictions,
+                        hit_rate=self.hits / lookups if lookups else 0.0)
+
+
+local_cache = LocalCache(maxsize=smart_settings.SMART_LOCAL_CACHE_SIZE, ttl=smart_settings.SMART_LOCAL_CACHE_TTL)
+
+
+def invalidate(key: str):
+    '''
+    Drop a cached model from Redis, from this process' local cache and from the snapshot store. Other processes keep
+    their local copy until its TTL runs out.
+    '''
+    cache.delete(key)
+    local_cache.invalidate(key)
+    snapshots.store.delete(key)
+
+
+def fill_lock(key: str, redis_client=None):
+    '''
+    Lock held, for at most SMART_FILL_LOCK_TIMEOUT seconds, by the one process downloading the model to store at key.
+    Pass the client from get_async_cache() to get a lock usable from coroutines.
+    '''
+    return (redis_client or cache).lock(f'{key}:fill', timeout=smart_settings.SMART_FILL_LOCK_TIMEOUT, blocking=False)
 
 
 def save_poll_time(state: str, integration_id: str):
@@ -20,4 +146,3 @@ def get_state(integration_id: str):
     state = cache.get(f'{state_key_base}.{integration_id}')
 
     return json.loads(state) if state else {}
-
@@ -0,0 +1,316 @@
+'''
+Cache backends usable in place of Redis, selected with SMART_CACHE_BACKEND, see smartconnect.cache.
+
+They implement the part of the redis-py client API this package uses: get(), set() with ex and nx, delete(), mget()
+and lock(). Values are returned as bytes, as redis-py returns them. The 'redis' backend is a redis-py client itself.
+'''
+import abc
+import asyncio
+import contextlib
+import hashlib
+import os
+import struct
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+def _to_bytes(value) -> bytes:
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, str):
+        return value.encode('utf-8')
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return repr(value).encode('ascii')
+    raise TypeError(f"Invalid cache value of type {type(value).__name__}, expected bytes, str, int or float.")
+
+
+class CacheLock:
+    '''
+    Lock on a key of a CacheBackend that expires after timeout seconds, like redis-py's Lock.
+    '''
+
+    def __init__(self, backend, name: str, *, timeout: float = None, blocking: bool = True,
+                 blocking_timeout: float = None, sleep: float = 0.1):
+        self.backend = backend
+        self.name = name
+        self.timeout = timeout
+        self.blocking = blocking
+        self.blocking_timeout = blocking_timeout
+        self.sleep = sleep
+        self.token = None
+
+    def acquire(self, blocking: bool = None, blocking_timeout: float = None) -> bool:
+        blocking = self.blocking if blocking is None else blocking
+        blocking_timeout = self.blocking_timeout if blocking_timeout is None else blocking_timeout
+        token = uuid.uuid4().hex
+        deadline = None if blocking_timeout is None else time.monotonic() + blocking_timeout
+        while not self.backend.set(self.name, token, ex=self.timeout, nx=True):
+            if not blocking or (deadline is not None and time.monotonic() >= deadline):
+                return False
+            time.sleep(self.sleep)
+        self.token = token
+        return True
+
+    def release(self):
+        token, self.token = self.token, None
+        if token is None or not self.backend.delete_if_equal(self.name, token):
+            raise RuntimeError(f"Cannot release {self.name}, the lock is not owned.")
+
+    def locked(self) -> bool:
+        return self.backend.get(self.name) is not None
+
+
+class CacheBackend(abc.ABC):
+    '''
+    Base of the cache backends. Subclasses implement get(), set() and delete().
+    '''
+
+    # Whether calls do I/O, and should be run off the event loop by AsyncCacheBackend.
+    blocking = False
+
+    @abc.abstractmethod
+    def get(self, name: str):
+        pass
+
+    @abc.abstractmethod
+    def set(self, name: str, value, ex: float = None, nx: bool = False):
+        '''
+        Store value at name, for ex seconds if given. With nx, only if name is not set. Returns True if it was stored.
+        '''
+
+    @abc.abstractmethod
+    def delete(self, *names: str) -> int:
+        pass
+
+    def delete_if_equal(self, name: str, value) -> bool:
+        '''
+        Delete name if it is set to value. Returns True if it was deleted.
+
+        This implementation is not atomic: name could be set again between the check and the deletion. Backends shared
+        by several threads or processes override it.
+        '''
+        if self.get(name) != _to_bytes(value):
+            return False
+        self.delete(name)
+        return True
+
+    def mget(self, keys, *args) -> list:
+        return [self.get(name) for name in ([keys] if isinstance(keys, str) else list(keys)) + list(args)]
+
+    def lock(self, name: str, timeout: float = None, blocking: bool = True, blocking_timeout: float = None,
+             sleep: float = 0.1) -> CacheLock:
+        return CacheLock(self, name, timeout=timeout, blocking=blocking, blocking_timeout=blocking_timeout,
+                         sleep=sleep)
+
+
+class MemoryCache(CacheBackend):
+    '''
+    Cache kept in this process, holding at most maxsize keys. Nothing is shared with other processes.
+    '''
+
+    def __init__(self, *, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _live(self, name):
+        entry = self._entries.get(name)
+        if entry is not None and entry[0] is not None and entry[0] <= time.time():
+            del self._entries[name]
+            return None
+        return entry
+
+    def get(self, name: str):
+        with self._lock:
+            if (entry := self._live(name)) is None:
+                return None
+            self._entries.move_to_end(name)
+            return entry[1]
+
+    def set(self, name: str, value, ex: float = None, nx: bool = False):
+        value = _to_bytes(value)
+        with self._lock:
+            if nx and self._live(name) is not None:
+                return None
+            self._entries[name] = (time.time() + ex if ex else None, value)
+            self._entries.move_to_end(name)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return True
+
+    def delete(self, *names: str) -> int:
+        with self._lock:
+            return sum(self._entries.pop(name, None) is not None for name in names)
+
+    def delete_if_equal(self, name: str, value) -> bool:
+        value = _to_bytes(value)
+        with self._lock:
+            if (entry := self._live(name)) is None or entry[1] != value:
+                return False
+            del self._entries[name]
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class FileCache(CacheBackend):
+    '''
+    Cache kept in files under directory, one per key, shared by the processes on this host using the same directory.
+
+    Each file holds the key's expiry time followed by its value. Files are replaced atomically, so readers never see
+    a partial value. Expired files are left in place, and overwritten by the next set(). set(nx=True) and
+    delete_if_equal() check and write the key's file while holding a guard file next to it, so that a lock can't be
+    taken over between its owner checking and deleting it.
+    '''
+
+    blocking = True
+
+    # Expiry time as a big-endian double, 0 for none.
+    _header = struct.Struct('>d')
+
+    # Age after which a guard file is taken to be left by a process that died holding it.
+    _guard_timeout = 10.0
+
+    def __init__(self, *, directory: str = None):
+        self.directory = directory or os.path.join(tempfile.gettempdir(), 'smartconnect-cache')
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(name.encode('utf-8')).hexdigest())
+
+    def _read(self, path):
+        try:
+            with open(path, 'rb') as f:
+                content = f.read()
+        except FileNotFoundError:
+            return None
+
+        if len(content) < self._header.size:
+            return None
+        expires, = self._header.unpack_from(content)
+        if expires and expires <= time.time():
+            # Removing it here could remove a value just written in its place. set() overwrites it.
+            return None
+        return content[self._header.size:]
+
+    def _write(self, path, content):
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    @contextlib.contextmanager
+    def _guard(self, path):
+        guard = f'{path}.guard'
+        while True:
+            try:
+                os.close(os.open(guard, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600))
+                break
+            except FileExistsError:
+                pass
+            try:
+                if os.stat(guard).st_mtime + self._guard_timeout < time.time():
+                    os.remove(guard)
+                    continue
+            except FileNotFoundError:
+                continue
+            time.sleep(0.001)
+        try:
+            yield
+        finally:
+            os.remove(guard)
+
+    def get(self, name: str):
+        return self._read(self._path(name))
+
+    def set(self, name: str, value, ex: float = None, nx: bool = False):
+        content = self._header.pack(time.time() + ex if ex else 0) + _to_bytes(value)
+        path = self._path(name)
+
+        if nx:
+            with self._guard(path):
+                if self._read(path) is not None:
+                    return None
+                self._write(path, content)
+                return True
+
+        self._write(path, content)
+        return True
+
+    def delete(self, *names: str) -> int:
+        deleted = 0
+        for name in names:
+            try:
+                os.remove(self._path(name))
+                deleted += 1
+            except FileNotFoundError:
+                pass
+        return deleted
+
+    def delete_if_equal(self, name: str, value) -> bool:
+        path = self._path(name)
+        with self._guard(path):
+            if self._read(path) != _to_bytes(value):
+                return False
+            os.remove(path)
+            return True
+
+
+class AsyncCacheLock:
+
+    def __init__(self, cache, lock: CacheLock):
+        self._cache = cache
+        self._lock = lock
+
+    async def acquire(self, blocking: bool = None, blocking_timeout: float = None) -> bool:
+        if self._lock.blocking if blocking is None else blocking:
+            # Waiting for the lock sleeps, keep it off the event loop.
+            return await asyncio.to_thread(self._lock.acquire, blocking, blocking_timeout)
+        return await self._cache._call(self._lock.acquire, blocking, blocking_timeout)
+
+    async def release(self):
+        return await self._cache._call(self._lock.release)
+
+    async def locked(self) -> bool:
+        return await self._cache._call(self._lock.locked)
+
+
+class AsyncCacheBackend:
+    '''
+    Coroutine interface to a CacheBackend, like redis.asyncio's client to redis-py's. Calls to blocking backends run
+    in a thread.
+    '''
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+
+    async def _call(self, func, *args, **kwargs):
+        if self.backend.blocking:
+            return await asyncio.to_thread(func, *args, **kwargs)
+        return func(*args, **kwargs)
+
+    async def get(self, name: str):
+        return await self._call(self.backend.get, name)
+
+    async def set(self, name: str, value, ex: float = None, nx: bool = False):
+        return await self._call(self.backend.set, name, value, ex=ex, nx=nx)
+
+    async def delete(self, *names: str) -> int:
+        return await self._call(self.backend.delete, *names)
+
+    async def mget(self, keys, *args) -> list:
+        return await self._call(self.backend.mget, keys, *args)
+
+    def lock(self, name: str, timeout: float = None, blocking: bool = True, blocking_timeout: float = None,
+             sleep: float = 0.1) -> AsyncCacheLock:
+        return AsyncCacheLock(self, self.backend.lock(name, timeout=timeout, blocking=blocking,
+                                                      blocking_timeout=blocking_timeout, sleep=sleep))
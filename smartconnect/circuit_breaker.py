@@ -0,0 +1,177 @@
+import logging
+import threading
+import time
+from enum import Enum
+from typing import Callable, List, Optional
+
+import httpx
+
+from smartconnect import smart_settings
+from .exceptions import SMARTClientCircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(str, Enum):
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+
+# Called with (breaker, old_state, new_state) on every state change of any breaker, see add_listener().
+_listeners: List[Callable] = []
+
+
+def add_listener(listener: Callable):
+    _listeners.append(listener)
+
+
+def remove_listener(listener: Callable):
+    _listeners.remove(listener)
+
+
+class CircuitBreaker:
+    '''
+    Stops sending requests to a SMART Connect host that keeps failing.
+
+    The circuit opens after failure_threshold consecutive connection failures, timeouts or 5xx responses. While it is
+    open, requests fail immediately with SMARTClientCircuitOpenError. After recovery_timeout seconds it turns half-open
+    and lets up to half_open_max_calls probe requests through: a successful probe closes the circuit, a failed one
+    opens it again.
+    '''
+
+    def __init__(self, name: str, *, failure_threshold: int = None, recovery_timeout: float = None,
+                 half_open_max_calls: int = None):
+        self.name = name
+        self.failure_threshold = failure_threshold or smart_settings.SMART_CIRCUIT_FAILURE_THRESHOLD
+        self.recovery_timeout = smart_settings.SMART_CIRCUIT_RECOVERY_TIMEOUT if recovery_timeout is None \
+            else recovery_timeout
+        self.half_open_max_calls = half_open_max_calls or smart_settings.SMART_CIRCUIT_HALF_OPEN_MAX_CALLS
+
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        # Reentrant, so that state-change listeners may look at the breaker.
+        self._lock = threading.RLock()
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            self._check_recovery()
+            return self._state
+
+    def before_request(self) -> bool:
+        '''
+        Raise SMARTClientCircuitOpenError if the request must not be sent. Returns whether the request is a probe of a
+        half-open circuit, to be handed back to after_request().
+        '''
+        with self._lock:
+            self._check_recovery()
+            if self._state == CircuitState.OPEN:
+                raise SMARTClientCircuitOpenError(f"Circuit for {self.name} is open, not sending the request.")
+            if self._state == CircuitState.HALF_OPEN:
+                if self._probes >= self.half_open_max_calls:
+                    raise SMARTClientCircuitOpenError(f"Circuit for {self.name} is half-open and already probing.")
+                self._probes += 1
+                return True
+            return False
+
+    def after_request(self, *, failed: Optional[bool], probe: bool = False):
+        '''
+        Record the outcome of a request let through by before_request(). None means the request ended without
+        telling us anything about the server, for instance because it was cancelled.
+        '''
+        with self._lock:
+            if probe:
+                self._probes -= 1
+
+            if failed is None:
+                return
+            if not failed:
+                self._failures = 0
+                if probe:
+                    self._set_state(CircuitState.CLOSED)
+                return
+
+            self._failures += 1
+            if probe or (self._state == CircuitState.CLOSED and self._failures >= self.failure_threshold):
+                self._opened_at = time.monotonic()
+                self._set_state(CircuitState.OPEN)
+
+    def _check_recovery(self):
+        if self._state == CircuitState.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._probes = 0
+            self._set_state(CircuitState.HALF_OPEN)
+
+    def _set_state(self, state: CircuitState):
+        old_state, self._state = self._state, state
+        logger.warning(f"Circuit for {self.name} changed from {old_state.value} to {state.value}.",
+                       extra=dict(circuit=self.name, old_state=old_state.value, new_state=state.value))
+        for listener in list(_listeners):
+            try:
+                listener(self, old_state, state)
+            except Exception:
+                logger.exception(f"Circuit breaker listener failed for {self.name}.")
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(api: str) -> CircuitBreaker:
+    '''
+    Get the breaker shared by all clients in this process for the host of `api`.
+    '''
+    url = httpx.URL(api)
+    name = f'{url.scheme}://{url.netloc.decode("ascii")}'
+    with _breakers_lock:
+        if (breaker := _breakers.get(name)) is None:
+            breaker = _breakers[name] = CircuitBreaker(name)
+        return breaker
+
+
+class CircuitBreakerTransport(httpx.BaseTransport):
+
+    def __init__(self, transport: httpx.BaseTransport, breaker: CircuitBreaker):
+        self._transport = transport
+        self.breaker = breaker
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        probe = self.breaker.before_request()
+        try:
+            response = self._transport.handle_request(request)
+        except httpx.TransportError:
+            self.breaker.after_request(failed=True, probe=probe)
+            raise
+        except BaseException:
+            self.breaker.after_request(failed=None, probe=probe)
+            raise
+        self.breaker.after_request(failed=response.status_code >= 500, probe=probe)
+        return response
+
+    def close(self):
+        self._transport.close()
+
+
+class AsyncCircuitBreakerTransport(httpx.AsyncBaseTransport):
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, breaker: CircuitBreaker):
+        self._transport = transport
+        self.breaker = breaker
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        probe = self.breaker.before_request()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except httpx.TransportError:
+            self.breaker.after_request(failed=True, probe=probe)
+            raise
+        except BaseException:
+            self.breaker.after_request(failed=None, probe=probe)
+            raise
+        self.breaker.after_request(failed=response.status_code >= 500, probe=probe)
+        return response
+
+    async def aclose(self):
+        await self._transport.aclose()
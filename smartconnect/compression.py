@@ -0,0 +1,108 @@
+import gzip
+import logging
+import zlib
+
+import httpx
+
+from smartconnect import smart_settings
+
+logger = logging.getLogger(__name__)
+
+ENCODERS = {
+    'gzip': lambda content: gzip.compress(content, compresslevel=6, mtime=0),
+    'deflate': lambda content: zlib.compress(content, 6),
+}
+
+# Requests whose bodies are compressed: data posts, as made by post_smart_request.
+COMPRESSED_PATH = '/api/data/'
+
+# Responses to a compressed request that may mean the server can't decode it. 415 is the standard answer; servers
+# without a decoding filter typically fail to parse the body instead.
+REJECTION_STATUS_CODES = frozenset({400, 415})
+
+
+class RequestCompressor:
+    '''
+    Compresses data post bodies of at least min_size bytes with Content-Encoding.
+
+    If the server rejects a compressed body and then accepts the same request uncompressed, compression is turned off
+    for the rest of the client's life.
+    '''
+
+    def __init__(self, *, encoding: str = None, min_size: int = None):
+        self.encoding = encoding or smart_settings.SMART_COMPRESS_ENCODING
+        if self.encoding not in ENCODERS:
+            raise ValueError(f"Unsupported request encoding {self.encoding}, expected one of {', '.join(ENCODERS)}")
+        self.min_size = smart_settings.SMART_COMPRESS_MIN_SIZE if min_size is None else min_size
+        self.enabled = True
+
+    def compress(self, request: httpx.Request):
+        '''
+        Returns a compressed copy of the request, or None if it should be sent as is.
+        '''
+        if not (self.enabled and request.method == 'POST' and COMPRESSED_PATH in request.url.path):
+            return None
+        if 'content-encoding' in request.headers or len(request.content) < self.min_size:
+            return None
+
+        content = ENCODERS[self.encoding](request.content)
+        headers = request.headers.copy()
+        headers['content-encoding'] = self.encoding
+        headers['content-length'] = str(len(content))
+        return httpx.Request(request.method, request.url, headers=headers, content=content,
+                             extensions=request.extensions)
+
+    def is_rejection(self, response: httpx.Response) -> bool:
+        return response.status_code in REJECTION_STATUS_CODES
+
+    def fallback_succeeded(self, request: httpx.Request):
+        logger.warning(f"{request.url.host} rejected a {self.encoding} request body, sending uncompressed from now on.")
+        self.enabled = False
+
+
+class CompressionTransport(httpx.BaseTransport):
+
+    def __init__(self, transport: httpx.BaseTransport, compressor: RequestCompressor):
+        self._transport = transport
+        self.compressor = compressor
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if (compressed := self.compressor.compress(request)) is None:
+            return self._transport.handle_request(request)
+
+        response = self._transport.handle_request(compressed)
+        if not self.compressor.is_rejection(response):
+            return response
+
+        response.close()
+        response = self._transport.handle_request(request)
+        if response.is_success:
+            self.compressor.fallback_succeeded(request)
+        return response
+
+    def close(self):
+        self._transport.close()
+
+
+class AsyncCompressionTransport(httpx.AsyncBaseTransport):
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, compressor: RequestCompressor):
+        self._transport = transport
+        self.compressor = compressor
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if (compressed := self.compressor.compress(request)) is None:
+            return await self._transport.handle_async_request(request)
+
+        response = await self._transport.handle_async_request(compressed)
+        if not self.compressor.is_rejection(response):
+            return response
+
+        await response.aclose()
+        response = await self._transport.handle_async_request(request)
+        if response.is_success:
+            self.compressor.fallback_succeeded(request)
+        return response
+
+    async def aclose(self):
+        await self._transport.aclose()
@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import re
+import time
+from typing import Optional
+
+import httpx
+
+from smartconnect import smart_settings
+
+logger = logging.getLogger(__name__)
+
+# Requests governed by the limiter, keyed by URL path prefix.
+LIMITED_ENDPOINTS = {
+    'POST': ('/api/data/',),
+    'GET': ('/api/metadata/',),
+}
+
+# Each endpoint has its own latency baseline, since a data model download is expected to take far longer than a patrol
+# metadata request or a data post. An endpoint is a request's path with the segments naming a Conservation Area,
+# configurable model or other record replaced, see _limited_endpoint().
+_ID_SEGMENT = re.compile(r'/([0-9a-fA-F]{8}(-[0-9a-fA-F]{4}){3}-[0-9a-fA-F]{12}|\d+)(?=/|$)')
+
+
+class AdaptiveConcurrencyLimiter:
+    '''
+    AIMD (additive increase, multiplicative decrease) limit on the number of requests in flight.
+
+    The limit grows by about one per window of successful requests while the window is in use and latency stays within
+    latency_tolerance times its moving average. A 5xx, a timeout or a latency spike multiplies it by backoff_ratio.
+    Only one decrease is applied for requests that were already in flight when the limit was last decreased.
+
+    The moving average takes in every successful response, spikes included, so that it settles on the server's new
+    normal when its latency rises for good and the limit can grow back.
+    '''
+
+    def __init__(self, *, initial_limit: int = None, min_limit: int = None, max_limit: int = None,
+                 backoff_ratio: float = 0.5, latency_tolerance: float = 2.0, latency_smoothing: float = 0.1):
+        self.min_limit = min_limit or smart_settings.SMART_CONCURRENCY_MIN_LIMIT
+        self.max_limit = max_limit or smart_settings.SMART_CONCURRENCY_MAX_LIMIT
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.latency_smoothing = latency_smoothing
+
+        self._limit = float(initial_limit or smart_settings.SMART_CONCURRENCY_INITIAL_LIMIT)
+        self._in_flight = 0
+        self._latency = {}
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def acquire(self) -> float:
+        '''
+        Wait for a free slot. Returns the start time to hand back to release().
+        '''
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+        return time.monotonic()
+
+    async def release(self, started: float, *, endpoint: str, failed: bool = False):
+        latency = time.monotonic() - started
+        async with self._condition:
+            saturated = self._in_flight >= self.limit
+            self._in_flight -= 1
+
+            if failed:
+                self._decrease(started, reason='failure')
+            else:
+                baseline = self._latency.get(endpoint)
+                self._latency[endpoint] = latency if baseline is None else \
+                    baseline + self.latency_smoothing * (latency - baseline)
+                if baseline is not None and latency > baseline * self.latency_tolerance:
+                    self._decrease(started, reason='latency spike')
+                elif saturated:
+                    self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+
+            self._condition.notify_all()
+
+    async def cancel(self):
+        '''
+        Give a slot back without recording an outcome, for requests that failed for reasons unrelated to the server.
+        '''
+        async with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def _decrease(self, started: float, *, reason: str):
+        if started < self._last_decrease:
+            return
+
+        self._limit = max(self.min_limit, self._limit * self.backoff_ratio)
+        self._last_decrease = time.monotonic()
+        logger.info(f"Reduced SMART Connect concurrency limit to {self.limit} after a {reason}.")
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+
+    def __init__(self, stream: httpx.AsyncByteStream, on_close):
+        self._stream = stream
+        self._on_close = on_close
+        self._timed_out = False
+        self._closed = False
+
+    async def __aiter__(self):
+        try:
+            async for chunk in self._stream:
+                yield chunk
+        except httpx.TimeoutException:
+            self._timed_out = True
+            raise
+
+    async def aclose(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            await self._stream.aclose()
+        finally:
+            await self._on_close(timed_out=self._timed_out)
+
+
+class AdaptiveConcurrencyTransport(httpx.AsyncBaseTransport):
+    '''
+    Holds a limiter slot for data posts and metadata downloads until their response body has been read.
+    '''
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, limiter: AdaptiveConcurrencyLimiter):
+        self._transport = transport
+        self.limiter = limiter
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        endpoint = _limited_endpoint(request)
+        if endpoint is None:
+            return await self._transport.handle_async_request(request)
+
+        started = await self.limiter.acquire()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except httpx.TimeoutException:
+            await self.limiter.release(started, endpoint=endpoint, failed=True)
+            raise
+        except BaseException:
+            await self.limiter.cancel()
+            raise
+
+        async def on_close(timed_out):
+            await self.limiter.release(started, endpoint=endpoint, failed=timed_out or response.is_server_error)
+
+        return httpx.Response(status_code=response.status_code, headers=response.headers,
+                              stream=_ReleasingStream(response.stream, on_close), extensions=response.extensions)
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+def _limited_endpoint(request: httpx.Request) -> Optional[str]:
+    path = request.url.path
+    for prefix in LIMITED_ENDPOINTS.get(request.method, ()):
+        if (index := path.find(prefix)) != -1:
+            return _ID_SEGMENT.sub('/{id}', path[index:])
+    return None
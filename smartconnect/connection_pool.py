@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import threading
+import weakref
+from collections import OrderedDict
+
+import httpx
+
+from smartconnect import smart_settings
+
+logger = logging.getLogger(__name__)
+
+
+class _PooledTransport(httpx.BaseTransport):
+    '''
+    A client's handle on a shared transport. Closing the client releases the handle but keeps the pool open.
+    '''
+
+    def __init__(self, registry, key):
+        self._registry = registry
+        self._key = key
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        return self._registry._get_transport(self._key).handle_request(request)
+
+    def close(self):
+        self._registry._release(self)
+
+
+class _AsyncPooledTransport(httpx.AsyncBaseTransport):
+    '''
+    Async counterpart of _PooledTransport. Connections can't be shared across event loops, so the shared transport
+    is looked up for the loop the request is running on.
+    '''
+
+    def __init__(self, registry, key):
+        self._registry = registry
+        self._key = key
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        transport = self._registry._get_transport(self._key, loop=asyncio.get_running_loop())
+        return await transport.handle_async_request(request)
+
+    async def aclose(self):
+        self._registry._release(self)
+
+
+class ConnectionPoolRegistry:
+    '''
+    Process-wide registry of HTTP transports keyed by SMART Connect host, so that clients created for the same server
+    share keep-alive connections instead of each opening their own pool.
+
+    Pools with no client left using them are closed on a least-recently-used basis once there are more than
+    max_pools of them.
+    '''
+
+    def __init__(self, *, max_pools: int = None, max_connections: int = None, max_keepalive_connections: int = None,
+                 keepalive_expiry: float = None):
+        self.max_pools = max_pools or smart_settings.SMART_POOL_MAX_HOSTS
+        self.limits = httpx.Limits(
+            max_connections=max_connections or smart_settings.SMART_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=max_keepalive_connections or smart_settings.SMART_POOL_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=smart_settings.SMART_POOL_KEEPALIVE_EXPIRY if keepalive_expiry is None else keepalive_expiry,
+        )
+
+        self._lock = threading.Lock()
+        # (key, loop) -> transport, in least-recently-used order. loop is None for sync transports.
+        self._transports = OrderedDict()
+        # key -> handles given out to clients that are still alive.
+        self._leases = {}
+
+    def transport(self, api: str, *, verify=True, retries: int = 0) -> httpx.BaseTransport:
+        return self._lease(_PooledTransport, ('sync', *self._host_key(api), verify, retries, False))
+
+    def async_transport(self, api: str, *, verify=True, retries: int = 0, http2: bool = False) -> httpx.AsyncBaseTransport:
+        return self._lease(_AsyncPooledTransport, ('async', *self._host_key(api), verify, retries, http2))
+
+    def __len__(self):
+        return len(self._transports)
+
+    @staticmethod
+    def _host_key(api: str):
+        url = httpx.URL(api)
+        return url.scheme, url.host, url.port
+
+    def _lease(self, lease_class, key):
+        lease = lease_class(self, key)
+        with self._lock:
+            self._leases.setdefault(key, weakref.WeakSet()).add(lease)
+        return lease
+
+    def _release(self, lease):
+        with self._lock:
+            if leases := self._leases.get(lease._key):
+                leases.discard(lease)
+
+    def _get_transport(self, key, loop=None):
+        with self._lock:
+            if (transport := self._transports.get((key, loop))) is not None:
+                self._transports.move_to_end((key, loop))
+                return transport
+
+            transport = self._create_transport(key)
+            self._transports[(key, loop)] = transport
+            logger.debug(f"Opened shared connection pool for {key}.")
+            self._evict()
+            return transport
+
+    def _create_transport(self, key):
+        kind, _, _, _, verify, retries, http2 = key
+        transport_class = httpx.AsyncHTTPTransport if kind == 'async' else httpx.HTTPTransport
+        return transport_class(verify=verify, retries=retries, http2=http2, limits=self.limits)
+
+    def _is_idle(self, key, loop):
+        return not self._leases.get(key) or (loop is not None and loop.is_closed())
+
+    def _evict(self):
+        excess = len(self._transports) - self.max_pools
+        for key, loop in list(self._transports):
+            if excess <= 0:
+                break
+            if self._is_idle(key, loop):
+                self._close(self._transports.pop((key, loop)), loop)
+                excess -= 1
+
+    @staticmethod
+    def _close(transport, loop):
+        if loop is None:
+            transport.close()
+        elif loop is _running_loop():
+            loop.create_task(transport.aclose())
+        # Connections of a pool bound to another or a closed loop are dropped with the transport.
+
+
+def _running_loop():
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+registry = ConnectionPoolRegistry()
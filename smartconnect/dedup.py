@@ -0,0 +1,56 @@
+import asyncio
+import logging
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDeduplicationTransport(httpx.AsyncBaseTransport):
+    '''
+    Coalesces identical GET requests that are in flight at the same time, so that one HTTP call serves all of them.
+
+    Requests are identical when they have the same URL (including its query parameters), Accept header and session
+    cookie. The first one is sent and its body read in full; every caller then gets its own response built from it.
+    The shared call runs in its own task, so a caller being cancelled doesn't fail the others.
+    '''
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+        self._in_flight = {}
+        # Number of requests answered by another request's call, for monitoring.
+        self.coalesced = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != 'GET':
+            return await self._transport.handle_async_request(request)
+
+        key = (str(request.url), request.headers.get('accept'), request.headers.get('cookie'))
+        if (fetch := self._in_flight.get(key)) is None:
+            fetch = self._in_flight[key] = asyncio.ensure_future(self._fetch(request))
+            fetch.add_done_callback(lambda task: self._done(key, task))
+        else:
+            self.coalesced += 1
+            logger.debug(f"Joining in-flight request for {request.url}.")
+
+        status_code, headers, content, extensions = await asyncio.shield(fetch)
+        return httpx.Response(status_code=status_code, headers=headers, stream=httpx.ByteStream(content),
+                              extensions=extensions)
+
+    async def _fetch(self, request: httpx.Request):
+        response = await self._transport.handle_async_request(request)
+        try:
+            content = b''.join([chunk async for chunk in response.stream])
+        finally:
+            await response.aclose()
+        return response.status_code, response.headers, content, response.extensions
+
+    def _done(self, key, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the error as retrieved in case every caller was cancelled before it came in.
+        if not task.cancelled():
+            task.exception()
+
+    async def aclose(self):
+        await self._transport.aclose()
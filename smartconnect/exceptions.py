@@ -7,10 +7,17 @@ class SMARTClientServerError(SMARTClientException):
 class SMARTClientServerUnreachableError(SMARTClientServerError):
     pass
 
+class SMARTClientCircuitOpenError(SMARTClientServerUnreachableError):
+    pass
+
 class SMARTClientClientError(SMARTClientException):
     pass
 
 class SMARTClientUnauthorizedError(SMARTClientClientError):
     pass
 
+class SMARTClientNotFoundError(SMARTClientClientError):
+    pass
 
+class SMARTClientSessionExpiredError(SMARTClientUnauthorizedError):
+    pass
\ No newline at end of file
@@ -1,4 +1,5 @@
 import json
+import time
 import uuid
 from datetime import datetime, date
 from typing import List, Any, Optional, Union
@@ -224,6 +225,50 @@ class ConservationArea(BaseModel):
     class Config:
         allow_population_by_field_name = True
 
+
+class ConservationAreaIndex:
+    '''
+    The Conservation Areas of a SMART Connect server, looked up by uuid or by label. Where labels repeat, the first
+    Conservation Area with the label is found by it.
+    '''
+
+    def __init__(self, conservation_areas: List[ConservationArea], fetched_at: float = None):
+        self.conservation_areas = list(conservation_areas)
+        # When the list was downloaded, as a Unix timestamp.
+        self.fetched_at = time.time() if fetched_at is None else fetched_at
+        self.by_uuid = {ca.uuid: ca for ca in self.conservation_areas}
+        self.by_label = {}
+        for ca in self.conservation_areas:
+            self.by_label.setdefault(ca.label, ca)
+        # Timezones guessed from the boundaries, see SmartClient.guess_ca_timezone().
+        self.timezones = {}
+
+    def __len__(self):
+        return len(self.conservation_areas)
+
+    def __iter__(self):
+        return iter(self.conservation_areas)
+
+    def get(self, ca_uuid: Union[str, uuid.UUID]) -> Optional[ConservationArea]:
+        try:
+            return self.by_uuid.get(ca_uuid if isinstance(ca_uuid, uuid.UUID) else uuid.UUID(ca_uuid))
+        except (TypeError, ValueError):
+            return None
+
+    def get_by_label(self, label: str) -> Optional[ConservationArea]:
+        return self.by_label.get(label)
+
+    def export_as_dict(self):
+        return {
+            'fetched_at': self.fetched_at,
+            'conservation_areas': [json.loads(ca.json()) for ca in self.conservation_areas],
+        }
+
+    @classmethod
+    def import_from_dict(cls, data: dict):
+        return cls(parse_obj_as(List[ConservationArea], data['conservation_areas']), fetched_at=data['fetched_at'])
+
+
 class SmartConnectApiInfo(BaseModel):
     build_date: str = Field(None, alias='build-date')
     build_version: str = Field(None, alias='build-version')
@@ -234,6 +279,20 @@ class SmartConnectApiInfo(BaseModel):
         allow_population_by_field_name = True
 
 
+class WarmupReport(BaseModel):
+    '''
+    How long each phase of AsyncSmartClient.warmup() took, in seconds. The connection phases run in parallel with the
+    login, so total is less than their sum. tcp (which includes DNS) and tls are for the slowest connection, and None
+    when no new connection was opened.
+    '''
+    connections: int
+    connect: float
+    tcp: Optional[float]
+    tls: Optional[float]
+    login: float
+    total: float
+
+
 class SMARTCompositeRequest(BaseModel):
     ca_uuid: str
     patrol_requests: Optional[List[SMARTRequest]] = []
@@ -245,6 +304,8 @@ class DataModel:
 
     def __init__(self, use_language_code='en'):
         self.use_language_code = use_language_code
+        # Revision of the Conservation Area this data model was downloaded at, if known.
+        self.revision = None
 
     def load(self, datamodel_text):
         self.datamodel = untangle.parse(datamodel_text)
@@ -264,11 +325,13 @@ class DataModel:
         return {
                 'categories': self._categories,
                 'attributes': self._attributes,
+                'revision': self.revision,
             }
 
     def import_from_dict(self, data:dict):
         self._categories = data.get('categories')
         self._attributes = data.get('attributes')
+        self.revision = data.get('revision')
 
     def get_category(self, *, path: str = None) -> dict:
         for cat in self._categories:
@@ -394,6 +457,8 @@ class ConfigurableDataModel:
     def __init__(self, use_language_code='en', cm_uuid=None):
         self.use_language_code = use_language_code
         self.cm_uuid = cm_uuid
+        # Revision of the Conservation Area this model was downloaded at, if known.
+        self.revision = None
 
     def load(self, config_datamodel_text):
         # with open('config-datamodel-response.xml', 'w') as fo:
@@ -416,7 +481,7 @@ class ConfigurableDataModel:
                 'attributes': self._attributes,
                 'name': self._name,
                 'cm_uuid': self.cm_uuid,
-
+                'revision': self.revision,
             }
 
     def import_from_dict(self, data:dict):
@@ -424,6 +489,7 @@ class ConfigurableDataModel:
         self._attributes = data.get('attributes')
         self._name = data.get('name')
         self.cm_uuid = data.get('cm_uuid')
+        self.revision = data.get('revision')
 
     def get_category(self, *, path: str = None) -> dict:
         for cat in self._categories:
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import threading
+import time
+
+import httpx
+
+from smartconnect import cache
+
+logger = logging.getLogger(__name__)
+
+rate_limit_key_base = 'smart.ratelimit'
+
+# Reserve a token from a bucket shared by every process using the same Redis. Returns how many seconds the caller
+# must wait for its token, as a string to keep the fraction. Redis' clock is used so that callers agree on time.
+RESERVE_TOKEN_SCRIPT = '''
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate) - 1
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate) + 1)
+
+if tokens < 0 then
+    return tostring(-tokens / rate)
+end
+return '0'
+'''
+
+
+class TokenBucket:
+    '''
+    In-process token bucket allowing `rate` requests per second with bursts of up to `capacity`.
+
+    reserve() takes a token immediately, going into debt if there is none, and returns how long the caller has to wait
+    before using it. This keeps callers in order without holding a lock while they sleep.
+    '''
+
+    def __init__(self, *, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate) - 1
+            self._updated = now
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+
+class RedisTokenBucket:
+    '''
+    Token bucket kept in Redis, so that every process posting to the same host shares one rate. Falls back to an
+    in-process bucket while Redis is unavailable.
+    '''
+
+    def __init__(self, key: str, *, rate: float, capacity: float = None, redis_client=None):
+        self.key = key
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._redis = redis_client or cache.cache
+        self._script = self._redis.register_script(RESERVE_TOKEN_SCRIPT)
+        self._fallback = TokenBucket(rate=rate, capacity=self.capacity)
+
+    def reserve(self) -> float:
+        try:
+            return float(self._script(keys=[self.key], args=[self.rate, self.capacity]))
+        except Exception:
+            logger.warning(f"Failed to reserve a token from {self.key} in Redis, rate limiting in-process instead.")
+            return self._fallback.reserve()
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def get_bucket(api: str, *, rate: float, capacity: float = None, distributed: bool = False):
+    '''
+    Get the bucket shared by all clients in this process (or all processes, if distributed) for the host of `api`.
+    The bucket keeps the rate and capacity of the client that created it, so that the host's limit holds whatever
+    the other clients ask for.
+    '''
+    url = httpx.URL(api)
+    key = f'{rate_limit_key_base}.{url.scheme}://{url.netloc.decode("ascii")}'
+    if distributed and not hasattr(cache.cache, 'register_script'):
+        logger.warning(f"Distributed rate limiting needs the Redis cache backend, rate limiting {key} in-process.")
+        distributed = False
+    with _buckets_lock:
+        if (bucket := _buckets.get((key, distributed))) is None:
+            bucket = RedisTokenBucket(key, rate=rate, capacity=capacity) if distributed \
+                else TokenBucket(rate=rate, capacity=capacity)
+            _buckets[(key, distributed)] = bucket
+        elif (bucket.rate, bucket.capacity) != (rate, capacity or max(1.0, rate)):
+            logger.warning(f"Rate limiting {key} at {bucket.rate} requests per second with bursts of "
+                           f"{bucket.capacity}, as set by the first client for it, instead of {rate} and {capacity}.")
+        return bucket
+
+
+class RateLimitTransport(httpx.BaseTransport):
+
+    def __init__(self, transport: httpx.BaseTransport, bucket):
+        self._transport = transport
+        self.bucket = bucket
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if (wait := self.bucket.reserve()) > 0:
+            time.sleep(wait)
+        return self._transport.handle_request(request)
+
+    def close(self):
+        self._transport.close()
+
+
+class AsyncRateLimitTransport(httpx.AsyncBaseTransport):
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, bucket):
+        self._transport = transport
+        self.bucket = bucket
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        # Reserving from Redis is a network round trip, keep it off the event loop.
+        if isinstance(self.bucket, RedisTokenBucket):
+            wait = await asyncio.to_thread(self.bucket.reserve)
+        else:
+            wait = self.bucket.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self):
+        await self._transport.aclose()
@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import httpx
+
+from smartconnect import smart_settings
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+
+
+class RetryPolicy:
+    '''
+    When and how long to wait before retrying a request that got a 5xx or 429 response.
+
+    Waits follow exponential backoff with full jitter, uniformly drawn between 0 and
+    min(max_backoff, backoff_factor * 2 ** attempt), unless the server sends a Retry-After. A Retry-After longer than
+    max_retry_after is not waited for and the response is returned as is. Only idempotent requests are retried unless
+    retry_non_idempotent is set.
+    '''
+
+    def __init__(self, *, max_retries: int = None, backoff_factor: float = None, max_backoff: float = None,
+                 max_retry_after: float = None, retry_non_idempotent: bool = False, budget_ratio: float = None):
+        self.max_retries = smart_settings.SMART_RETRY_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_factor = smart_settings.SMART_RETRY_BACKOFF_FACTOR if backoff_factor is None else backoff_factor
+        self.max_backoff = smart_settings.SMART_RETRY_MAX_BACKOFF if max_backoff is None else max_backoff
+        self.max_retry_after = smart_settings.SMART_RETRY_MAX_RETRY_AFTER if max_retry_after is None else max_retry_after
+        self.retry_non_idempotent = retry_non_idempotent
+        self.budget_ratio = smart_settings.SMART_RETRY_BUDGET_RATIO if budget_ratio is None else budget_ratio
+
+    def should_retry(self, request: httpx.Request, response: httpx.Response, attempt: int) -> bool:
+        return (
+            attempt < self.max_retries
+            and response.status_code in RETRY_STATUS_CODES
+            and (self.retry_non_idempotent or request.method in IDEMPOTENT_METHODS)
+        )
+
+    def backoff(self, response: httpx.Response, attempt: int) -> Optional[float]:
+        '''
+        Seconds to wait before the next attempt, or None if the server asked for a longer wait than we accept.
+        '''
+        if (retry_after := _parse_retry_after(response.headers.get('retry-after'))) is not None:
+            return retry_after if retry_after <= self.max_retry_after else None
+        return random.uniform(0, min(self.max_backoff, self.backoff_factor * 2 ** attempt))
+
+
+class RetryBudget:
+    '''
+    Caps retries at a fraction of the requests a client makes, so that a struggling server doesn't get its load
+    multiplied. Every request adds `ratio` of a retry to the budget, up to `capacity`, and every retry spends one.
+    '''
+
+    def __init__(self, *, ratio: float, capacity: float = 10.0):
+        self.ratio = ratio
+        self.capacity = capacity
+        self._balance = capacity
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self._balance = min(self.capacity, self._balance + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self._balance < 1:
+                return False
+            self._balance -= 1
+            return True
+
+
+class RetryTransport(httpx.BaseTransport):
+
+    def __init__(self, transport: httpx.BaseTransport, policy: RetryPolicy):
+        self._transport = transport
+        self.policy = policy
+        self.budget = RetryBudget(ratio=policy.budget_ratio)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        self.budget.deposit()
+        attempt = 0
+        while True:
+            response = self._transport.handle_request(request)
+            if (wait := _next_wait(self.policy, self.budget, request, response, attempt)) is None:
+                return response
+
+            response.close()
+            time.sleep(wait)
+            attempt += 1
+
+    def close(self):
+        self._transport.close()
+
+
+class AsyncRetryTransport(httpx.AsyncBaseTransport):
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, policy: RetryPolicy):
+        self._transport = transport
+        self.policy = policy
+        self.budget = RetryBudget(ratio=policy.budget_ratio)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.budget.deposit()
+        attempt = 0
+        while True:
+            response = await self._transport.handle_async_request(request)
+            if (wait := _next_wait(self.policy, self.budget, request, response, attempt)) is None:
+                return response
+
+            await response.aclose()
+            await asyncio.sleep(wait)
+            attempt += 1
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+def _next_wait(policy: RetryPolicy, budget: RetryBudget, request: httpx.Request, response: httpx.Response,
+               attempt: int) -> Optional[float]:
+    if not policy.should_retry(request, response, attempt):
+        return None
+
+    if (wait := policy.backoff(response, attempt)) is None:
+        logger.warning(f"Not retrying {request.method} {request.url}, the server asked to wait longer than "
+                       f"{policy.max_retry_after} seconds.")
+        return None
+
+    if not budget.withdraw():
+        logger.warning(f"Not retrying {request.method} {request.url}, the retry budget is exhausted.")
+        return None
+
+    logger.info(f"Retrying {request.method} {request.url} in {wait:.2f} seconds after status code "
+                f"{response.status_code} (attempt {attempt + 1} of {policy.max_retries}).")
+    return wait
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(tz=timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
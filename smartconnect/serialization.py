@@ -0,0 +1,71 @@
+'''
+Encoding of data models stored in the cache.
+
+Entries written in the 'zlib' or 'zstd' formats are compact JSON, compressed, behind a one-byte header naming the
+format. Entries without a header are the plain JSON written by earlier versions and are still read, so processes can
+switch formats without flushing the cache.
+'''
+import functools
+import json
+import logging
+import zlib
+
+try:
+    import zstandard  # Optional, install with the smartconnect-client[zstd] extra.
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+from smartconnect import smart_settings
+
+logger = logging.getLogger(__name__)
+
+# Header bytes. Plain JSON starts with '{', or whitespace, never with a control character.
+ZLIB_HEADER = b'\x01'
+ZSTD_HEADER = b'\x02'
+
+FORMATS = ('json', 'zlib', 'zstd')
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+@functools.lru_cache(maxsize=None)
+def _resolve(format: str) -> str:
+    if format not in FORMATS:
+        raise ValueError(f"Unsupported cache format {format}, expected one of {', '.join(FORMATS)}")
+    if format == 'zstd' and zstandard is None:
+        logger.warning("The 'zstd' cache format was requested but the 'zstandard' package is not installed. "
+                       "Using 'zlib' instead.")
+        return 'zlib'
+    return format
+
+
+def dumps(obj, format: str = None):
+    '''
+    Encode obj for the cache in format, SMART_CACHE_FORMAT by default. 'json' gives a str, the other formats bytes.
+    '''
+    format = _resolve(format or smart_settings.SMART_CACHE_FORMAT)
+    if format == 'json':
+        return json.dumps(obj)
+
+    content = json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    if format == 'zlib':
+        return ZLIB_HEADER + zlib.compress(content, ZLIB_LEVEL)
+    return ZSTD_HEADER + zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(content)
+
+
+def loads(data):
+    '''
+    Decode a cache entry written by dumps() in any format, or by earlier versions as plain JSON.
+    '''
+    if isinstance(data, str):
+        return json.loads(data)
+
+    header = data[:1]
+    if header == ZLIB_HEADER:
+        return json.loads(zlib.decompress(data[1:]))
+    if header == ZSTD_HEADER:
+        if zstandard is None:
+            raise ValueError("Cache entry is zstd-compressed but the 'zstandard' package is not installed.")
+        return json.loads(zstandard.ZstdDecompressor().decompress(data[1:]))
+    return json.loads(data)
@@ -0,0 +1,76 @@
+import logging
+
+import httpx
+
+from smartconnect import cache, smart_settings
+
+logger = logging.getLogger(__name__)
+
+session_key_base = 'smart.session'
+
+# Requests that make up the login handshake itself. Their responses are never treated as an expired session.
+LOGIN_PATHS = ('/connect/home', '/j_security_check')
+
+
+def is_session_expired(response: httpx.Response) -> bool:
+    '''
+    Recognise a response indicating that the Tomcat session behind JSESSIONID is no longer valid.
+
+    SMART Connect answers requests made with an expired session either with a 401 or with a redirect to its login page.
+    '''
+    if response.request.url.path.endswith(LOGIN_PATHS):
+        return False
+
+    if response.status_code == 401:
+        return True
+
+    if response.is_redirect:
+        location = response.headers.get('location', '').lower()
+        return 'login' in location or 'j_security_check' in location
+
+    return False
+
+
+def _session_key(api: str, username: str):
+    return f'{session_key_base}.{api}.{username}'
+
+
+def get_session_id(api: str, username: str):
+    '''
+    Look up a JSESSIONID stored by another process logged in to the same server with the same account.
+    '''
+    try:
+        session_id = cache.cache.get(_session_key(api, username))
+    except Exception:
+        logger.warning('Failed reading SMART Connect session from cache.', extra=dict(api=api, username=username))
+        return None
+
+    return session_id.decode('utf-8') if isinstance(session_id, bytes) else session_id
+
+
+def save_session_id(api: str, username: str, session_id: str):
+    try:
+        cache.cache.set(_session_key(api, username), session_id, ex=smart_settings.SMART_SESSION_STORE_TTL)
+    except Exception:
+        logger.warning('Failed saving SMART Connect session to cache.', extra=dict(api=api, username=username))
+
+
+async def aget_session_id(api: str, username: str):
+    '''
+    Like get_session_id(), without blocking the event loop.
+    '''
+    try:
+        session_id = await cache.get_async_cache().get(_session_key(api, username))
+    except Exception:
+        logger.warning('Failed reading SMART Connect session from cache.', extra=dict(api=api, username=username))
+        return None
+
+    return session_id.decode('utf-8') if isinstance(session_id, bytes) else session_id
+
+
+async def asave_session_id(api: str, username: str, session_id: str):
+    try:
+        await cache.get_async_cache().set(_session_key(api, username), session_id,
+                                          ex=smart_settings.SMART_SESSION_STORE_TTL)
+    except Exception:
+        logger.warning('Failed saving SMART Connect session to cache.', extra=dict(api=api, username=username))
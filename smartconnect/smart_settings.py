@@ -8,7 +8,121 @@ SMART_DEFAULT_TIMEOUT = env.int('SMART_DEFAULT_TIMEOUT', 60)
 SMART_DEFAULT_CONNECT_TIMEOUT = env.int('SMART_DEFAULT_CONNECT_TIMEOUT', 3.1)
 SMART_DEFAULT_CONNECT_RETRIES = env.int('SMART_DEFAULT_CONNECT_RETRIES', 5)
 
+# Share logged-in sessions across processes through the cache. Keep the TTL below the server's session timeout.
+SMART_SESSION_STORE = env.bool('SMART_SESSION_STORE', False)
+SMART_SESSION_STORE_TTL = env.int('SMART_SESSION_STORE_TTL', 1500)
+
+# Connection pools shared by clients talking to the same SMART Connect host, see smartconnect.connection_pool.
+SMART_SHARED_CONNECTION_POOL = env.bool('SMART_SHARED_CONNECTION_POOL', False)
+SMART_POOL_MAX_HOSTS = env.int('SMART_POOL_MAX_HOSTS', 64)
+SMART_POOL_MAX_CONNECTIONS = env.int('SMART_POOL_MAX_CONNECTIONS', 100)
+SMART_POOL_MAX_KEEPALIVE_CONNECTIONS = env.int('SMART_POOL_MAX_KEEPALIVE_CONNECTIONS', 20)
+SMART_POOL_KEEPALIVE_EXPIRY = env.float('SMART_POOL_KEEPALIVE_EXPIRY', 5.0)
+
+# Use HTTP/2 in AsyncSmartClient when the server negotiates it. Requires the optional 'h2' package.
+SMART_HTTP2 = env.bool('SMART_HTTP2', False)
+
+# Adaptive (AIMD) limit on concurrent data posts and metadata downloads in AsyncSmartClient.
+SMART_ADAPTIVE_CONCURRENCY = env.bool('SMART_ADAPTIVE_CONCURRENCY', False)
+SMART_CONCURRENCY_INITIAL_LIMIT = env.int('SMART_CONCURRENCY_INITIAL_LIMIT', 4)
+SMART_CONCURRENCY_MIN_LIMIT = env.int('SMART_CONCURRENCY_MIN_LIMIT', 1)
+SMART_CONCURRENCY_MAX_LIMIT = env.int('SMART_CONCURRENCY_MAX_LIMIT', 64)
+
+# Retries of requests answered with a 5xx or 429, see smartconnect.retry. Disabled when SMART_RETRY_MAX_RETRIES is 0.
+SMART_RETRY_MAX_RETRIES = env.int('SMART_RETRY_MAX_RETRIES', 0)
+SMART_RETRY_BACKOFF_FACTOR = env.float('SMART_RETRY_BACKOFF_FACTOR', 0.5)
+SMART_RETRY_MAX_BACKOFF = env.float('SMART_RETRY_MAX_BACKOFF', 30.0)
+SMART_RETRY_MAX_RETRY_AFTER = env.float('SMART_RETRY_MAX_RETRY_AFTER', 120.0)
+SMART_RETRY_BUDGET_RATIO = env.float('SMART_RETRY_BUDGET_RATIO', 0.2)
+
+# Requests per second allowed to each SMART Connect host, 0 to disable. With SMART_RATE_LIMIT_REDIS the limit is shared
+# by all processes using the same Redis, see smartconnect.rate_limit.
+SMART_RATE_LIMIT = env.float('SMART_RATE_LIMIT', 0)
+SMART_RATE_LIMIT_BURST = env.float('SMART_RATE_LIMIT_BURST', None)
+SMART_RATE_LIMIT_REDIS = env.bool('SMART_RATE_LIMIT_REDIS', False)
+
+# Fail fast on SMART Connect hosts that keep failing, see smartconnect.circuit_breaker.
+SMART_CIRCUIT_BREAKER = env.bool('SMART_CIRCUIT_BREAKER', False)
+SMART_CIRCUIT_FAILURE_THRESHOLD = env.int('SMART_CIRCUIT_FAILURE_THRESHOLD', 5)
+SMART_CIRCUIT_RECOVERY_TIMEOUT = env.float('SMART_CIRCUIT_RECOVERY_TIMEOUT', 30.0)
+SMART_CIRCUIT_HALF_OPEN_MAX_CALLS = env.int('SMART_CIRCUIT_HALF_OPEN_MAX_CALLS', 1)
+
+# Compress data post bodies of at least SMART_COMPRESS_MIN_SIZE bytes, see smartconnect.compression.
+SMART_COMPRESS_REQUESTS = env.bool('SMART_COMPRESS_REQUESTS', False)
+SMART_COMPRESS_ENCODING = env.str('SMART_COMPRESS_ENCODING', 'gzip')
+SMART_COMPRESS_MIN_SIZE = env.int('SMART_COMPRESS_MIN_SIZE', 16384)
+
+# Coalesce identical concurrent GET requests in AsyncSmartClient, see smartconnect.dedup.
+SMART_DEDUPLICATE_REQUESTS = env.bool('SMART_DEDUPLICATE_REQUESTS', False)
+
+# Read and write timeouts per kind of request, see smartconnect.timeouts.
+SMART_TIMEOUT_PROFILES = env.bool('SMART_TIMEOUT_PROFILES', False)
+SMART_METADATA_TIMEOUT = env.float('SMART_METADATA_TIMEOUT', 60.0)
+SMART_QUERY_TIMEOUT = env.float('SMART_QUERY_TIMEOUT', 60.0)
+SMART_DATA_POST_TIMEOUT = env.float('SMART_DATA_POST_TIMEOUT', 20.0)
+# Derive each profile's timeout from a percentile of its recent response times.
+SMART_ADAPTIVE_TIMEOUTS = env.bool('SMART_ADAPTIVE_TIMEOUTS', False)
+SMART_ADAPTIVE_TIMEOUT_PERCENTILE = env.float('SMART_ADAPTIVE_TIMEOUT_PERCENTILE', 99.0)
+SMART_ADAPTIVE_TIMEOUT_MULTIPLIER = env.float('SMART_ADAPTIVE_TIMEOUT_MULTIPLIER', 3.0)
+SMART_ADAPTIVE_TIMEOUT_MIN = env.float('SMART_ADAPTIVE_TIMEOUT_MIN', 1.0)
+SMART_ADAPTIVE_TIMEOUT_WINDOW = env.int('SMART_ADAPTIVE_TIMEOUT_WINDOW', 200)
+SMART_ADAPTIVE_TIMEOUT_MIN_SAMPLES = env.int('SMART_ADAPTIVE_TIMEOUT_MIN_SAMPLES', 20)
+
+# Threads used by SmartClient.map_post() and map_get_incident(), and downloads run at once by get_data_models().
+SMART_MAX_WORKERS = env.int('SMART_MAX_WORKERS', 8)
+
+# Connections AsyncSmartClient opens, in parallel with logging in, when entered as a context manager. 0 disables it.
+SMART_WARMUP_CONNECTIONS = env.int('SMART_WARMUP_CONNECTIONS', 0)
+
+# Keep models built from the Redis cache in an in-process LRU cache, see smartconnect.cache.LocalCache.
+SMART_LOCAL_CACHE = env.bool('SMART_LOCAL_CACHE', False)
+SMART_LOCAL_CACHE_SIZE = env.int('SMART_LOCAL_CACHE_SIZE', 256)
+SMART_LOCAL_CACHE_TTL = env.float('SMART_LOCAL_CACHE_TTL', 300.0)
+
+# Stamp cached data models with their Conservation Area's revision and download them again once it moves. Revisions
+# are polled with get_conservation_areas() at most every SMART_REVISION_POLL_INTERVAL seconds.
+SMART_REVISION_AWARE_CACHE = env.bool('SMART_REVISION_AWARE_CACHE', False)
+SMART_REVISION_POLL_INTERVAL = env.float('SMART_REVISION_POLL_INTERVAL', 60.0)
+
+# Serve a cached model that is due for a refresh (its revision moved, or force was passed) right away and refresh it in
+# the background.
+SMART_STALE_WHILE_REVALIDATE = env.bool('SMART_STALE_WHILE_REVALIDATE', False)
+
+# Let a single process download a model missing from the cache while the others wait for it, see
+# smartconnect.cache.fill_lock(). Waiting processes download it themselves after SMART_FILL_WAIT_TIMEOUT seconds.
+SMART_SINGLE_FLIGHT_FILL = env.bool('SMART_SINGLE_FLIGHT_FILL', False)
+SMART_FILL_LOCK_TIMEOUT = env.float('SMART_FILL_LOCK_TIMEOUT', 120.0)
+SMART_FILL_WAIT_TIMEOUT = env.float('SMART_FILL_WAIT_TIMEOUT', 120.0)
+SMART_FILL_POLL_INTERVAL = env.float('SMART_FILL_POLL_INTERVAL', 0.1)
+
+# Where cached models, sessions and integration state are kept: 'redis', 'memory' (this process only) or 'file' (shared
+# by processes on this host through SMART_CACHE_DIR, a temporary directory by default), see smartconnect.cache.
+SMART_CACHE_BACKEND = env.str('SMART_CACHE_BACKEND', 'redis')
+SMART_CACHE_DIR = env.str('SMART_CACHE_DIR', None)
+SMART_MEMORY_CACHE_SIZE = env.int('SMART_MEMORY_CACHE_SIZE', 1024)
+
+# Keep the list of Conservation Areas, indexed by uuid and label, in the cache and in each client for
+# SMART_CA_LIST_TTL seconds, and find single Conservation Areas in it, see get_conservation_area_index().
+SMART_CA_LIST_CACHE = env.bool('SMART_CA_LIST_CACHE', False)
+SMART_CA_LIST_TTL = env.int('SMART_CA_LIST_TTL', 300)
+
+# Remember for SMART_NEGATIVE_CACHE_TTL seconds that the server has no Conservation Area or configurable model with some
+# uuid, instead of asking again on every lookup.
+SMART_NEGATIVE_CACHE = env.bool('SMART_NEGATIVE_CACHE', False)
+SMART_NEGATIVE_CACHE_TTL = env.int('SMART_NEGATIVE_CACHE_TTL', 60)
+
+# Format data models are stored in the cache in: 'json', or compressed 'zlib' or 'zstd' (requires the optional
+# 'zstandard' package), see smartconnect.serialization. Entries in any format are read.
+SMART_CACHE_FORMAT = env.str('SMART_CACHE_FORMAT', 'json')
+
+# Keep a snapshot of each downloaded data model on disk, under SMART_SNAPSHOT_DIR (a temporary directory by default),
+# and read it when the cache doesn't have the model, see smartconnect.snapshots.
+SMART_SNAPSHOTS = env.bool('SMART_SNAPSHOTS', False)
+SMART_SNAPSHOT_DIR = env.str('SMART_SNAPSHOT_DIR', None)
+
 # REDIS settings
 REDIS_HOST = env.str("REDIS_HOST", "localhost")
 REDIS_PORT = env.int("REDIS_PORT", 6379)
 REDIS_DB = env.int("REDIS_DB", 3)
+# Size of the connection pool of each asyncio Redis client, see smartconnect.cache.get_async_cache().
+REDIS_ASYNC_MAX_CONNECTIONS = env.int("REDIS_ASYNC_MAX_CONNECTIONS", 50)
@@ -0,0 +1,203 @@
+'''
+On-disk snapshots of parsed data models, for processes starting while the cache is cold or unreachable.
+
+A snapshot file holds a small JSON header followed by the model's large fields, each as its own JSON document. Loading
+one maps the file into memory and reads only the header; categories and attributes are decoded the first time the
+model uses them. The file is unmapped once every field has been decoded, or when it is replaced or deleted (which
+fails on Windows while it is mapped), the fields not used yet being decoded then.
+
+    magic 'SMDS' | format version (1 byte) | header length (4 bytes, big-endian) | header | fields
+'''
+import glob
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+import weakref
+
+from smartconnect import smart_settings
+from smartconnect.models import DataModel, ConfigurableDataModel
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'SMDS'
+# Bump when the layout changes. Snapshots in other versions are ignored and replaced by the next download.
+FORMAT_VERSION = 1
+
+_preamble = struct.Struct('>4sBI')
+
+# Fields stored after the header and decoded lazily.
+LAZY_FIELDS = ('categories', 'attributes')
+
+
+class Snapshot:
+    '''
+    A snapshot file mapped into memory.
+    '''
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, version, header_length = _preamble.unpack_from(self._mmap)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError(f"{path} is not a version {FORMAT_VERSION} data model snapshot.")
+
+            self._body = _preamble.size + header_length
+            self.header = json.loads(self._mmap[_preamble.size:self._body])
+        except BaseException:
+            self._mmap.close()
+            raise
+
+        self._unread = set(self.header['fields'])
+        self._decoded = {}
+        self._lock = threading.Lock()
+
+    def _decode(self, name: str):
+        offset, length = self.header['fields'][name]
+        return json.loads(self._mmap[self._body + offset:self._body + offset + length])
+
+    def field(self, name: str):
+        with self._lock:
+            if name not in self._decoded:
+                self._decoded[name] = self._decode(name)
+                self._unread.discard(name)
+                if not self._unread:
+                    self._mmap.close()
+            return self._decoded[name]
+
+    def close(self):
+        '''
+        Decode the fields not read yet, for field() to return later, and unmap the file.
+        '''
+        with self._lock:
+            if self._mmap.closed:
+                return
+            for name in self._unread:
+                self._decoded[name] = self._decode(name)
+            self._unread.clear()
+            self._mmap.close()
+
+
+class _LazyField:
+    '''
+    Model attribute decoded from the model's snapshot on first access, and kept on the instance from then on.
+    '''
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __set_name__(self, owner, attr):
+        self.attr = attr
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        value = instance.__dict__[self.attr] = instance._snapshot.field(self.name)
+        return value
+
+
+class SnapshotDataModel(DataModel):
+    _categories = _LazyField('categories')
+    _attributes = _LazyField('attributes')
+
+
+class SnapshotConfigurableDataModel(ConfigurableDataModel):
+    _categories = _LazyField('categories')
+    _attributes = _LazyField('attributes')
+
+
+class SnapshotStore:
+    '''
+    Snapshots of data models, stored under directory by the cache key they are kept at and the language they were
+    built for.
+    '''
+
+    def __init__(self, *, directory: str = None):
+        self.directory = directory or os.path.join(tempfile.gettempdir(), 'smartconnect-snapshots')
+        # Snapshots loaded from each path that may still be mapped.
+        self._open = {}
+        self._lock = threading.Lock()
+
+    def _prefix(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(key.encode('utf-8')).hexdigest())
+
+    def _path(self, key: str, variant: str = None) -> str:
+        return f'{self._prefix(key)}-{variant}.snapshot'
+
+    def _close(self, path: str):
+        for snapshot in list(self._open.pop(path, ())):
+            snapshot.close()
+
+    def save(self, key: str, model, variant: str = None):
+        data = model.export_as_dict()
+        fields, chunks, offset = {}, [], 0
+        for name in LAZY_FIELDS:
+            chunk = json.dumps(data.pop(name), separators=(',', ':')).encode('utf-8')
+            fields[name] = (offset, len(chunk))
+            chunks.append(chunk)
+            offset += len(chunk)
+
+        header = json.dumps(dict(
+            kind='configurable' if isinstance(model, ConfigurableDataModel) else 'datamodel',
+            saved_at=time.time(), fields=fields, **data,
+        )).encode('utf-8')
+
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(_preamble.pack(MAGIC, FORMAT_VERSION, len(header)))
+                f.write(header)
+                for chunk in chunks:
+                    f.write(chunk)
+            path = self._path(key, variant)
+            with self._lock:
+                self._close(path)
+                os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    def load(self, key: str, variant: str = None):
+        '''
+        Returns the model snapshotted at key, or None if there is no usable snapshot.
+        '''
+        path = self._path(key, variant)
+        try:
+            with self._lock:
+                snapshot = Snapshot(path)
+                self._open.setdefault(path, weakref.WeakSet()).add(snapshot)
+        except FileNotFoundError:
+            return None
+        except (ValueError, struct.error) as ex:
+            logger.warning(f"Ignoring data model snapshot for {key}: {ex}")
+            return None
+
+        header = snapshot.header
+        if header['kind'] == 'configurable':
+            model = SnapshotConfigurableDataModel(use_language_code=variant or 'en', cm_uuid=header.get('cm_uuid'))
+            model._name = header.get('name')
+        else:
+            model = SnapshotDataModel(use_language_code=variant or 'en')
+        model.revision = header.get('revision')
+        model._snapshot = snapshot
+        return model
+
+    def delete(self, key: str):
+        for path in glob.glob(f'{glob.escape(self._prefix(key))}-*.snapshot'):
+            with self._lock:
+                self._close(path)
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+
+store = SnapshotStore(directory=smart_settings.SMART_SNAPSHOT_DIR)
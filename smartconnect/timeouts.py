@@ -0,0 +1,154 @@
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+import httpx
+
+from smartconnect import smart_settings
+
+logger = logging.getLogger(__name__)
+
+# Timeout profiles, keyed by (method, URL path prefix). Requests that match none keep the client's default timeout.
+PROFILE_ENDPOINTS = {
+    'metadata': ('GET', '/api/metadata/'),
+    'query': ('GET', '/api/query/'),
+    'data': ('POST', '/api/data/'),
+}
+
+
+def default_profiles() -> dict:
+    return {
+        'metadata': smart_settings.SMART_METADATA_TIMEOUT,
+        'query': smart_settings.SMART_QUERY_TIMEOUT,
+        'data': smart_settings.SMART_DATA_POST_TIMEOUT,
+    }
+
+
+class LatencyWindow:
+    '''
+    The last `size` latencies observed for one profile.
+    '''
+
+    def __init__(self, size: int):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._samples)
+
+    def add(self, latency: float):
+        with self._lock:
+            self._samples.append(latency)
+
+    def percentile(self, percentile: float) -> float:
+        with self._lock:
+            samples = sorted(self._samples)
+        return samples[max(0, math.ceil(percentile / 100 * len(samples)) - 1)]
+
+
+class TimeoutProfiles:
+    '''
+    Read and write timeouts per kind of request: metadata downloads, queries and data posts.
+
+    With adaptive set, a profile's timeout becomes `multiplier` times the given percentile of its recent response
+    times (until the response headers arrive), kept between min_timeout and the profile's configured timeout. Until
+    min_samples responses have been seen the configured timeout is used. A request that times out counts as taking as
+    long as its timeout, so that the adaptive timeout grows again when the server slows down.
+    '''
+
+    def __init__(self, *, profiles: dict = None, adaptive: bool = False, percentile: float = None,
+                 multiplier: float = None, min_timeout: float = None, window_size: int = None,
+                 min_samples: int = None):
+        self.profiles = profiles or default_profiles()
+        self.adaptive = adaptive
+        self.percentile = percentile or smart_settings.SMART_ADAPTIVE_TIMEOUT_PERCENTILE
+        self.multiplier = multiplier or smart_settings.SMART_ADAPTIVE_TIMEOUT_MULTIPLIER
+        self.min_timeout = smart_settings.SMART_ADAPTIVE_TIMEOUT_MIN if min_timeout is None else min_timeout
+        self.min_samples = min_samples or smart_settings.SMART_ADAPTIVE_TIMEOUT_MIN_SAMPLES
+        window_size = window_size or smart_settings.SMART_ADAPTIVE_TIMEOUT_WINDOW
+        self._windows = {profile: LatencyWindow(window_size) for profile in self.profiles}
+
+    def profile_for(self, request: httpx.Request) -> Optional[str]:
+        for profile, (method, prefix) in PROFILE_ENDPOINTS.items():
+            if request.method == method and prefix in request.url.path and profile in self.profiles:
+                return profile
+        return None
+
+    def timeout(self, profile: str) -> float:
+        configured = self.profiles[profile]
+        window = self._windows[profile]
+        if not self.adaptive or len(window) < self.min_samples:
+            return configured
+        return min(configured, max(self.min_timeout, window.percentile(self.percentile) * self.multiplier))
+
+    def record(self, profile: str, latency: float):
+        if self.adaptive:
+            self._windows[profile].add(latency)
+
+    def apply(self, request: httpx.Request) -> Optional[tuple]:
+        '''
+        Set the request's read and write timeouts from its profile. Returns the profile and the timeout applied, to be
+        handed back to finish(), or None if the request has no profile.
+        '''
+        if (profile := self.profile_for(request)) is None:
+            return None
+
+        timeout = self.timeout(profile)
+        request.extensions = {
+            **request.extensions,
+            'timeout': {**request.extensions.get('timeout', {}), 'read': timeout, 'write': timeout},
+        }
+        return profile, timeout
+
+    def finish(self, applied: tuple, started: float, *, timed_out: bool = False):
+        profile, timeout = applied
+        self.record(profile, timeout if timed_out else time.monotonic() - started)
+
+
+class TimeoutTransport(httpx.BaseTransport):
+
+    def __init__(self, transport: httpx.BaseTransport, profiles: TimeoutProfiles):
+        self._transport = transport
+        self.profiles = profiles
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if (applied := self.profiles.apply(request)) is None:
+            return self._transport.handle_request(request)
+
+        started = time.monotonic()
+        try:
+            response = self._transport.handle_request(request)
+        except httpx.TimeoutException:
+            self.profiles.finish(applied, started, timed_out=True)
+            raise
+        self.profiles.finish(applied, started)
+        return response
+
+    def close(self):
+        self._transport.close()
+
+
+class AsyncTimeoutTransport(httpx.AsyncBaseTransport):
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, profiles: TimeoutProfiles):
+        self._transport = transport
+        self.profiles = profiles
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if (applied := self.profiles.apply(request)) is None:
+            return await self._transport.handle_async_request(request)
+
+        started = time.monotonic()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except httpx.TimeoutException:
+            self.profiles.finish(applied, started, timed_out=True)
+            raise
+        self.profiles.finish(applied, started)
+        return response
+
+    async def aclose(self):
+        await self._transport.aclose()
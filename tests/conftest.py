@@ -1,7 +1,10 @@
 import json
 
+import httpx
 import pytest
-from smartconnect import AsyncSmartClient
+from smartconnect import SmartClient, AsyncSmartClient, DataModel
+from smartconnect.cache import local_cache
+from smartconnect.cache_backends import MemoryCache
 
 
 @pytest.fixture
@@ -19,9 +22,116 @@ def mock_cache(mocker):
     mock_cache.get.return_value = None
     mock_cache_module = mocker.MagicMock()
     mock_cache_module.cache = mock_cache
+    mock_cache_module.local_cache.get.return_value = None
+    mock_async_cache = mocker.AsyncMock()
+    mock_async_cache.get.return_value = None
+    mock_cache_module.get_async_cache.return_value = mock_async_cache
     return mock_cache_module
 
 
+@pytest.fixture
+def login(respx_mock):
+    '''
+    SMART Connect login on any server, for tests mocking requests with respx_mock.
+    '''
+    respx_mock.get(url__regex=r".*/connect/home").mock(return_value=httpx.Response(200))
+    respx_mock.post(url__regex=r".*/j_security_check").mock(
+        return_value=httpx.Response(302, headers={"set-cookie": "JSESSIONID=abc123; Path=/"}))
+
+
+@pytest.fixture
+def redis_cache(mocker):
+    '''
+    Mock of the cache the clients share, missing every key unless told otherwise.
+    '''
+    redis_cache = mocker.patch("smartconnect.cache.cache")
+    redis_cache.get.return_value = None
+    return redis_cache
+
+
+@pytest.fixture
+def async_redis_cache(mocker):
+    '''
+    Mock of the cache as AsyncSmartClient sees it, missing every key unless told otherwise.
+    '''
+    async_redis_cache = mocker.AsyncMock()
+    async_redis_cache.get.return_value = None
+    mocker.patch("smartconnect.cache.get_async_cache", return_value=async_redis_cache)
+    return async_redis_cache
+
+
+@pytest.fixture
+def backend(mocker):
+    '''
+    In-process cache backend standing in for Redis, for tests that need a working cache.
+    '''
+    return mocker.patch("smartconnect.cache.cache", MemoryCache())
+
+
+@pytest.fixture
+def clock(mocker):
+    '''
+    Frozen time.time(), moved forward by adding to its return_value.
+    '''
+    return mocker.patch("time.time", return_value=1_000_000.0)
+
+
+@pytest.fixture
+def monotonic_clock(mocker):
+    '''
+    Frozen time.monotonic(), moved forward by adding to its return_value. Not for tests waiting on the event loop.
+    '''
+    return mocker.patch("time.monotonic", return_value=1000.0)
+
+
+@pytest.fixture
+def downloaded_datamodel():
+    '''
+    Builds a data model with a single category, at path.
+    '''
+    def downloaded_datamodel(path="new"):
+        datamodel = DataModel()
+        datamodel.import_from_dict({"categories": [{"path": path}], "attributes": []})
+        return datamodel
+    return downloaded_datamodel
+
+
+@pytest.fixture
+def make_client(mocker, downloaded_datamodel):
+    '''
+    Builds SmartClients with the given options that don't log in, and whose data model downloads return
+    downloaded_datamodel().
+    '''
+    def make_client(**options):
+        smart_client = SmartClient(api="https://test.example.com", username="testuser", password="testpass",
+                                   **options)
+        mocker.patch.object(smart_client, "ensure_login")
+        mocker.patch.object(smart_client, "download_datamodel", side_effect=lambda **kwargs: downloaded_datamodel())
+        return smart_client
+    return make_client
+
+
+@pytest.fixture
+def make_async_client(mocker, downloaded_datamodel):
+    '''
+    Builds AsyncSmartClients with the given options that don't log in, and whose data model downloads return
+    downloaded_datamodel().
+    '''
+    def make_async_client(**options):
+        mocker.patch.object(AsyncSmartClient, "ensure_login")
+        smart_client = AsyncSmartClient(api="https://test.example.com", username="testuser", password="testpass",
+                                        **options)
+        mocker.patch.object(smart_client, "download_datamodel", side_effect=lambda **kwargs: downloaded_datamodel())
+        return smart_client
+    return make_async_client
+
+
+@pytest.fixture(autouse=True)
+def clear_local_cache():
+    yield
+    local_cache.clear()
+
+
 @pytest.fixture
 def smart_client(client_settings):
     return AsyncSmartClient(**client_settings)
@@ -0,0 +1,94 @@
+import asyncio
+import json
+import socketserver
+import threading
+import time
+
+import httpx
+import pytest
+import respx
+
+from smartconnect import AsyncSmartClient, cache
+
+API = "https://fancyplace.smartconservationtools.org/server"
+CA_UUID = "123ac748-6e05-4299-892f-335d21fd4ce6"
+
+
+class SlowRedisHandler(socketserver.StreamRequestHandler):
+    '''
+    Just enough of RESP3 for GET and SET: GET answers nil after `delay` seconds, everything else is OK.
+    '''
+
+    def handle(self):
+        while (line := self.rfile.readline()).startswith(b'*'):
+            command = []
+            for _ in range(int(line[1:])):
+                length = int(self.rfile.readline()[1:])
+                command.append(self.rfile.read(length + 2)[:-2])
+            self.server.commands.append(command)
+
+            if command[0].upper() == b'GET':
+                time.sleep(self.server.delay)
+                self.wfile.write(b'_\r\n')
+            elif command[0].upper() == b'HELLO':
+                self.wfile.write(b'%1\r\n+proto\r\n:3\r\n')
+            else:
+                self.wfile.write(b'+OK\r\n')
+
+
+@pytest.fixture
+def slow_redis(mocker):
+    server = socketserver.ThreadingTCPServer(('localhost', 0), SlowRedisHandler)
+    server.daemon_threads = True
+    server.delay = 0.2
+    server.commands = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    mocker.patch("smartconnect.cache.smart_settings.REDIS_HOST", "localhost")
+    mocker.patch("smartconnect.cache.smart_settings.REDIS_PORT", server.server_address[1])
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.asyncio
+async def test_cache_reads_do_not_block_the_event_loop(slow_redis, mocker, cas_response):
+    mocker.patch.object(AsyncSmartClient, "ensure_login")
+    smart_client = AsyncSmartClient(api=API, username="Earthranger", password="afancypassword")
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticking = asyncio.ensure_future(ticker())
+    try:
+        with respx.mock:
+            respx.get(f"{API}/api/conservationarea").respond(status_code=200, json=cas_response)
+            conservation_area = await smart_client.get_conservation_area(ca_uuid=CA_UUID)
+    finally:
+        ticking.cancel()
+        await cache.get_async_cache().aclose()
+
+    assert str(conservation_area.uuid) == CA_UUID
+    # The loop kept running while Redis took 0.2 seconds to answer the GET.
+    assert ticks >= 10
+    assert [command[0].upper() for command in slow_redis.commands if command[0].upper() in (b'GET', b'SET')] == \
+           [b'GET', b'SET']
+    assert json.loads(slow_redis.commands[-1][2])["uuid"] == CA_UUID
+
+
+@pytest.mark.asyncio
+async def test_each_event_loop_gets_its_own_client():
+    this_loop = cache.get_async_cache()
+    assert cache.get_async_cache() is this_loop
+
+    other_loop = await asyncio.to_thread(asyncio.run, _get_async_cache())
+
+    assert other_loop is not this_loop
+
+
+async def _get_async_cache():
+    return cache.get_async_cache()
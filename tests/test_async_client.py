@@ -4,7 +4,7 @@ import respx
 from pydantic.tools import parse_obj_as
 from typing import List
 
-from smartconnect import DataModel, models
+from smartconnect import AsyncSmartClient, DataModel, models
 
 # login_mock is for the requests to initiate a session and authenticate.
 login_mock = respx.mock(base_url="https://smarttestserverconnect.smartconservationtools.org/server", assert_all_called=True)
@@ -35,7 +35,7 @@ async def test_get_data_model(
         assert ca_datamodel._categories == expected_datamodel._categories
         assert ca_datamodel._attributes == expected_datamodel._attributes
         # check that the datamodel was cached
-        assert mock_cache.cache.set.called
+        assert mock_cache.get_async_cache().set.called
 
 
 @pytest.mark.asyncio
@@ -55,7 +55,7 @@ async def test_get_conservation_area(
         conservation_area = await smart_client.get_conservation_area(ca_uuid=smart_ca_uuid)
         assert conservation_area == models.ConservationArea.parse_obj(cas_response[0])
         # check that the cas was cached
-        assert mock_cache.cache.set.called
+        assert mock_cache.get_async_cache().set.called
 
 
 @pytest.mark.asyncio
@@ -161,3 +161,17 @@ async def test_post_smart_request_track_point(
             ca_uuid=smart_ca_uuid
         )
         assert response == new_track_point_response
+
+
+def test_http2_enabled(client_settings):
+    pytest.importorskip("h2")
+    smart_client = AsyncSmartClient(**client_settings, http2=True)
+    assert smart_client.http2
+    assert smart_client._session._transport._pool._http2
+
+
+def test_http2_falls_back_without_h2(client_settings, mocker):
+    mocker.patch("smartconnect.async_client.h2", None)
+    smart_client = AsyncSmartClient(**client_settings, http2=True)
+    assert not smart_client.http2
+    assert not smart_client._session._transport._pool._http2
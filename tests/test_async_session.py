@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 import respx
 import httpx
@@ -67,3 +68,175 @@ async def test_async_client_landing_page_server500():
         # Perform the login
         await smart_client.ensure_login()
 
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_async_client_concurrent_login_is_single_flight():
+
+    # Given a fresh client and a server that issues a session cookie on login.
+    landing_page = respx.get(
+        "https://fancyplace.smartconservationtools.org/server/connect/home").respond(status_code=200)
+    login = respx.post(
+        "https://fancyplace.smartconservationtools.org/server/j_security_check"
+    ).respond(status_code=302, headers={"set-cookie": "JSESSIONID=abc123; Path=/"})
+
+    smart_client = AsyncSmartClient(
+        api="https://fancyplace.smartconservationtools.org/server",
+        username="Earthranger",
+        password="afancypassword"
+    )
+
+    # When many coroutines ask for a session at the same time.
+    sessions = await asyncio.gather(*[smart_client.ensure_login() for _ in range(20)])
+
+    # Then they all share the result of a single handshake.
+    assert all(session is smart_client._session for session in sessions)
+    assert landing_page.call_count == 1
+    assert login.call_count == 1
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_async_client_waits_for_login_when_landing_page_sets_cookie():
+
+    # Given a server that hands out the session cookie on the landing page and authenticates it on login.
+    authenticated = False
+
+    async def landing_page(request):
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, headers={"set-cookie": "JSESSIONID=abc123; Path=/"})
+
+    async def login(request):
+        nonlocal authenticated
+        await asyncio.sleep(0.01)
+        authenticated = True
+        return httpx.Response(302)
+
+    respx.get("https://fancyplace.smartconservationtools.org/server/connect/home").mock(side_effect=landing_page)
+    respx.post("https://fancyplace.smartconservationtools.org/server/j_security_check").mock(side_effect=login)
+
+    smart_client = AsyncSmartClient(
+        api="https://fancyplace.smartconservationtools.org/server",
+        username="Earthranger",
+        password="afancypassword"
+    )
+
+    async def use_session():
+        await smart_client.ensure_login()
+        return authenticated
+
+    # When a coroutine asks for a session while the login is between the landing page and the login post.
+    first = asyncio.ensure_future(use_session())
+    await asyncio.sleep(0.015)
+    second = await use_session()
+
+    # Then it only gets the session once it is authenticated.
+    assert second is True
+    assert await first is True
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_async_client_relogin_on_expired_session():
+
+    # Given a client that logged in once.
+    landing_page = respx.get(
+        "https://fancyplace.smartconservationtools.org/server/connect/home").respond(status_code=200)
+    login = respx.post(
+        "https://fancyplace.smartconservationtools.org/server/j_security_check"
+    ).mock(side_effect=[
+        httpx.Response(302, headers={"set-cookie": "JSESSIONID=first; Path=/"}),
+        httpx.Response(302, headers={"set-cookie": "JSESSIONID=second; Path=/"}),
+    ])
+
+    # And a server that answers 401 once the first session has expired.
+    def conservation_areas(request):
+        if "JSESSIONID=first" in request.headers.get("cookie", ""):
+            return httpx.Response(401)
+        return httpx.Response(200, json=[])
+
+    cas = respx.get(
+        "https://fancyplace.smartconservationtools.org/server/api/conservationarea"
+    ).mock(side_effect=conservation_areas)
+
+    smart_client = AsyncSmartClient(
+        api="https://fancyplace.smartconservationtools.org/server",
+        username="Earthranger",
+        password="afancypassword"
+    )
+    await smart_client.ensure_login()
+
+    # When several coroutines hit the expired session at once.
+    results = await asyncio.gather(*[smart_client.get_conservation_areas() for _ in range(5)])
+
+    # Then they share one re-login and every rejected request is replayed.
+    assert results == [[]] * 5
+    assert landing_page.call_count == 2
+    assert login.call_count == 2
+    assert 5 < cas.call_count <= 10
+    assert smart_client._session_id() == "second"
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_async_client_replaces_expired_stored_session(mocker, mock_cache):
+    mocker.patch("smartconnect.session.cache", mock_cache)
+
+    # Given a stored session that has since expired on the server.
+    mock_cache.get_async_cache().get.return_value = b"stale"
+    landing_page = respx.get(
+        "https://fancyplace.smartconservationtools.org/server/connect/home").respond(status_code=200)
+    respx.post(
+        "https://fancyplace.smartconservationtools.org/server/j_security_check"
+    ).respond(status_code=302, headers={"set-cookie": "JSESSIONID=fresh; Path=/"})
+
+    def conservation_areas(request):
+        if "JSESSIONID=stale" in request.headers.get("cookie", ""):
+            return httpx.Response(401)
+        return httpx.Response(200, json=[])
+
+    respx.get(
+        "https://fancyplace.smartconservationtools.org/server/api/conservationarea"
+    ).mock(side_effect=conservation_areas)
+
+    smart_client = AsyncSmartClient(
+        api="https://fancyplace.smartconservationtools.org/server",
+        username="Earthranger",
+        password="afancypassword",
+        use_session_store=True
+    )
+
+    # Then the client logs in again and stores the new session for other processes.
+    assert await smart_client.get_conservation_areas() == []
+    assert landing_page.call_count == 1
+    mock_cache.get_async_cache().set.assert_called_once_with(
+        "smart.session.https://fancyplace.smartconservationtools.org/server.Earthranger", "fresh", ex=1500)
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_async_client_concurrent_callers_all_fail_when_login_fails():
+
+    # Given a server that hands out a session cookie on the landing page and rejects the credentials.
+    respx.get("https://fancyplace.smartconservationtools.org/server/connect/home").respond(
+        status_code=200, headers={"set-cookie": "JSESSIONID=unauthenticated; Path=/"})
+
+    async def login(request):
+        await asyncio.sleep(0.01)
+        return httpx.Response(401)
+
+    respx.post("https://fancyplace.smartconservationtools.org/server/j_security_check").mock(side_effect=login)
+
+    smart_client = AsyncSmartClient(
+        api="https://fancyplace.smartconservationtools.org/server",
+        username="Earthranger",
+        password="afancypassword"
+    )
+
+    # When several coroutines ask for a session at once.
+    results = await asyncio.gather(*[smart_client.ensure_login() for _ in range(5)], return_exceptions=True)
+
+    # Then none of them, nor later callers, get the unauthenticated session.
+    assert all(isinstance(result, SMARTClientUnauthorizedError) for result in results)
+    with pytest.raises(SMARTClientUnauthorizedError):
+        await smart_client.ensure_login()
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from smartconnect import SMARTClientException
+
+CA_UUIDS = [f"123e4567-e89b-12d3-a456-42661417400{i}" for i in range(5)]
+
+
+def cache_key(ca_uuid):
+    return f"cache:smart-ca:{ca_uuid}:datamodel"
+
+
+def cached_datamodel(path):
+    return json.dumps({"categories": [{"path": path}], "attributes": []}).encode("utf-8")
+
+
+@pytest.fixture
+def smart_client(make_client, downloaded_datamodel):
+    smart_client = make_client()
+    smart_client.download_datamodel.side_effect = lambda ca_uuid: downloaded_datamodel(f"downloaded.{ca_uuid}")
+    return smart_client
+
+
+def test_cached_models_are_read_in_one_round_trip(smart_client, redis_cache):
+    redis_cache.mget.return_value = [cached_datamodel("cached.0"), None, cached_datamodel("cached.2")]
+
+    datamodels = smart_client.get_data_models(ca_uuids=CA_UUIDS[:3])
+
+    redis_cache.mget.assert_called_once_with([cache_key(ca_uuid) for ca_uuid in CA_UUIDS[:3]])
+    redis_cache.get.assert_not_called()
+    smart_client.download_datamodel.assert_called_once_with(ca_uuid=CA_UUIDS[1])
+    assert list(datamodels) == CA_UUIDS[:3]
+    assert datamodels[CA_UUIDS[0]].get_category(path="cached.0")
+    assert datamodels[CA_UUIDS[1]].get_category(path=f"downloaded.{CA_UUIDS[1]}")
+    assert redis_cache.set.call_args.kwargs["name"] == cache_key(CA_UUIDS[1])
+
+
+def test_local_cache_hits_are_not_read_from_redis(smart_client, redis_cache):
+    smart_client.use_local_cache = True
+    redis_cache.mget.return_value = [cached_datamodel("cached.0"), cached_datamodel("cached.1")]
+    smart_client.get_data_models(ca_uuids=CA_UUIDS[:2])
+
+    redis_cache.mget.return_value = [cached_datamodel("cached.2")]
+    datamodels = smart_client.get_data_models(ca_uuids=CA_UUIDS[:3])
+
+    redis_cache.mget.assert_called_with([cache_key(CA_UUIDS[2])])
+    assert datamodels[CA_UUIDS[2]].get_category(path="cached.2")
+
+
+def test_downloads_run_concurrently_within_bound(smart_client, redis_cache, downloaded_datamodel):
+    redis_cache.mget.return_value = [None] * len(CA_UUIDS)
+    in_flight = max_in_flight = 0
+    lock = threading.Lock()
+
+    def download(ca_uuid):
+        nonlocal in_flight, max_in_flight
+        with lock:
+            in_flight += 1
+            max_in_flight = max(in_flight, max_in_flight)
+        time.sleep(0.05)
+        with lock:
+            in_flight -= 1
+        return downloaded_datamodel(f"downloaded.{ca_uuid}")
+
+    smart_client.download_datamodel.side_effect = download
+
+    datamodels = smart_client.get_data_models(ca_uuids=CA_UUIDS, max_workers=2)
+
+    assert max_in_flight == 2
+    assert all(datamodels[ca_uuid].get_category(path=f"downloaded.{ca_uuid}") for ca_uuid in CA_UUIDS)
+
+
+def test_failed_downloads_are_returned_in_place(smart_client, redis_cache, downloaded_datamodel):
+    redis_cache.mget.return_value = [None, None]
+
+    def download(ca_uuid):
+        if ca_uuid == CA_UUIDS[0]:
+            raise Exception("Server unreachable")
+        return downloaded_datamodel(f"downloaded.{ca_uuid}")
+
+    smart_client.download_datamodel.side_effect = download
+
+    datamodels = smart_client.get_data_models(ca_uuids=CA_UUIDS[:2])
+
+    assert isinstance(datamodels[CA_UUIDS[0]], SMARTClientException)
+    assert datamodels[CA_UUIDS[1]].get_category(path=f"downloaded.{CA_UUIDS[1]}")
+
+
+def test_cache_errors_fall_back_to_downloading(smart_client, redis_cache):
+    redis_cache.mget.side_effect = ConnectionError("Redis unreachable")
+
+    datamodels = smart_client.get_data_models(ca_uuids=CA_UUIDS[:2])
+
+    assert smart_client.download_datamodel.call_count == 2
+    assert all(datamodels[ca_uuid] for ca_uuid in CA_UUIDS[:2])
+
+
+@pytest.mark.asyncio
+async def test_async_client_reads_once_and_bounds_downloads(async_redis_cache, make_async_client,
+                                                            downloaded_datamodel):
+    async_redis_cache.mget.return_value = [cached_datamodel("cached.0")] + [None] * 4
+    smart_client = make_async_client()
+    in_flight = max_in_flight = 0
+
+    async def download(ca_uuid):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(in_flight, max_in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return downloaded_datamodel(f"downloaded.{ca_uuid}")
+
+    smart_client.download_datamodel.side_effect = download
+
+    datamodels = await smart_client.get_data_models(ca_uuids=CA_UUIDS, max_workers=2)
+
+    async_redis_cache.mget.assert_awaited_once_with([cache_key(ca_uuid) for ca_uuid in CA_UUIDS])
+    assert smart_client.download_datamodel.await_count == 4
+    assert max_in_flight == 2
+    assert list(datamodels) == CA_UUIDS
+    assert datamodels[CA_UUIDS[0]].get_category(path="cached.0")
+    assert datamodels[CA_UUIDS[4]].get_category(path=f"downloaded.{CA_UUIDS[4]}")
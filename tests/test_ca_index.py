@@ -0,0 +1,139 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+import pytz
+
+from smartconnect import ConservationAreaIndex
+from smartconnect.models import ConservationArea
+
+CA_UUIDS = [uuid.UUID(f"123e4567-e89b-12d3-a456-42661417400{i}") for i in range(3)]
+
+
+def conservation_area(ca_uuid, label=None):
+    return ConservationArea(label=label or f"CA {ca_uuid.hex[-1]}", status="DATA", version=uuid.uuid4(), revision=1,
+                            uuid=ca_uuid, caBoundaryJson='{"type": "Point", "coordinates": [36.8, -1.3]}')
+
+
+CONSERVATION_AREAS = [conservation_area(ca_uuid) for ca_uuid in CA_UUIDS]
+
+
+@pytest.fixture
+def make_client(make_client, mocker):
+    def make_ca_client(**kwargs):
+        smart_client = make_client(**kwargs)
+        mocker.patch.object(smart_client, "get_conservation_areas", return_value=CONSERVATION_AREAS)
+        return smart_client
+    return make_ca_client
+
+
+def test_index_looks_up_by_uuid_and_label():
+    index = ConservationAreaIndex(CONSERVATION_AREAS + [conservation_area(uuid.uuid4(), label="CA 0")])
+
+    assert index.get(str(CA_UUIDS[1])) is CONSERVATION_AREAS[1]
+    assert index.get(CA_UUIDS[2]) is CONSERVATION_AREAS[2]
+    assert index.get("not-a-uuid") is None
+    assert index.get_by_label("CA 0") is CONSERVATION_AREAS[0]
+    assert len(index) == 4
+
+
+def test_index_round_trips_through_json(clock):
+    index = ConservationAreaIndex(CONSERVATION_AREAS)
+
+    restored = ConservationAreaIndex.import_from_dict(json.loads(json.dumps(index.export_as_dict())))
+
+    assert restored.fetched_at == 1_000_000.0
+    assert list(restored) == CONSERVATION_AREAS
+
+
+def test_list_is_downloaded_once_for_many_lookups(backend, make_client):
+    smart_client = make_client(cache_ca_list=True)
+
+    for ca_uuid in CA_UUIDS:
+        assert smart_client.get_conservation_area(ca_uuid=str(ca_uuid)).uuid == ca_uuid
+
+    smart_client.get_conservation_areas.assert_called_once()
+
+
+def test_cached_list_is_shared_until_it_expires(backend, make_client, clock):
+    make_client(cache_ca_list=True).get_conservation_area_index()
+
+    smart_client = make_client(cache_ca_list=True)
+    assert smart_client.get_conservation_area_index().get_by_label("CA 1").uuid == CA_UUIDS[1]
+    smart_client.get_conservation_areas.assert_not_called()
+
+    clock.return_value += 300
+    smart_client.get_conservation_area_index()
+    smart_client.get_conservation_areas.assert_called_once()
+
+
+def test_unknown_ca_refreshes_the_cached_list(backend, make_client):
+    smart_client = make_client(cache_ca_list=True)
+    smart_client.get_conservation_area_index()
+    added = conservation_area(uuid.uuid4())
+    smart_client.get_conservation_areas.return_value = CONSERVATION_AREAS + [added]
+
+    assert smart_client.get_conservation_area(ca_uuid=str(added.uuid)) == added
+    assert smart_client.get_conservation_areas.call_count == 2
+
+
+def test_timezone_guesses_are_kept_with_the_list(backend, make_client, mocker):
+    guess_ca_timezone = mocker.patch("smartconnect.utils.guess_ca_timezone", return_value=pytz.timezone("Africa/Nairobi"))
+    smart_client = make_client(cache_ca_list=True)
+
+    for _ in range(3):
+        assert smart_client.guess_ca_timezone(str(CA_UUIDS[0])) == pytz.timezone("Africa/Nairobi")
+    assert smart_client.guess_ca_timezone(str(uuid.uuid4())) is None
+
+    guess_ca_timezone.assert_called_once_with(CONSERVATION_AREAS[0])
+
+
+def test_revisions_are_read_from_the_cached_list(backend, make_client):
+    smart_client = make_client(cache_ca_list=True, revision_aware_cache=True)
+
+    smart_client.get_data_model(ca_uuid=str(CA_UUIDS[0]))
+    smart_client.get_conservation_area(ca_uuid=str(CA_UUIDS[1]))
+
+    smart_client.get_conservation_areas.assert_called_once()
+    assert smart_client._ca_revision(str(CA_UUIDS[0])) == 1
+    assert smart_client._ca_revision("not-a-uuid") is None
+
+
+def test_list_is_not_cached_by_default(backend, make_client):
+    smart_client = make_client()
+
+    smart_client.get_conservation_area(ca_uuid=str(CA_UUIDS[0]))
+    smart_client.get_conservation_area(ca_uuid=str(CA_UUIDS[1]))
+
+    assert smart_client.get_conservation_areas.call_count == 2
+    assert backend.get("cache:smart-ca:list:https://test.example.com") is None
+
+
+@pytest.mark.asyncio
+async def test_async_client_downloads_the_list_once(backend, make_async_client, mocker):
+    mocker.patch("smartconnect.utils.guess_ca_timezone", return_value=pytz.timezone("Africa/Nairobi"))
+    smart_client = make_async_client(cache_ca_list=True)
+    mocker.patch.object(smart_client, "get_conservation_areas", return_value=CONSERVATION_AREAS)
+
+    for ca_uuid in CA_UUIDS:
+        assert (await smart_client.get_conservation_area(ca_uuid=str(ca_uuid))).uuid == ca_uuid
+    assert await smart_client.guess_ca_timezone(str(CA_UUIDS[2])) == pytz.timezone("Africa/Nairobi")
+
+    smart_client.get_conservation_areas.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_async_callers_share_one_list_download(backend, make_async_client, mocker):
+    smart_client = make_async_client(cache_ca_list=True, revision_aware_cache=True)
+
+    async def slow_download():
+        await asyncio.sleep(0.01)
+        return CONSERVATION_AREAS
+
+    mocker.patch.object(smart_client, "get_conservation_areas", side_effect=slow_download)
+
+    await asyncio.gather(smart_client.get_data_model(ca_uuid=str(CA_UUIDS[0])),
+                         *[smart_client.get_conservation_area(ca_uuid=str(ca_uuid)) for ca_uuid in CA_UUIDS])
+
+    smart_client.get_conservation_areas.assert_awaited_once()
@@ -0,0 +1,201 @@
+import json
+import os
+import threading
+
+import pytest
+
+from smartconnect import SmartClient, AsyncSmartClient, DataModel, cache, serialization
+from smartconnect.cache_backends import CacheBackend, MemoryCache, FileCache, AsyncCacheBackend
+
+CA_UUID = "123e4567-e89b-12d3-a456-426614174000"
+
+
+@pytest.fixture(params=["memory", "file"])
+def backend(request, tmp_path):
+    return MemoryCache(maxsize=8) if request.param == "memory" else FileCache(directory=str(tmp_path))
+
+
+def test_values_are_returned_as_bytes(backend):
+    backend.set("text", "JSESSIONID")
+    backend.set("number", 3)
+    backend.set("binary", b"\x01\xff")
+
+    assert backend.get("text") == b"JSESSIONID"
+    assert backend.get("number") == b"3"
+    assert backend.get("binary") == b"\x01\xff"
+    assert backend.get("missing") is None
+    assert backend.mget(["text", "missing", "number"]) == [b"JSESSIONID", None, b"3"]
+
+
+def test_keys_expire(backend, clock):
+    backend.set("session", "abc", ex=10)
+
+    clock.return_value += 9
+    assert backend.get("session") == b"abc"
+    clock.return_value += 1
+    assert backend.get("session") is None
+
+
+def test_set_nx_only_sets_missing_keys(backend, clock):
+    assert backend.set("lock", "first", ex=10, nx=True)
+    assert not backend.set("lock", "second", ex=10, nx=True)
+    assert backend.get("lock") == b"first"
+
+    clock.return_value += 10
+    assert backend.set("lock", "third", ex=10, nx=True)
+    assert backend.get("lock") == b"third"
+
+
+def test_delete(backend):
+    backend.set("a", "1")
+
+    assert backend.delete("a", "b") == 1
+    assert backend.get("a") is None
+
+
+def test_locks_exclude_each_other_and_expire(backend, clock):
+    first = backend.lock("fill", timeout=30, blocking=False)
+    second = backend.lock("fill", timeout=30, blocking=False)
+
+    assert first.acquire()
+    assert not second.acquire()
+    assert second.locked()
+
+    clock.return_value += 30
+    assert second.acquire()
+    with pytest.raises(RuntimeError):
+        first.release()
+    second.release()
+    assert not second.locked()
+
+
+def test_delete_if_equal(backend):
+    backend.set("fill", "token")
+
+    assert not backend.delete_if_equal("fill", "other")
+    assert backend.get("fill") == b"token"
+    assert backend.delete_if_equal("fill", "token")
+    assert backend.get("fill") is None
+    assert not backend.delete_if_equal("fill", "token")
+
+
+def test_file_lock_is_not_taken_over_while_its_owner_releases_it(tmp_path, clock):
+    backend = FileCache(directory=str(tmp_path))
+    first = backend.lock("fill", timeout=30, blocking=False)
+    second = backend.lock("fill", timeout=30, blocking=False)
+    assert first.acquire()
+    clock.return_value += 30
+
+    acquired = threading.Event()
+    # The expired owner is between checking its token and deleting the lock.
+    with backend._guard(backend._path("fill")):
+        thread = threading.Thread(target=lambda: second.acquire() and acquired.set())
+        thread.start()
+        assert not acquired.wait(0.05)
+    thread.join(5)
+
+    assert acquired.is_set()
+    with pytest.raises(RuntimeError):
+        first.release()
+    assert second.locked()
+
+
+def test_file_cache_reads_leave_expired_files_to_set(tmp_path, clock):
+    backend = FileCache(directory=str(tmp_path))
+    backend.set("fill", "first", ex=30)
+    clock.return_value += 30
+
+    # A reader removing the expired file could remove a value set in its place meanwhile.
+    assert backend.get("fill") is None
+    assert os.path.exists(backend._path("fill"))
+    assert backend.set("fill", "second", ex=30, nx=True)
+    assert backend.get("fill") == b"second"
+
+
+def test_incomplete_backends_cannot_be_created():
+    class GetOnlyCache(CacheBackend):
+        def get(self, name):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnlyCache()
+
+
+def test_memory_cache_evicts_least_recently_used():
+    backend = MemoryCache(maxsize=2)
+    backend.set("a", "1")
+    backend.set("b", "2")
+    backend.get("a")
+    backend.set("c", "3")
+
+    assert backend.mget("a", "b", "c") == [b"1", None, b"3"]
+
+
+def test_file_cache_is_shared_through_its_directory(tmp_path):
+    FileCache(directory=str(tmp_path)).set("key", "value")
+
+    assert FileCache(directory=str(tmp_path)).get("key") == b"value"
+
+
+@pytest.mark.asyncio
+async def test_async_backend(backend):
+    async_backend = AsyncCacheBackend(backend)
+
+    await async_backend.set("key", "value")
+    assert await async_backend.get("key") == b"value"
+    assert await async_backend.mget(["key", "missing"]) == [b"value", None]
+
+    lock = async_backend.lock("key:fill", timeout=30, blocking=False)
+    assert await lock.acquire()
+    assert await lock.locked()
+    await lock.release()
+    assert await async_backend.delete("key") == 1
+
+
+def test_backend_is_selected_by_name(tmp_path, mocker):
+    mocker.patch("smartconnect.smart_settings.SMART_CACHE_DIR", str(tmp_path))
+
+    assert isinstance(cache.create_backend("memory"), MemoryCache)
+    assert cache.create_backend("file").directory == str(tmp_path)
+    with pytest.raises(ValueError):
+        cache.create_backend("memcached")
+
+
+def test_integration_state_goes_through_the_backend(mocker):
+    mocker.patch("smartconnect.cache.cache", MemoryCache())
+
+    cache.save_poll_time(json.dumps({"last_run": "2023-11-26T10:00:00"}), "integration-1")
+
+    assert cache.get_state("integration-1") == {"last_run": "2023-11-26T10:00:00"}
+    assert cache.get_state("integration-2") == {}
+
+
+def datamodel():
+    datamodel = DataModel()
+    datamodel.import_from_dict({"categories": [{"path": "animals"}], "attributes": []})
+    return datamodel
+
+
+def test_client_caches_data_models_without_redis(mocker):
+    backend = mocker.patch("smartconnect.cache.cache", MemoryCache())
+    smart_client = SmartClient(api="https://test.example.com", username="testuser", password="testpass")
+    mocker.patch.object(smart_client, "download_datamodel", side_effect=lambda **kwargs: datamodel())
+
+    smart_client.get_data_model(ca_uuid=CA_UUID)
+    assert smart_client.get_data_model(ca_uuid=CA_UUID).get_category(path="animals")
+
+    smart_client.download_datamodel.assert_called_once()
+    assert serialization.loads(backend.get(f"cache:smart-ca:{CA_UUID}:datamodel"))["categories"]
+
+
+@pytest.mark.asyncio
+async def test_async_client_caches_data_models_without_redis(mocker, tmp_path):
+    mocker.patch("smartconnect.cache.cache", FileCache(directory=str(tmp_path)))
+    mocker.patch.object(AsyncSmartClient, "ensure_login")
+    smart_client = AsyncSmartClient(api="https://test.example.com", username="testuser", password="testpass")
+    mocker.patch.object(smart_client, "download_datamodel", side_effect=lambda **kwargs: datamodel())
+
+    await smart_client.get_data_model(ca_uuid=CA_UUID)
+    assert (await smart_client.get_data_model(ca_uuid=CA_UUID)).get_category(path="animals")
+
+    smart_client.download_datamodel.assert_called_once()
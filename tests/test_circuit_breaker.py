@@ -0,0 +1,114 @@
+import httpx
+import pytest
+import respx
+
+from smartconnect import SmartClient, AsyncSmartClient, SMARTClientServerUnreachableError, circuit_breaker
+from smartconnect.circuit_breaker import CircuitBreaker, CircuitState
+from smartconnect.exceptions import SMARTClientCircuitOpenError
+
+API = "https://fancyplace.smartconservationtools.org/server"
+
+
+@pytest.fixture(autouse=True)
+def breakers(mocker):
+    return mocker.patch.object(circuit_breaker, "_breakers", {})
+
+
+@pytest.fixture
+def events():
+    events = []
+
+    def listener(breaker, old_state, new_state):
+        events.append((breaker.name, old_state, new_state))
+
+    circuit_breaker.add_listener(listener)
+    yield events
+    circuit_breaker.remove_listener(listener)
+
+
+def fail(breaker, times):
+    for _ in range(times):
+        breaker.after_request(failed=True, probe=breaker.before_request())
+
+
+def test_opens_after_consecutive_failures(monotonic_clock, events):
+    breaker = CircuitBreaker("test", failure_threshold=3, recovery_timeout=10)
+
+    fail(breaker, 2)
+    breaker.after_request(failed=False, probe=breaker.before_request())
+    fail(breaker, 2)
+    assert breaker.state == CircuitState.CLOSED
+
+    fail(breaker, 1)
+    assert breaker.state == CircuitState.OPEN
+    with pytest.raises(SMARTClientCircuitOpenError):
+        breaker.before_request()
+    assert events == [("test", CircuitState.CLOSED, CircuitState.OPEN)]
+
+
+def test_half_open_probe_closes_circuit(monotonic_clock, events):
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=10, half_open_max_calls=1)
+    fail(breaker, 1)
+
+    monotonic_clock.return_value += 10
+    assert breaker.state == CircuitState.HALF_OPEN
+    probe = breaker.before_request()
+    assert probe
+
+    # Only one probe at a time.
+    with pytest.raises(SMARTClientCircuitOpenError):
+        breaker.before_request()
+
+    breaker.after_request(failed=False, probe=probe)
+    assert breaker.state == CircuitState.CLOSED
+    assert [new_state for _, _, new_state in events] == [CircuitState.OPEN, CircuitState.HALF_OPEN, CircuitState.CLOSED]
+
+
+def test_failed_probe_reopens_circuit(monotonic_clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=10)
+    fail(breaker, 1)
+
+    monotonic_clock.return_value += 10
+    fail(breaker, 1)
+    assert breaker.state == CircuitState.OPEN
+
+    monotonic_clock.return_value += 9
+    assert breaker.state == CircuitState.OPEN
+
+
+def test_client_fails_fast_while_circuit_is_open(respx_mock, monotonic_clock, mocker):
+    mocker.patch.object(circuit_breaker.smart_settings, "SMART_CIRCUIT_FAILURE_THRESHOLD", 2)
+    landing_page = respx_mock.get(f"{API}/connect/home").mock(side_effect=httpx.ConnectTimeout("Timed out"))
+
+    first, second = [
+        SmartClient(api=API, username="Earthranger", password="afancypassword", use_circuit_breaker=True)
+        for _ in range(2)
+    ]
+    for _ in range(2):
+        with pytest.raises(httpx.ConnectTimeout):
+            first.ensure_login()
+
+    # The breaker is shared by every client of the host.
+    with pytest.raises(SMARTClientServerUnreachableError):
+        second.ensure_login()
+    assert landing_page.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_async_client_counts_server_errors(monotonic_clock, mocker):
+    mocker.patch.object(circuit_breaker.smart_settings, "SMART_CIRCUIT_FAILURE_THRESHOLD", 3)
+    async with respx.mock:
+        respx.get(f"{API}/connect/home").respond(status_code=200)
+        respx.post(f"{API}/j_security_check").respond(
+            status_code=302, headers={"set-cookie": "JSESSIONID=abc123; Path=/"})
+        info = respx.get(f"{API}/api/info").respond(status_code=503)
+
+        smart_client = AsyncSmartClient(api=API, username="Earthranger", password="afancypassword",
+                                        use_circuit_breaker=True)
+        for _ in range(3):
+            await smart_client.get_server_api_info()
+
+        with pytest.raises(SMARTClientCircuitOpenError):
+            await smart_client.get_server_api_info()
+        assert info.call_count == 3
+        assert circuit_breaker.get_breaker(API).state == CircuitState.OPEN
@@ -0,0 +1,90 @@
+import gzip
+import json
+import zlib
+
+import httpx
+import pytest
+import respx
+
+from smartconnect import SmartClient, AsyncSmartClient
+from smartconnect.compression import RequestCompressor
+
+API = "https://fancyplace.smartconservationtools.org/server"
+CA_UUID = "123ac748-6e05-4299-892f-335d21fd4ce6"
+
+LARGE_PAYLOAD = json.dumps({
+    "type": "Feature",
+    "properties": {"smartAttributes": {"attachments": [{"filename": "photo.jpg", "data": "QUJD" * 10000}]}},
+})
+
+
+def make_client(**kwargs):
+    return SmartClient(api=API, username="Earthranger", password="afancypassword", compress_requests=True, **kwargs)
+
+
+def test_large_posts_are_gzipped(respx_mock, login):
+    data = respx_mock.post(f"{API}/api/data/{CA_UUID}").mock(return_value=httpx.Response(200, json={}))
+
+    make_client().post_smart_request(json=LARGE_PAYLOAD, ca_uuid=CA_UUID)
+
+    request = data.calls[0].request
+    assert request.headers["content-encoding"] == "gzip"
+    assert int(request.headers["content-length"]) == len(request.content) < len(LARGE_PAYLOAD) / 10
+    assert gzip.decompress(request.content).decode() == LARGE_PAYLOAD
+
+
+def test_small_posts_are_sent_as_is(respx_mock, login):
+    data = respx_mock.post(f"{API}/api/data/{CA_UUID}").mock(return_value=httpx.Response(200, json={}))
+
+    make_client().post_smart_request(json="{}", ca_uuid=CA_UUID)
+
+    assert "content-encoding" not in data.calls[0].request.headers
+    assert data.calls[0].request.content == b"{}"
+
+
+def test_falls_back_when_server_rejects_compression(respx_mock, login):
+    def server(request):
+        return httpx.Response(415 if "content-encoding" in request.headers else 200, json={})
+
+    data = respx_mock.post(f"{API}/api/data/{CA_UUID}").mock(side_effect=server)
+    smart_client = make_client()
+
+    smart_client.post_smart_request(json=LARGE_PAYLOAD, ca_uuid=CA_UUID)
+    smart_client.post_smart_request(json=LARGE_PAYLOAD, ca_uuid=CA_UUID)
+
+    assert [call.request.headers.get("content-encoding") for call in data.calls] == ["gzip", None, None]
+
+
+def test_keeps_compressing_when_uncompressed_request_fails_too(respx_mock, login):
+    data = respx_mock.post(f"{API}/api/data/{CA_UUID}").mock(return_value=httpx.Response(400, json={}))
+    smart_client = make_client()
+
+    for _ in range(2):
+        with pytest.raises(Exception):
+            smart_client.post_smart_request(json=LARGE_PAYLOAD, ca_uuid=CA_UUID)
+
+    assert [call.request.headers.get("content-encoding") for call in data.calls] == ["gzip", None, "gzip", None]
+    assert smart_client._session._transport.compressor.enabled
+
+
+def test_rejects_unknown_encoding():
+    with pytest.raises(ValueError):
+        RequestCompressor(encoding="br")
+
+
+@pytest.mark.asyncio
+async def test_async_client_deflates_large_posts(mocker):
+    mocker.patch("smartconnect.compression.smart_settings.SMART_COMPRESS_ENCODING", "deflate")
+    async with respx.mock:
+        respx.get(f"{API}/connect/home").respond(status_code=200)
+        respx.post(f"{API}/j_security_check").respond(
+            status_code=302, headers={"set-cookie": "JSESSIONID=abc123; Path=/"})
+        data = respx.post(f"{API}/api/data/{CA_UUID}").respond(status_code=200, json={})
+
+        smart_client = AsyncSmartClient(api=API, username="Earthranger", password="afancypassword",
+                                        compress_requests=True)
+        await smart_client.post_smart_request(json=json.loads(LARGE_PAYLOAD), ca_uuid=CA_UUID)
+
+        request = data.calls[0].request
+        assert request.headers["content-encoding"] == "deflate"
+        assert json.loads(zlib.decompress(request.content)) == json.loads(LARGE_PAYLOAD)
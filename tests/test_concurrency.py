@@ -0,0 +1,142 @@
+import asyncio
+
+import httpx
+import pytest
+import respx
+
+from smartconnect import AsyncSmartClient
+from smartconnect.concurrency import AdaptiveConcurrencyLimiter, _limited_endpoint
+
+
+async def run_windows(limiter, clock, latency, windows):
+    '''
+    Fill the limiter's window `windows` times with requests taking `latency` seconds on the mocked clock. Real
+    latencies would be microseconds, and any scheduling hiccup would count as a spike.
+    '''
+    for _ in range(windows):
+        started = [await limiter.acquire() for _ in range(limiter.limit)]
+        clock.return_value += latency
+        for start in started:
+            await limiter.release(start, endpoint='/api/data/{id}')
+
+
+@pytest.mark.asyncio
+async def test_limit_grows_while_window_is_in_use(monotonic_clock):
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=4)
+
+    await run_windows(limiter, monotonic_clock, 0.01, windows=20)
+
+    assert limiter.limit == 4
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_limit_does_not_grow_while_idle(monotonic_clock):
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4)
+
+    for _ in range(20):
+        await limiter.release(await limiter.acquire(), endpoint='/api/data/')
+
+    assert limiter.limit == 4
+
+
+@pytest.mark.asyncio
+async def test_limit_halves_once_per_burst_of_failures():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=16, min_limit=2)
+
+    started = [await limiter.acquire() for _ in range(8)]
+    for start in started:
+        await limiter.release(start, endpoint='/api/data/', failed=True)
+    assert limiter.limit == 8
+
+    for _ in range(5):
+        await limiter.release(await limiter.acquire(), endpoint='/api/data/', failed=True)
+    assert limiter.limit == 2
+
+
+@pytest.mark.asyncio
+async def test_latency_spike_reduces_limit(monotonic_clock):
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8)
+
+    for latency in (0.1, 0.1, 1.0):
+        started = await limiter.acquire()
+        monotonic_clock.return_value += latency
+        await limiter.release(started, endpoint='/api/data/')
+
+    assert limiter.limit == 4
+
+
+@pytest.mark.asyncio
+async def test_limit_recovers_after_lasting_latency_shift(monotonic_clock):
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8, max_limit=8)
+    await run_windows(limiter, monotonic_clock, 0.05, windows=10)
+    assert limiter.limit == 8
+
+    await run_windows(limiter, monotonic_clock, 0.2, windows=5)
+    assert limiter.limit < 8
+
+    await run_windows(limiter, monotonic_clock, 0.2, windows=100)
+    assert limiter.limit == 8
+
+
+@pytest.mark.asyncio
+async def test_endpoints_have_their_own_latency_baseline(monotonic_clock):
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8)
+
+    for endpoint, latency in [('/api/metadata/patrol/{id}', 0.05), ('/api/metadata/datamodel/{id}', 2.0)] * 3:
+        started = await limiter.acquire()
+        monotonic_clock.return_value += latency
+        await limiter.release(started, endpoint=endpoint)
+
+    assert limiter.limit == 8
+
+
+@pytest.mark.parametrize('method,url,endpoint', [
+    ('GET', 'https://example.org/server/api/metadata/datamodel/123ac748-6e05-4299-892f-335d21fd4ce6',
+     '/api/metadata/datamodel/{id}'),
+    ('GET', 'https://example.org/server/api/metadata/patrol/123ac748-6e05-4299-892f-335d21fd4ce6',
+     '/api/metadata/patrol/{id}'),
+    ('GET', 'https://example.org/server/api/metadata/configurablemodel', '/api/metadata/configurablemodel'),
+    ('POST', 'https://example.org/server/api/data/123ac748-6e05-4299-892f-335d21fd4ce6', '/api/data/{id}'),
+    ('GET', 'https://example.org/server/api/data/123ac748-6e05-4299-892f-335d21fd4ce6', None),
+    ('GET', 'https://example.org/server/api/conservationarea', None),
+])
+def test_limited_endpoint(method, url, endpoint):
+    assert _limited_endpoint(httpx.Request(method, url)) == endpoint
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_client_limits_concurrent_posts(client_settings, smart_ca_uuid):
+    respx.get(f"{client_settings['api']}/connect/home").respond(status_code=200)
+    respx.post(f"{client_settings['api']}/j_security_check").respond(
+        status_code=302, headers={"set-cookie": "JSESSIONID=abc123; Path=/"})
+
+    in_flight = max_in_flight = 0
+
+    async def slow_server(request):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(in_flight, max_in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(503 if max_in_flight > 2 else 200, json={})
+
+    respx.post(f"{client_settings['api']}/api/data/{smart_ca_uuid}").mock(side_effect=slow_server)
+
+    smart_client = AsyncSmartClient(**client_settings, adaptive_concurrency=True, initial_concurrency=3)
+    assert smart_client.concurrency_limit == 3
+
+    results = await asyncio.gather(
+        *[smart_client.post_smart_request(json={}, ca_uuid=smart_ca_uuid) for _ in range(12)],
+        return_exceptions=True
+    )
+
+    assert max_in_flight == 3
+    assert any(isinstance(result, Exception) for result in results)
+    assert smart_client.concurrency_limit < 3
+    assert smart_client._limiter.in_flight == 0
+
+
+def test_adaptive_concurrency_is_disabled_by_default(client_settings):
+    assert AsyncSmartClient(**client_settings).concurrency_limit is None
@@ -0,0 +1,96 @@
+import gc
+
+import httpx
+import pytest
+import respx
+
+from smartconnect import SmartClient, AsyncSmartClient, connection_pool
+from smartconnect.connection_pool import ConnectionPoolRegistry
+
+
+@pytest.fixture
+def registry(mocker):
+    registry = ConnectionPoolRegistry(max_pools=2, max_connections=7, max_keepalive_connections=3, keepalive_expiry=1.5)
+    mocker.patch.object(connection_pool, "registry", registry)
+    return registry
+
+
+def make_client(api="https://fancyplace.smartconservationtools.org/server"):
+    return SmartClient(api=api, username="Earthranger", password="afancypassword", use_shared_pool=True)
+
+
+def test_clients_for_the_same_host_share_a_pool(respx_mock, registry):
+    respx_mock.get(url__regex=r".*/api/info").mock(return_value=respx.MockResponse(200, json={}))
+    respx_mock.get(url__regex=r".*/connect/home").mock(return_value=respx.MockResponse(200))
+    respx_mock.post(url__regex=r".*/j_security_check").mock(
+        return_value=respx.MockResponse(302, headers={"set-cookie": "JSESSIONID=abc123; Path=/"}))
+
+    first, second = make_client(), make_client()
+    other = make_client(api="https://otherplace.smartconservationtools.org/server")
+    for client in (first, second, other):
+        client.get_server_api_info()
+
+    assert len(registry) == 2
+    shared = registry._get_transport(first._session._transport._key)
+    assert shared is registry._get_transport(second._session._transport._key)
+    assert shared._pool._max_connections == 7
+    assert shared._pool._max_keepalive_connections == 3
+    assert shared._pool._keepalive_expiry == 1.5
+
+    # Closing one client leaves the pool open for the other.
+    first._session.close()
+    assert second.get_server_api_info() is not None
+
+
+def test_idle_pools_are_evicted_least_recently_used_first(registry, mocker):
+    first, second, third = [registry.transport(f"https://host{i}.smartconservationtools.org/server") for i in range(3)]
+    first_pool = registry._get_transport(first._key)
+    second_pool = registry._get_transport(second._key)
+    close = mocker.spy(first_pool, "close")
+
+    # Given the first host's pool is no longer used by any client.
+    first_key = first._key
+    del first
+    gc.collect()
+
+    # When a third host needs a pool, the idle one is closed and evicted.
+    registry._get_transport(third._key)
+
+    assert len(registry) == 2
+    assert (first_key, None) not in registry._transports
+    assert registry._get_transport(second._key) is second_pool
+    close.assert_called_once()
+
+
+def test_pools_in_use_are_not_evicted(registry):
+    leases = [registry.transport(f"https://host{i}.smartconservationtools.org/server") for i in range(3)]
+    for lease in leases:
+        registry._get_transport(lease._key)
+
+    assert len(registry) == 3
+
+
+@pytest.mark.asyncio
+async def test_async_clients_share_a_pool_per_event_loop(registry):
+    async with respx.mock:
+        respx.get(url__regex=r".*/api/info").respond(status_code=200, json={})
+        respx.get(url__regex=r".*/connect/home").respond(status_code=200)
+        respx.post(url__regex=r".*/j_security_check").respond(
+            status_code=302, headers={"set-cookie": "JSESSIONID=abc123; Path=/"})
+
+        clients = [
+            AsyncSmartClient(api="https://fancyplace.smartconservationtools.org/server", username="Earthranger",
+                             password="afancypassword", use_shared_pool=True)
+            for _ in range(3)
+        ]
+        for client in clients:
+            await client.get_server_api_info()
+
+        assert len(registry) == 1
+        (key, loop), transport = next(iter(registry._transports.items()))
+        assert isinstance(transport, httpx.AsyncHTTPTransport)
+        assert key[0] == "async"
+
+        for client in clients:
+            await client.close()
+        assert not registry._leases[key]
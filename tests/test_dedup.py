@@ -0,0 +1,104 @@
+import asyncio
+
+import httpx
+import pytest
+
+from smartconnect import AsyncSmartClient
+
+CAS = [{
+    "label": "Test CA",
+    "status": "ACTIVE",
+    "version": "a39e2c62-8d3c-4cba-9b8e-0e48ec1a4d04",
+    "revision": 1,
+    "description": None,
+    "designation": None,
+    "organization": None,
+    "pointOfContact": None,
+    "location": None,
+    "owner": None,
+    "caBoundaryJson": None,
+    "administrativeAreasJson": None,
+    "uuid": "123ac748-6e05-4299-892f-335d21fd4ce6",
+}]
+
+
+def slow(response):
+    async def server(request):
+        await asyncio.sleep(0.01)
+        return response
+    return server
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_gets_share_one_call(respx_mock, client_settings, login):
+    route = respx_mock.get(f"{client_settings['api']}/api/conservationarea").mock(
+        side_effect=slow(httpx.Response(200, json=CAS)))
+    smart_client = AsyncSmartClient(**client_settings, deduplicate_requests=True)
+
+    results = await asyncio.gather(*[smart_client.get_conservation_areas() for _ in range(10)])
+
+    assert route.call_count == 1
+    assert smart_client._session._transport.coalesced == 9
+    assert all(result == results[0] for result in results)
+    assert results[0][0].label == "Test CA"
+
+
+@pytest.mark.asyncio
+async def test_sequential_gets_are_not_coalesced(respx_mock, client_settings, login):
+    route = respx_mock.get(f"{client_settings['api']}/api/conservationarea").respond(status_code=200, json=CAS)
+    smart_client = AsyncSmartClient(**client_settings, deduplicate_requests=True)
+
+    await smart_client.get_conservation_areas()
+    await smart_client.get_conservation_areas()
+
+    assert route.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_different_params_and_accept_headers_are_not_coalesced(respx_mock, client_settings, login):
+    url = f"{client_settings['api']}/api/metadata/configurablemodel"
+    route = respx_mock.get(url).mock(side_effect=slow(httpx.Response(200, json=[])))
+    smart_client = AsyncSmartClient(**client_settings, deduplicate_requests=True)
+    await smart_client.ensure_login()
+
+    await asyncio.gather(
+        smart_client._session.get(url, params={"ca_uuid": "a"}, headers={"accept": "application/json"}),
+        smart_client._session.get(url, params={"ca_uuid": "b"}, headers={"accept": "application/json"}),
+        smart_client._session.get(url, params={"ca_uuid": "a"}, headers={"accept": "application/xml"}),
+        smart_client._session.get(url, params={"ca_uuid": "a"}, headers={"accept": "application/json"}),
+    )
+
+    assert route.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_waiter(respx_mock, client_settings, login):
+    async def unreachable(request):
+        await asyncio.sleep(0.01)
+        raise httpx.ConnectError("Connection refused")
+
+    route = respx_mock.get(f"{client_settings['api']}/api/conservationarea").mock(side_effect=unreachable)
+    smart_client = AsyncSmartClient(**client_settings, deduplicate_requests=True)
+
+    results = await asyncio.gather(*[smart_client.get_conservation_areas() for _ in range(3)],
+                                   return_exceptions=True)
+
+    assert route.call_count == 1
+    assert all(isinstance(result, httpx.ConnectError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_waiters(respx_mock, client_settings, login):
+    route = respx_mock.get(f"{client_settings['api']}/api/conservationarea").mock(
+        side_effect=slow(httpx.Response(200, json=CAS)))
+    smart_client = AsyncSmartClient(**client_settings, deduplicate_requests=True)
+    await smart_client.ensure_login()
+
+    first = asyncio.ensure_future(smart_client.get_conservation_areas())
+    second = asyncio.ensure_future(smart_client.get_conservation_areas())
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert len(await second) == 1
+    assert first.cancelled()
+    assert route.call_count == 1
@@ -0,0 +1,112 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from smartconnect import SmartClient
+from smartconnect.exceptions import SMARTClientException, SMARTClientUnauthorizedError
+
+API = "https://fancyplace.smartconservationtools.org/server"
+CA_UUID = "123ac748-6e05-4299-892f-335d21fd4ce6"
+
+
+@pytest.fixture
+def smart_client():
+    return SmartClient(api=API, username="Earthranger", password="afancypassword")
+
+
+@pytest.fixture
+def slow_login(respx_mock):
+    def delayed_login(request):
+        time.sleep(0.05)
+        return httpx.Response(302, headers={"set-cookie": "JSESSIONID=abc123; Path=/"})
+
+    landing_page = respx_mock.get(f"{API}/connect/home").mock(return_value=httpx.Response(200))
+    login = respx_mock.post(f"{API}/j_security_check").mock(side_effect=delayed_login)
+    return landing_page, login
+
+
+def test_threads_share_one_login(smart_client, slow_login):
+    landing_page, login = slow_login
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        sessions = list(executor.map(lambda _: smart_client.ensure_login(), range(10)))
+
+    assert all(session is smart_client._session for session in sessions)
+    assert landing_page.call_count == 1
+    assert login.call_count == 1
+
+
+def test_threads_waiting_on_a_failed_login_do_not_get_its_cookie(smart_client, respx_mock):
+    def rejected_login(request):
+        time.sleep(0.05)
+        return httpx.Response(401)
+
+    respx_mock.get(f"{API}/connect/home").mock(
+        return_value=httpx.Response(200, headers={"set-cookie": "JSESSIONID=unauthenticated; Path=/"}))
+    respx_mock.post(f"{API}/j_security_check").mock(side_effect=rejected_login)
+
+    def ensure_login(_):
+        try:
+            return smart_client.ensure_login()
+        except SMARTClientUnauthorizedError as ex:
+            return ex
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        results = list(executor.map(ensure_login, range(5)))
+
+    assert all(isinstance(result, SMARTClientUnauthorizedError) for result in results)
+    with pytest.raises(SMARTClientUnauthorizedError):
+        smart_client.ensure_login()
+
+
+def test_map_post_returns_results_in_order_with_errors(smart_client, slow_login, respx_mock):
+    threads = set()
+
+    def server(request):
+        threads.add(threading.current_thread().name)
+        time.sleep(0.01)
+        return httpx.Response(500 if b"bad" in request.content else 200, json={})
+
+    data = respx_mock.post(f"{API}/api/data/{CA_UUID}").mock(side_effect=server)
+    requests = ['{"n": 0}', '{"n": "bad"}', '{"n": 2}', '{"n": 3}', '{"n": "bad"}']
+
+    results = smart_client.map_post(requests, ca_uuid=CA_UUID, max_workers=3)
+
+    assert [isinstance(result, SMARTClientException) for result in results] == [False, True, False, False, True]
+    assert results[0] is None
+    assert data.call_count == 5
+    assert 1 < len(threads) <= 3
+    assert slow_login[1].call_count == 1
+
+
+def test_map_get_incident_keeps_order(smart_client, slow_login, respx_mock):
+    def server(request):
+        incident_uuid = request.url.params["client_incident_uuid"]
+        return httpx.Response(200, json=[{
+            "type": "Feature",
+            "geometry": {"coordinates": [123.45, -67.89], "type": "Point"},
+            "properties": {"fid": incident_uuid},
+        }])
+
+    respx_mock.get(f"{API}/api/query/custom/waypoint/incident").mock(side_effect=server)
+    incident_uuids = [f"incident-{i}" for i in range(20)]
+
+    results = smart_client.map_get_incident(incident_uuids)
+
+    assert [result[0].properties.fid for result in results] == incident_uuids
+
+
+def test_map_raises_when_login_fails(smart_client, respx_mock):
+    respx_mock.get(f"{API}/connect/home").mock(return_value=httpx.Response(200))
+    login = respx_mock.post(f"{API}/j_security_check").mock(return_value=httpx.Response(401))
+
+    with pytest.raises(SMARTClientUnauthorizedError):
+        smart_client.map_post(['{}', '{}', '{}'], ca_uuid=CA_UUID)
+    assert login.call_count == 1
+
+
+def test_map_with_nothing_to_do(smart_client):
+    assert smart_client.map_post([], ca_uuid=CA_UUID) == []
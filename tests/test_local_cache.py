@@ -0,0 +1,117 @@
+import json
+
+import pytest
+
+from smartconnect import DataModel, cache
+from smartconnect.cache import LocalCache
+
+CA_UUID = "123e4567-e89b-12d3-a456-426614174000"
+CACHE_KEY = f"cache:smart-ca:{CA_UUID}:datamodel"
+CACHED_DATAMODEL = json.dumps({
+    "datamodel": {"categories": []},
+    "_categories": {},
+    "_attributes": {}
+})
+
+
+def test_least_recently_used_entry_is_evicted(monotonic_clock):
+    local_cache = LocalCache(maxsize=2, ttl=60)
+    local_cache.set("a", 1)
+    local_cache.set("b", 2)
+    local_cache.get("a")
+
+    local_cache.set("c", 3)
+
+    assert local_cache.get("b") is None
+    assert local_cache.get("a") == 1
+    assert local_cache.get("c") == 3
+    assert local_cache.evictions == 1
+
+
+def test_entries_expire(monotonic_clock):
+    local_cache = LocalCache(maxsize=2, ttl=60)
+    local_cache.set("a", 1)
+
+    monotonic_clock.return_value += 59
+    assert local_cache.get("a") == 1
+    monotonic_clock.return_value += 1
+    assert local_cache.get("a") is None
+    assert len(local_cache) == 0
+
+
+def test_invalidate_drops_every_variant(monotonic_clock):
+    local_cache = LocalCache(maxsize=10, ttl=60)
+    local_cache.set(CACHE_KEY, "english", "en")
+    local_cache.set(CACHE_KEY, "french", "fr")
+    local_cache.set("other", "other", "en")
+
+    local_cache.invalidate(CACHE_KEY)
+
+    assert local_cache.get(CACHE_KEY, "en") is None
+    assert local_cache.get(CACHE_KEY, "fr") is None
+    assert local_cache.get("other", "en") == "other"
+
+
+def test_stats(monotonic_clock):
+    local_cache = LocalCache(maxsize=10, ttl=60)
+    local_cache.set("a", 1)
+    for key in ("a", "a", "a", "b"):
+        local_cache.get(key)
+
+    assert local_cache.stats() == dict(size=1, hits=3, misses=1, evictions=0, hit_rate=0.75)
+
+
+def test_client_serves_built_model_from_local_cache(redis_cache, make_client):
+    redis_cache.get.return_value = CACHED_DATAMODEL
+    smart_client = make_client(use_local_cache=True)
+
+    first = smart_client.get_data_model(ca_uuid=CA_UUID)
+    second = smart_client.get_data_model(ca_uuid=CA_UUID)
+
+    assert isinstance(first, DataModel)
+    assert second is first
+    redis_cache.get.assert_called_once_with(CACHE_KEY)
+    assert cache.local_cache.stats()["hits"] == 1
+
+
+def test_local_cache_is_per_language(redis_cache, make_client):
+    redis_cache.get.return_value = CACHED_DATAMODEL
+    english = make_client(use_local_cache=True)
+    french = make_client(use_language_code="fr", use_local_cache=True)
+
+    assert english.get_data_model(ca_uuid=CA_UUID) is not french.get_data_model(ca_uuid=CA_UUID)
+    assert redis_cache.get.call_count == 2
+
+
+def test_invalidate_goes_back_to_redis(redis_cache, make_client):
+    redis_cache.get.return_value = CACHED_DATAMODEL
+    smart_client = make_client(use_local_cache=True)
+    smart_client.get_data_model(ca_uuid=CA_UUID)
+
+    cache.invalidate(CACHE_KEY)
+    smart_client.get_data_model(ca_uuid=CA_UUID)
+
+    redis_cache.delete.assert_called_once_with(CACHE_KEY)
+    assert redis_cache.get.call_count == 2
+
+
+def test_local_cache_is_off_by_default(redis_cache, make_client):
+    redis_cache.get.return_value = CACHED_DATAMODEL
+    smart_client = make_client()
+    smart_client.get_data_model(ca_uuid=CA_UUID)
+    smart_client.get_data_model(ca_uuid=CA_UUID)
+
+    assert redis_cache.get.call_count == 2
+    assert len(cache.local_cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_async_client_serves_built_model_from_local_cache(async_redis_cache, make_async_client):
+    async_redis_cache.get.return_value = CACHED_DATAMODEL
+    smart_client = make_async_client(use_local_cache=True)
+
+    first = await smart_client.get_data_model(ca_uuid=CA_UUID)
+    second = await smart_client.get_data_model(ca_uuid=CA_UUID)
+
+    assert second is first
+    async_redis_cache.get.assert_called_once_with(CACHE_KEY)
@@ -0,0 +1,86 @@
+import uuid
+
+import pytest
+import respx
+
+from smartconnect import SMARTClientNotFoundError
+from smartconnect.models import ConservationArea
+
+API = "https://test.example.com"
+CA_UUID = "123e4567-e89b-12d3-a456-426614174000"
+CM_UUID = "9c1a0e8a-3b8e-4d38-9c1e-5a0d4a3c7e11"
+
+
+@pytest.fixture
+def smart_client(make_client, mocker):
+    smart_client = make_client(negative_cache=True)
+    mocker.patch.object(smart_client, "get_conservation_areas", return_value=[])
+    return smart_client
+
+
+def test_unknown_ca_is_not_looked_up_again_until_ttl(smart_client, backend, clock):
+    for _ in range(3):
+        assert smart_client.get_conservation_area(ca_uuid=CA_UUID) is None
+    smart_client.get_conservation_areas.assert_called_once()
+
+    clock.return_value += 60
+    assert smart_client.get_conservation_area(ca_uuid=CA_UUID) is None
+    assert smart_client.get_conservation_areas.call_count == 2
+
+
+def test_force_looks_up_a_known_missing_ca(smart_client, backend):
+    smart_client.get_conservation_area(ca_uuid=CA_UUID)
+    added = ConservationArea(label="Added", status="DATA", revision=1, uuid=uuid.UUID(CA_UUID))
+    smart_client.get_conservation_areas.return_value = [added]
+
+    assert smart_client.get_conservation_area(ca_uuid=CA_UUID, force=True) == added
+    assert smart_client.get_conservation_area(ca_uuid=CA_UUID) == added
+
+
+@respx.mock
+def test_unknown_configurable_model_is_not_downloaded_again(smart_client, backend):
+    route = respx.get(f"{API}/api/metadata/configurablemodel/{CM_UUID}").respond(status_code=404)
+
+    for _ in range(3):
+        with pytest.raises(SMARTClientNotFoundError):
+            smart_client.get_configurable_data_model(cm_uuid=CM_UUID)
+
+    assert route.call_count == 1
+
+
+@respx.mock
+def test_server_errors_are_not_cached(smart_client, backend):
+    route = respx.get(f"{API}/api/metadata/configurablemodel/{CM_UUID}").respond(status_code=503)
+
+    for _ in range(2):
+        with pytest.raises(Exception) as exc_info:
+            smart_client.get_configurable_data_model(cm_uuid=CM_UUID)
+        assert not isinstance(exc_info.value, SMARTClientNotFoundError)
+
+    assert route.call_count == 2
+
+
+def test_negative_cache_is_disabled_by_default(backend, make_client, mocker):
+    smart_client = make_client()
+    mocker.patch.object(smart_client, "get_conservation_areas", return_value=[])
+
+    smart_client.get_conservation_area(ca_uuid=CA_UUID)
+    smart_client.get_conservation_area(ca_uuid=CA_UUID)
+
+    assert smart_client.get_conservation_areas.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_async_client_remembers_unknown_uuids(backend, make_async_client, mocker):
+    smart_client = make_async_client(negative_cache=True)
+    mocker.patch.object(smart_client, "get_conservation_areas", return_value=[])
+    mocker.patch.object(smart_client, "download_configurable_datamodel",
+                        side_effect=SMARTClientNotFoundError("Configurable data model not found"))
+
+    for _ in range(2):
+        assert await smart_client.get_conservation_area(ca_uuid=CA_UUID) is None
+        with pytest.raises(SMARTClientNotFoundError):
+            await smart_client.get_configurable_data_model(cm_uuid=CM_UUID)
+
+    smart_client.get_conservation_areas.assert_awaited_once()
+    smart_client.download_configurable_datamodel.assert_awaited_once()
@@ -0,0 +1,111 @@
+import httpx
+import pytest
+import respx
+
+from smartconnect import SmartClient, AsyncSmartClient, rate_limit
+from smartconnect.rate_limit import TokenBucket, RedisTokenBucket
+
+API = "https://fancyplace.smartconservationtools.org/server"
+
+
+@pytest.fixture(autouse=True)
+def buckets(mocker):
+    return mocker.patch.object(rate_limit, "_buckets", {})
+
+
+def test_token_bucket_allows_bursts_then_spaces_requests(mocker):
+    mocker.patch("smartconnect.rate_limit.time.monotonic", return_value=50.0)
+    bucket = TokenBucket(rate=4, capacity=2)
+
+    assert [bucket.reserve() for _ in range(4)] == [0.0, 0.0, 0.25, 0.5]
+
+
+def test_token_bucket_refills_over_time(mocker):
+    clock = mocker.patch("smartconnect.rate_limit.time.monotonic", return_value=50.0)
+    bucket = TokenBucket(rate=4, capacity=2)
+    bucket.reserve(), bucket.reserve()
+
+    clock.return_value += 10
+    assert bucket.reserve() == 0.0
+
+
+def test_clients_share_a_bucket_per_host():
+    first, second, other = [
+        SmartClient(api=api, username="Earthranger", password="afancypassword", max_requests_per_second=5)
+        for api in (API, API, "https://otherplace.smartconservationtools.org/server")
+    ]
+
+    assert first._session._transport.bucket is second._session._transport.bucket
+    assert first._session._transport.bucket is not other._session._transport.bucket
+
+
+def test_clients_with_other_rates_share_the_first_bucket(caplog):
+    first, second = [
+        SmartClient(api=API, username="Earthranger", password="afancypassword", max_requests_per_second=rate)
+        for rate in (5, 20)
+    ]
+
+    assert second._session._transport.bucket is first._session._transport.bucket
+    assert first._session._transport.bucket.rate == 5
+    assert "as set by the first client for it" in caplog.text
+
+
+def test_client_waits_for_a_token(respx_mock, mocker):
+    sleep = mocker.patch("smartconnect.rate_limit.time.sleep")
+    mocker.patch("smartconnect.rate_limit.time.monotonic", return_value=50.0)
+    respx_mock.get(f"{API}/connect/home").mock(return_value=httpx.Response(200))
+    respx_mock.post(f"{API}/j_security_check").mock(
+        return_value=httpx.Response(302, headers={"set-cookie": "JSESSIONID=abc123; Path=/"}))
+    respx_mock.get(f"{API}/api/info").mock(return_value=httpx.Response(200, json={}))
+
+    smart_client = SmartClient(api=API, username="Earthranger", password="afancypassword", max_requests_per_second=2)
+    smart_client.get_server_api_info()
+    smart_client.get_server_api_info()
+
+    assert [call.args[0] for call in sleep.call_args_list] == [0.5, 1.0]
+
+
+def test_redis_bucket_reserves_through_script(mocker):
+    redis_client = mocker.MagicMock()
+    redis_client.register_script.return_value.return_value = b"0.25"
+    bucket = RedisTokenBucket("smart.ratelimit.test", rate=4, capacity=2, redis_client=redis_client)
+
+    assert bucket.reserve() == 0.25
+    redis_client.register_script.return_value.assert_called_once_with(keys=["smart.ratelimit.test"], args=[4, 2])
+
+
+def test_redis_bucket_falls_back_to_local_bucket(mocker):
+    redis_client = mocker.MagicMock()
+    redis_client.register_script.return_value.side_effect = ConnectionError("Redis is down")
+    bucket = RedisTokenBucket("smart.ratelimit.test", rate=4, capacity=2, redis_client=redis_client)
+
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, pytest.approx(0.25, abs=0.01)]
+
+
+def test_distributed_bucket_uses_cache_connection(mocker):
+    redis_client = mocker.patch("smartconnect.rate_limit.cache.cache")
+    smart_client = SmartClient(api=API, username="Earthranger", password="afancypassword",
+                               max_requests_per_second=5, distributed_rate_limit=True)
+
+    bucket = smart_client._session._transport.bucket
+    assert isinstance(bucket, RedisTokenBucket)
+    assert bucket.key == "smart.ratelimit.https://fancyplace.smartconservationtools.org"
+    redis_client.register_script.assert_called_once_with(rate_limit.RESERVE_TOKEN_SCRIPT)
+
+
+@pytest.mark.asyncio
+async def test_async_client_waits_for_a_token(mocker):
+    sleep = mocker.patch("smartconnect.rate_limit.asyncio.sleep")
+    mocker.patch("smartconnect.rate_limit.time.monotonic", return_value=50.0)
+    async with respx.mock:
+        respx.get(f"{API}/connect/home").respond(status_code=200)
+        respx.post(f"{API}/j_security_check").respond(
+            status_code=302, headers={"set-cookie": "JSESSIONID=abc123; Path=/"})
+        respx.get(f"{API}/api/info").respond(status_code=200, json={})
+
+        smart_client = AsyncSmartClient(api=API, username="Earthranger", password="afancypassword",
+                                        max_requests_per_second=4)
+        for _ in range(5):
+            await smart_client.get_server_api_info()
+
+        assert [call.args[0] for call in sleep.call_args_list] == [0.25, 0.5, 0.75]
@@ -0,0 +1,111 @@
+import httpx
+import pytest
+import respx
+
+from smartconnect import SmartClient, AsyncSmartClient, SMARTClientException
+from smartconnect.retry import RetryPolicy
+
+API = "https://fancyplace.smartconservationtools.org/server"
+CA_UUID = "123ac748-6e05-4299-892f-335d21fd4ce6"
+
+
+def faults(*status_codes, headers=None):
+    '''
+    Stand-in server that answers with the given status codes in turn, then succeeds.
+    '''
+    responses = [httpx.Response(status_code, headers=headers, json={}) for status_code in status_codes]
+    return responses + [httpx.Response(200, json=[])]
+
+
+@pytest.fixture
+def sleep(mocker):
+    return mocker.patch("smartconnect.retry.time.sleep")
+
+
+def make_client(**policy):
+    return SmartClient(api=API, username="Earthranger", password="afancypassword",
+                       retry_policy=RetryPolicy(max_retries=3, backoff_factor=1.0, **policy))
+
+
+def test_retries_server_errors_with_jittered_backoff(respx_mock, login, sleep):
+    cas = respx_mock.get(f"{API}/api/conservationarea").mock(side_effect=faults(503, 502))
+
+    assert make_client().get_conservation_areas() == []
+
+    assert cas.call_count == 3
+    first_wait, second_wait = [call.args[0] for call in sleep.call_args_list]
+    assert 0 <= first_wait <= 1.0
+    assert 0 <= second_wait <= 2.0
+
+
+def test_honors_retry_after(respx_mock, login, sleep):
+    respx_mock.get(f"{API}/api/conservationarea").mock(side_effect=faults(429, headers={"retry-after": "7"}))
+
+    assert make_client().get_conservation_areas() == []
+    sleep.assert_called_once_with(7.0)
+
+
+def test_does_not_wait_for_long_retry_after(respx_mock, login, sleep):
+    info = respx_mock.get(f"{API}/api/info").mock(side_effect=faults(503, headers={"retry-after": "3600"}))
+
+    assert make_client().get_server_api_info() is None
+
+    assert info.call_count == 1
+    sleep.assert_not_called()
+
+
+def test_gives_up_after_max_retries(respx_mock, login, sleep):
+    datamodel = respx_mock.get(f"{API}/api/metadata/datamodel/{CA_UUID}").mock(return_value=httpx.Response(503))
+
+    with pytest.raises(Exception, match="Failed to download Data Model"):
+        make_client().download_datamodel(ca_uuid=CA_UUID)
+    assert datamodel.call_count == 4
+
+
+def test_posts_are_not_retried_by_default(respx_mock, login, sleep):
+    data = respx_mock.post(f"{API}/api/data/{CA_UUID}").mock(side_effect=faults(503))
+
+    with pytest.raises(SMARTClientException):
+        make_client().post_smart_request(json="{}", ca_uuid=CA_UUID)
+    assert data.call_count == 1
+
+
+def test_posts_are_retried_when_opted_in(respx_mock, login, sleep):
+    data = respx_mock.post(f"{API}/api/data/{CA_UUID}").mock(side_effect=faults(503))
+
+    make_client(retry_non_idempotent=True).post_smart_request(json="{}", ca_uuid=CA_UUID)
+    assert data.call_count == 2
+
+
+def test_retry_budget_limits_retries(respx_mock, login, sleep):
+    info = respx_mock.get(f"{API}/api/info").mock(return_value=httpx.Response(503))
+    smart_client = make_client()
+    smart_client._session._transport.budget._balance = 2
+
+    smart_client.get_server_api_info()
+    smart_client.get_server_api_info()
+
+    assert sleep.call_count == 2
+    assert info.call_count == 4
+
+
+def test_retries_are_disabled_by_default():
+    smart_client = SmartClient(api=API, username="Earthranger", password="afancypassword")
+    assert isinstance(smart_client._session._transport, httpx.HTTPTransport)
+
+
+@pytest.mark.asyncio
+async def test_async_client_retries_server_errors(mocker):
+    sleep = mocker.patch("smartconnect.retry.asyncio.sleep")
+    async with respx.mock:
+        respx.get(f"{API}/connect/home").respond(status_code=200)
+        respx.post(f"{API}/j_security_check").respond(
+            status_code=302, headers={"set-cookie": "JSESSIONID=abc123; Path=/"})
+        cas = respx.get(f"{API}/api/conservationarea").mock(side_effect=faults(500, 504))
+
+        smart_client = AsyncSmartClient(api=API, username="Earthranger", password="afancypassword",
+                                        retry_policy=RetryPolicy(max_retries=2))
+
+        assert await smart_client.get_conservation_areas() == []
+        assert cas.call_count == 3
+        assert sleep.call_count == 2
@@ -0,0 +1,163 @@
+import asyncio
+import json
+import threading
+import time
+import uuid
+
+import pytest
+
+from smartconnect import DataModel, ConfigurableDataModel
+from smartconnect.models import ConservationArea
+
+CA_UUID = "123e4567-e89b-12d3-a456-426614174000"
+CM_UUID = "9c1a0e8a-3b8e-4d38-9c1e-5a0d4a3c7e11"
+
+
+def conservation_area(revision):
+    return ConservationArea(label="Test CA", status="DATA", version=uuid.uuid4(), revision=revision,
+                            uuid=uuid.UUID(CA_UUID))
+
+
+def cached_datamodel(revision):
+    return json.dumps({"categories": [], "attributes": [], "revision": revision})
+
+
+@pytest.fixture
+def smart_client(mocker, make_client):
+    smart_client = make_client(revision_aware_cache=True)
+    mocker.patch.object(smart_client, "get_conservation_areas", return_value=[conservation_area(7)])
+    return smart_client
+
+
+def test_models_round_trip_their_revision(downloaded_datamodel):
+    datamodel = downloaded_datamodel()
+    datamodel.revision = 7
+
+    restored = DataModel()
+    restored.import_from_dict(json.loads(json.dumps(datamodel.export_as_dict())))
+    assert restored.revision == 7
+
+    legacy = ConfigurableDataModel()
+    legacy.import_from_dict({"categories": [], "attributes": [], "name": "Legacy", "cm_uuid": CM_UUID})
+    assert legacy.revision is None
+
+
+def test_cached_model_at_current_revision_is_used(smart_client, redis_cache):
+    redis_cache.get.return_value = cached_datamodel(7)
+
+    datamodel = smart_client.get_data_model(ca_uuid=CA_UUID)
+
+    assert datamodel.revision == 7
+    smart_client.download_datamodel.assert_not_called()
+
+
+def test_cached_model_is_downloaded_again_when_revision_moves(smart_client, redis_cache):
+    redis_cache.get.return_value = cached_datamodel(6)
+
+    datamodel = smart_client.get_data_model(ca_uuid=CA_UUID)
+
+    smart_client.download_datamodel.assert_called_once_with(ca_uuid=CA_UUID)
+    assert datamodel.get_category(path="new")
+    assert datamodel.revision == 7
+    assert json.loads(redis_cache.set.call_args.kwargs["value"])["revision"] == 7
+
+
+def test_legacy_cache_entries_are_refreshed(smart_client, redis_cache):
+    redis_cache.get.return_value = json.dumps({"categories": [], "attributes": []})
+
+    assert smart_client.get_data_model(ca_uuid=CA_UUID).revision == 7
+    smart_client.download_datamodel.assert_called_once()
+
+
+def test_revisions_are_polled_at_most_once_per_interval(smart_client, redis_cache, monotonic_clock):
+    redis_cache.get.return_value = cached_datamodel(7)
+
+    for _ in range(3):
+        smart_client.get_data_model(ca_uuid=CA_UUID)
+    assert smart_client.get_conservation_areas.call_count == 1
+
+    monotonic_clock.return_value += 60
+    smart_client.get_data_model(ca_uuid=CA_UUID)
+    assert smart_client.get_conservation_areas.call_count == 2
+
+
+def test_concurrent_callers_share_one_revision_poll(smart_client, redis_cache):
+    redis_cache.get.return_value = cached_datamodel(7)
+
+    def slow_poll():
+        time.sleep(0.05)
+        return [conservation_area(7)]
+
+    smart_client.get_conservation_areas.side_effect = slow_poll
+    threads = [threading.Thread(target=smart_client.get_data_model, kwargs=dict(ca_uuid=CA_UUID)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    smart_client.get_conservation_areas.assert_called_once()
+    smart_client.download_datamodel.assert_not_called()
+
+
+def test_cached_model_is_used_when_revision_poll_fails(smart_client, redis_cache):
+    smart_client.get_conservation_areas.side_effect = Exception("Server unreachable")
+    redis_cache.get.return_value = cached_datamodel(6)
+
+    assert smart_client.get_data_model(ca_uuid=CA_UUID).revision == 6
+    smart_client.download_datamodel.assert_not_called()
+
+
+def test_local_cache_entries_are_checked_too(smart_client, redis_cache, mocker):
+    smart_client.use_local_cache = True
+    redis_cache.get.return_value = cached_datamodel(7)
+    first = smart_client.get_data_model(ca_uuid=CA_UUID)
+
+    smart_client.get_conservation_areas.return_value = [conservation_area(8)]
+    smart_client._revisions_polled_at = float('-inf')
+    second = smart_client.get_data_model(ca_uuid=CA_UUID)
+
+    assert second is not first
+    assert second.revision == 8
+    assert smart_client.get_data_model(ca_uuid=CA_UUID) is second
+
+
+def test_configurable_model_revision_needs_its_ca(smart_client, redis_cache, mocker):
+    download = mocker.patch.object(smart_client, "download_configurable_datamodel")
+    download.return_value = ConfigurableDataModel(cm_uuid=CM_UUID)
+    download.return_value.import_from_dict({"categories": [], "attributes": [], "name": "New", "cm_uuid": CM_UUID})
+    redis_cache.get.return_value = json.dumps(
+        {"categories": [], "attributes": [], "name": "Old", "cm_uuid": CM_UUID, "revision": 6})
+
+    assert smart_client.get_configurable_data_model(cm_uuid=CM_UUID)._name == "Old"
+    assert smart_client.get_configurable_data_model(cm_uuid=CM_UUID, ca_uuid=CA_UUID)._name == "New"
+    assert json.loads(redis_cache.set.call_args.args[1])["revision"] == 7
+
+
+@pytest.mark.asyncio
+async def test_async_client_downloads_again_when_revision_moves(async_redis_cache, make_async_client, mocker):
+    async_redis_cache.get.return_value = cached_datamodel(6)
+    smart_client = make_async_client(revision_aware_cache=True)
+    mocker.patch.object(smart_client, "get_conservation_areas", return_value=[conservation_area(7)])
+
+    datamodel = await smart_client.get_data_model(ca_uuid=CA_UUID)
+
+    assert datamodel.revision == 7
+    assert json.loads(async_redis_cache.set.call_args.kwargs["value"])["revision"] == 7
+
+
+@pytest.mark.asyncio
+async def test_async_callers_share_one_revision_poll(async_redis_cache, make_async_client, mocker):
+    async_redis_cache.get.return_value = cached_datamodel(7)
+    smart_client = make_async_client(revision_aware_cache=True)
+
+    async def slow_poll():
+        await asyncio.sleep(0.01)
+        return [conservation_area(7)]
+
+    mocker.patch.object(smart_client, "get_conservation_areas", side_effect=slow_poll)
+
+    datamodels = await asyncio.gather(*[smart_client.get_data_model(ca_uuid=CA_UUID) for _ in range(5)])
+
+    assert all(datamodel.revision == 7 for datamodel in datamodels)
+    smart_client.get_conservation_areas.assert_awaited_once()
+    smart_client.download_datamodel.assert_not_called()
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from smartconnect import SmartClient, DataModel, serialization
+
+CA_UUID = "123e4567-e89b-12d3-a456-426614174000"
+
+DATAMODEL = {
+    "categories": [{"path": f"animals.species{i}", "ismultiple": "false", "isactive": "true", "attributes": [],
+                    "display": f"Species {i} — ñandú"} for i in range(50)],
+    "attributes": [{"key": "tree", "type": "TREE", "isrequired": False, "display": "Tree",
+                    "options": [{"key": f"a.b{i}", "display": f"Branch {i}"} for i in range(200)]}],
+    "revision": 7,
+}
+
+
+@pytest.mark.parametrize("format", ["json", "zlib"])
+def test_round_trip(format):
+    assert serialization.loads(serialization.dumps(DATAMODEL, format=format)) == DATAMODEL
+
+
+def test_compressed_entries_are_smaller_and_tagged():
+    encoded = serialization.dumps(DATAMODEL, format="zlib")
+
+    assert encoded[:1] == serialization.ZLIB_HEADER
+    assert len(encoded) < len(json.dumps(DATAMODEL)) / 5
+
+
+def test_legacy_json_entries_are_read():
+    assert serialization.loads(json.dumps(DATAMODEL).encode("utf-8")) == DATAMODEL
+    assert serialization.loads(json.dumps(DATAMODEL)) == DATAMODEL
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        serialization.dumps(DATAMODEL, format="xml")
+
+
+def test_zstd_falls_back_to_zlib_without_zstandard(mocker):
+    mocker.patch("smartconnect.serialization.zstandard", None)
+    serialization._resolve.cache_clear()
+
+    try:
+        assert serialization.dumps(DATAMODEL, format="zstd")[:1] == serialization.ZLIB_HEADER
+    finally:
+        serialization._resolve.cache_clear()
+
+
+def test_zstd_round_trip():
+    pytest.importorskip("zstandard")
+
+    encoded = serialization.dumps(DATAMODEL, format="zstd")
+
+    assert encoded[:1] == serialization.ZSTD_HEADER
+    assert serialization.loads(encoded) == DATAMODEL
+
+
+def test_client_stores_and_reads_the_configured_format(mocker):
+    redis_cache = mocker.patch("smartconnect.cache.cache")
+    mocker.patch("smartconnect.smart_settings.SMART_CACHE_FORMAT", "zlib")
+    smart_client = SmartClient(api="https://test.example.com", username="testuser", password="testpass")
+    datamodel = DataModel()
+    datamodel.import_from_dict(DATAMODEL)
+    mocker.patch.object(smart_client, "download_datamodel", return_value=datamodel)
+
+    redis_cache.get.return_value = None
+    smart_client.get_data_model(ca_uuid=CA_UUID)
+    stored = redis_cache.set.call_args.kwargs["value"]
+    assert stored[:1] == serialization.ZLIB_HEADER
+
+    redis_cache.get.return_value = stored
+    assert smart_client.get_data_model(ca_uuid=CA_UUID).get_category(path="animals.species3")
@@ -1,6 +1,7 @@
 import pytest
 import respx
-from smartconnect import SmartClient, SMARTClientException, SMARTClientUnauthorizedError, SMARTClientServerUnreachableError
+from smartconnect import SmartClient, SMARTClientException, SMARTClientUnauthorizedError, SMARTClientServerUnreachableError, \
+    SMARTClientSessionExpiredError
 
 def test_client_login(respx_mock):
     # Mock the login response
@@ -59,3 +60,100 @@ def test_async_client_landing_page_server500(respx_mock):
     with pytest.raises(SMARTClientServerUnreachableError):
         # Perform the login
         smart_client.ensure_login()
+
+def test_client_relogin_on_expired_session(respx_mock):
+    # Given a client that logged in once.
+    landing_page = respx_mock.get(
+        "https://fancyplace.smartconservationtools.org/server/connect/home").mock(return_value=respx.MockResponse(200))
+    login = respx_mock.post(
+        "https://fancyplace.smartconservationtools.org/server/j_security_check").mock(
+        side_effect=[
+            respx.MockResponse(302, headers={"set-cookie": "JSESSIONID=first; Path=/"}),
+            respx.MockResponse(302, headers={"set-cookie": "JSESSIONID=second; Path=/"}),
+        ])
+
+    # And a server that redirects to the login page once the session has expired.
+    cas = respx_mock.get(
+        "https://fancyplace.smartconservationtools.org/server/api/conservationarea").mock(
+        side_effect=[
+            respx.MockResponse(302, headers={"location": "https://fancyplace.smartconservationtools.org/server/connect/login"}),
+            respx.MockResponse(200, json=[]),
+        ])
+
+    smart_client = SmartClient(
+        api="https://fancyplace.smartconservationtools.org/server",
+        username="Earthranger",
+        password="afancypassword"
+    )
+
+    # When the request is made with the expired session, it is replayed after logging in again.
+    assert smart_client.get_conservation_areas() == []
+    assert landing_page.call_count == 2
+    assert login.call_count == 2
+    assert cas.call_count == 2
+    assert smart_client._session_id() == "second"
+
+def test_client_relogin_gives_up_after_one_attempt(respx_mock):
+    respx_mock.get(
+        "https://fancyplace.smartconservationtools.org/server/connect/home").mock(return_value=respx.MockResponse(200))
+    respx_mock.post(
+        "https://fancyplace.smartconservationtools.org/server/j_security_check").mock(
+        return_value=respx.MockResponse(302, headers={"set-cookie": "JSESSIONID=abc123; Path=/"}))
+
+    # Given a server that rejects every session.
+    cas = respx_mock.get(
+        "https://fancyplace.smartconservationtools.org/server/api/conservationarea").mock(return_value=respx.MockResponse(401))
+
+    smart_client = SmartClient(
+        api="https://fancyplace.smartconservationtools.org/server",
+        username="Earthranger",
+        password="afancypassword"
+    )
+
+    with pytest.raises(SMARTClientSessionExpiredError):
+        smart_client.get_conservation_areas()
+    assert cas.call_count == 2
+
+def test_client_reuses_stored_session(respx_mock, mocker, mock_cache):
+    mocker.patch("smartconnect.session.cache", mock_cache)
+
+    # Given another process has stored a live session for this server and account.
+    mock_cache.cache.get.return_value = b"stored-session"
+    landing_page = respx_mock.get(
+        "https://fancyplace.smartconservationtools.org/server/connect/home").mock(return_value=respx.MockResponse(200))
+    cas = respx_mock.get(
+        "https://fancyplace.smartconservationtools.org/server/api/conservationarea").mock(return_value=respx.MockResponse(200, json=[]))
+
+    smart_client = SmartClient(
+        api="https://fancyplace.smartconservationtools.org/server",
+        username="Earthranger",
+        password="afancypassword",
+        use_session_store=True
+    )
+
+    # Then requests are made with the stored session and no login handshake.
+    assert smart_client.get_conservation_areas() == []
+    assert not landing_page.called
+    assert cas.calls[0].request.headers["cookie"] == "JSESSIONID=stored-session"
+    mock_cache.cache.get.assert_called_once_with(
+        "smart.session.https://fancyplace.smartconservationtools.org/server.Earthranger")
+
+def test_client_stores_session_after_login(respx_mock, mocker, mock_cache):
+    mocker.patch("smartconnect.session.cache", mock_cache)
+
+    respx_mock.get(
+        "https://fancyplace.smartconservationtools.org/server/connect/home").mock(return_value=respx.MockResponse(200))
+    respx_mock.post(
+        "https://fancyplace.smartconservationtools.org/server/j_security_check").mock(
+        return_value=respx.MockResponse(302, headers={"set-cookie": "JSESSIONID=abc123; Path=/"}))
+
+    smart_client = SmartClient(
+        api="https://fancyplace.smartconservationtools.org/server",
+        username="Earthranger",
+        password="afancypassword",
+        use_session_store=True
+    )
+    smart_client.ensure_login()
+
+    mock_cache.cache.set.assert_called_once_with(
+        "smart.session.https://fancyplace.smartconservationtools.org/server.Earthranger", "abc123", ex=1500)
@@ -0,0 +1,94 @@
+import json
+import threading
+
+import pytest
+
+CA_UUID = "123e4567-e89b-12d3-a456-426614174000"
+CACHE_KEY = f"cache:smart-ca:{CA_UUID}:datamodel"
+
+
+@pytest.fixture(autouse=True)
+def poll_interval(mocker):
+    mocker.patch("smartconnect.smart_settings.SMART_FILL_POLL_INTERVAL", 0.01)
+
+
+def test_only_one_process_downloads_a_missing_model(backend, make_client, downloaded_datamodel):
+    downloading, release_download = threading.Event(), threading.Event()
+
+    def download(**kwargs):
+        downloading.set()
+        assert release_download.wait(5)
+        return downloaded_datamodel()
+
+    # Each client stands in for a worker process.
+    winner, loser = make_client(single_flight_fill=True), make_client(single_flight_fill=True)
+    winner.download_datamodel.side_effect = loser.download_datamodel.side_effect = download
+    results = {}
+    thread = threading.Thread(target=lambda: results.update(winner=winner.get_data_model(ca_uuid=CA_UUID)))
+    thread.start()
+    assert downloading.wait(5)
+
+    threading.Timer(0.05, release_download.set).start()
+    results["loser"] = loser.get_data_model(ca_uuid=CA_UUID)
+    thread.join(5)
+
+    winner.download_datamodel.assert_called_once_with(ca_uuid=CA_UUID)
+    loser.download_datamodel.assert_not_called()
+    assert results["loser"].get_category(path="new")
+    assert json.loads(backend.get(CACHE_KEY))["categories"] == [{"path": "new"}]
+    assert not backend.lock(f"{CACHE_KEY}:fill").locked()
+
+
+def test_waiting_process_downloads_when_the_fill_fails(backend, make_client):
+    # Another process is filling the cache, and gives up.
+    fill_lock = backend.lock(f"{CACHE_KEY}:fill")
+    fill_lock.acquire()
+    smart_client = make_client(single_flight_fill=True)
+    threading.Timer(0.05, fill_lock.release).start()
+
+    assert smart_client.get_data_model(ca_uuid=CA_UUID).get_category(path="new")
+    smart_client.download_datamodel.assert_called_once()
+
+
+def test_waiting_process_gives_up_after_wait_timeout(backend, make_client, mocker):
+    mocker.patch("smartconnect.smart_settings.SMART_FILL_WAIT_TIMEOUT", 0.05)
+    backend.lock(f"{CACHE_KEY}:fill").acquire()
+    smart_client = make_client(single_flight_fill=True)
+
+    assert smart_client.get_data_model(ca_uuid=CA_UUID).get_category(path="new")
+    smart_client.download_datamodel.assert_called_once()
+
+
+def test_lock_errors_fall_back_to_downloading(backend, make_client, mocker):
+    mocker.patch.object(backend, "lock", side_effect=ConnectionError("Redis unreachable"))
+    smart_client = make_client(single_flight_fill=True)
+
+    assert smart_client.get_data_model(ca_uuid=CA_UUID).get_category(path="new")
+    smart_client.download_datamodel.assert_called_once()
+
+
+def test_single_flight_is_disabled_by_default(backend, make_client, mocker):
+    smart_client = make_client()
+    mocker.patch.object(backend, "lock")
+
+    smart_client.get_data_model(ca_uuid=CA_UUID)
+
+    backend.lock.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_async_client_waits_for_the_process_filling_the_cache(async_redis_cache, make_async_client,
+                                                                    downloaded_datamodel, mocker):
+    async_redis_cache.get.side_effect = [None, json.dumps(downloaded_datamodel().export_as_dict())]
+    async_redis_cache.lock = mocker.MagicMock()
+    lock = async_redis_cache.lock.return_value
+    lock.acquire = mocker.AsyncMock(return_value=False)
+    lock.locked = mocker.AsyncMock(side_effect=[True, True, False])
+    smart_client = make_async_client(single_flight_fill=True)
+
+    datamodel = await smart_client.get_data_model(ca_uuid=CA_UUID)
+
+    assert datamodel.get_category(path="new")
+    smart_client.download_datamodel.assert_not_called()
+    async_redis_cache.lock.assert_called_once_with(f"{CACHE_KEY}:fill", timeout=120.0, blocking=False)
+    assert lock.locked.await_count == 3
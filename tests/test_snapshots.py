@@ -0,0 +1,175 @@
+import os
+import threading
+
+import pytest
+
+from smartconnect import SmartClient, AsyncSmartClient, DataModel, ConfigurableDataModel, cache
+from smartconnect.cache_backends import MemoryCache
+from smartconnect.snapshots import SnapshotStore, SnapshotDataModel, SnapshotConfigurableDataModel
+
+CA_UUID = "123e4567-e89b-12d3-a456-426614174000"
+CACHE_KEY = f"cache:smart-ca:{CA_UUID}:datamodel"
+
+
+@pytest.fixture
+def datamodel():
+    datamodel = DataModel()
+    with open(os.path.join(os.path.dirname(__file__), "data", "datamodel.xml")) as f:
+        datamodel.load(f.read())
+    datamodel.revision = 7
+    return datamodel
+
+
+@pytest.fixture
+def store(mocker, tmp_path):
+    return mocker.patch("smartconnect.snapshots.store", SnapshotStore(directory=str(tmp_path / "snapshots")))
+
+
+def test_data_model_fields_are_loaded_lazily(store, datamodel):
+    store.save(CACHE_KEY, datamodel, "en")
+
+    snapshot = store.load(CACHE_KEY, "en")
+
+    assert isinstance(snapshot, SnapshotDataModel) and isinstance(snapshot, DataModel)
+    assert snapshot.revision == 7
+    assert "_categories" not in snapshot.__dict__
+    path = datamodel._categories[3]["path"]
+    assert snapshot.get_category(path=path) == datamodel.get_category(path=path)
+    assert "_categories" in snapshot.__dict__ and "_attributes" not in snapshot.__dict__
+    assert not snapshot._snapshot._mmap.closed
+    assert snapshot.export_as_dict() == datamodel.export_as_dict()
+    assert snapshot._snapshot._mmap.closed
+
+
+def test_configurable_data_model_round_trip(store):
+    model = ConfigurableDataModel(cm_uuid="9c1a0e8a-3b8e-4d38-9c1e-5a0d4a3c7e11")
+    model.import_from_dict({"categories": [{"hkeyPath": "animals"}], "attributes": [], "name": "Patrol",
+                            "cm_uuid": model.cm_uuid, "revision": 3})
+    store.save("cache:smart-ca:na:cdm:9c1a", model, "fr")
+
+    snapshot = store.load("cache:smart-ca:na:cdm:9c1a", "fr")
+
+    assert isinstance(snapshot, SnapshotConfigurableDataModel)
+    assert snapshot.use_language_code == "fr"
+    assert snapshot.export_as_dict() == model.export_as_dict()
+    assert store.load("cache:smart-ca:na:cdm:9c1a", "en") is None
+
+
+@pytest.mark.parametrize("content", [b"", b"SMDS", b"SMDS\x02\x00\x00\x00\x02{}", b"<DataModel/>"])
+def test_unusable_snapshots_are_ignored(store, datamodel, content):
+    store.save(CACHE_KEY, datamodel, "en")
+    with open(store._path(CACHE_KEY, "en"), "wb") as f:
+        f.write(content)
+
+    assert store.load(CACHE_KEY, "en") is None
+
+
+def test_replacing_a_snapshot_unmaps_the_old_one(store, datamodel):
+    store.save(CACHE_KEY, datamodel, "en")
+    old = store.load(CACHE_KEY, "en")
+    expected = datamodel.export_as_dict()
+
+    datamodel.revision = 8
+    datamodel._categories = datamodel._categories[:1]
+    store.save(CACHE_KEY, datamodel, "en")
+
+    assert old._snapshot._mmap.closed
+    assert old.export_as_dict() == expected
+    assert store.load(CACHE_KEY, "en").revision == 8
+
+
+def test_invalidate_drops_snapshots(store, datamodel, mocker):
+    mocker.patch("smartconnect.cache.cache")
+    store.save(CACHE_KEY, datamodel, "en")
+    store.save(CACHE_KEY, datamodel, "fr")
+
+    snapshot = store.load(CACHE_KEY, "en")
+
+    cache.invalidate(CACHE_KEY)
+
+    assert snapshot._snapshot._mmap.closed
+    assert store.load(CACHE_KEY, "en") is None and store.load(CACHE_KEY, "fr") is None
+
+
+def make_client(mocker, datamodel, **kwargs):
+    smart_client = SmartClient(api="https://test.example.com", username="testuser", password="testpass", **kwargs)
+    mocker.patch.object(smart_client, "download_datamodel", return_value=datamodel)
+    return smart_client
+
+
+def test_cold_cache_is_served_from_snapshot(store, datamodel, mocker):
+    mocker.patch("smartconnect.cache.cache", MemoryCache())
+    make_client(mocker, datamodel, use_snapshots=True).get_data_model(ca_uuid=CA_UUID)
+
+    # A process starting while the cache is unreachable.
+    mocker.patch("smartconnect.cache.cache").get.side_effect = ConnectionError("Redis unreachable")
+    smart_client = make_client(mocker, datamodel, use_snapshots=True)
+
+    assert isinstance(smart_client.get_data_model(ca_uuid=CA_UUID), SnapshotDataModel)
+    smart_client.download_datamodel.assert_not_called()
+
+
+def test_batch_reads_fall_back_to_snapshots(store, datamodel, mocker):
+    store.save(CACHE_KEY, datamodel, "en")
+    mocker.patch("smartconnect.cache.cache", MemoryCache())
+    smart_client = make_client(mocker, datamodel, use_snapshots=True)
+
+    assert isinstance(smart_client.get_data_models(ca_uuids=[CA_UUID])[CA_UUID], SnapshotDataModel)
+    smart_client.download_datamodel.assert_not_called()
+
+
+def test_waiting_process_does_not_return_an_outdated_snapshot(store, datamodel, backend, mocker):
+    mocker.patch("smartconnect.smart_settings.SMART_FILL_POLL_INTERVAL", 0.01)
+    store.save(CACHE_KEY, datamodel, "en")
+    smart_client = make_client(mocker, datamodel, use_snapshots=True, single_flight_fill=True,
+                               revision_aware_cache=True)
+    mocker.patch.object(smart_client, "_ca_revision", return_value=8)
+    # Another process is filling the cache, and gives up.
+    fill_lock = backend.lock(f"{CACHE_KEY}:fill")
+    fill_lock.acquire()
+    threading.Timer(0.05, fill_lock.release).start()
+
+    assert smart_client.get_data_model(ca_uuid=CA_UUID) is datamodel
+    smart_client.download_datamodel.assert_called_once()
+
+
+def test_snapshots_are_disabled_by_default(store, datamodel, mocker):
+    mocker.patch("smartconnect.cache.cache", MemoryCache())
+    smart_client = make_client(mocker, datamodel)
+
+    smart_client.get_data_model(ca_uuid=CA_UUID)
+
+    assert store.load(CACHE_KEY, "en") is None
+
+
+@pytest.mark.asyncio
+async def test_async_client_writes_and_reads_snapshots(store, datamodel, mocker):
+    mocker.patch("smartconnect.cache.cache", MemoryCache())
+    mocker.patch.object(AsyncSmartClient, "ensure_login")
+    smart_client = AsyncSmartClient(api="https://test.example.com", username="testuser", password="testpass",
+                                    use_snapshots=True)
+    mocker.patch.object(smart_client, "download_datamodel", return_value=datamodel)
+    await smart_client.get_data_model(ca_uuid=CA_UUID)
+
+    mocker.patch("smartconnect.cache.cache", MemoryCache())
+    assert isinstance(await smart_client.get_data_model(ca_uuid=CA_UUID), SnapshotDataModel)
+    smart_client.download_datamodel.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_async_client_loads_snapshots_off_the_event_loop(store, datamodel, mocker):
+    store.save(CACHE_KEY, datamodel, "en")
+    mocker.patch("smartconnect.cache.cache", MemoryCache())
+    mocker.patch.object(AsyncSmartClient, "ensure_login")
+    smart_client = AsyncSmartClient(api="https://test.example.com", username="testuser", password="testpass",
+                                    use_snapshots=True)
+    load, threads = store.load, []
+
+    def load_in_thread(*args):
+        threads.append(threading.current_thread())
+        return load(*args)
+
+    mocker.patch.object(store, "load", side_effect=load_in_thread)
+
+    assert isinstance(await smart_client.get_data_model(ca_uuid=CA_UUID), SnapshotDataModel)
+    assert threads and threading.main_thread() not in threads
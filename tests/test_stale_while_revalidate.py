@@ -0,0 +1,124 @@
+import asyncio
+import json
+import threading
+import uuid
+
+import pytest
+
+from smartconnect.models import ConservationArea
+
+CA_UUID = "123e4567-e89b-12d3-a456-426614174000"
+CACHE_KEY = f"cache:smart-ca:{CA_UUID}:datamodel"
+CACHED_DATAMODEL = json.dumps({"categories": [{"path": "old"}], "attributes": [], "revision": 6})
+
+
+@pytest.fixture
+def release_download():
+    return threading.Event()
+
+
+@pytest.fixture
+def smart_client(make_client, redis_cache, downloaded_datamodel, release_download):
+    redis_cache.get.return_value = CACHED_DATAMODEL
+    smart_client = make_client(stale_while_revalidate=True, use_local_cache=True)
+
+    def download_datamodel(**kwargs):
+        assert release_download.wait(5)
+        return downloaded_datamodel()
+
+    smart_client.download_datamodel.side_effect = download_datamodel
+    return smart_client
+
+
+def wait_for_revalidation(smart_client):
+    for thread in threading.enumerate():
+        if thread.name == 'smartconnect-revalidate':
+            thread.join(5)
+    assert not smart_client._revalidating
+
+
+def test_forced_refresh_serves_cached_model_and_refreshes_in_background(smart_client, redis_cache, release_download):
+    datamodel = smart_client.get_data_model(ca_uuid=CA_UUID, force=True)
+
+    assert datamodel.get_category(path="old")
+    assert CACHE_KEY in smart_client._revalidating
+
+    release_download.set()
+    wait_for_revalidation(smart_client)
+
+    smart_client.download_datamodel.assert_called_once_with(ca_uuid=CA_UUID)
+    assert json.loads(redis_cache.set.call_args.kwargs["value"])["categories"] == [{"path": "new"}]
+    assert smart_client.get_data_model(ca_uuid=CA_UUID).get_category(path="new")
+
+
+def test_model_behind_its_revision_is_served_while_refreshing(smart_client, redis_cache, release_download, mocker):
+    smart_client.revision_aware_cache = True
+    mocker.patch.object(smart_client, "get_conservation_areas", return_value=[ConservationArea(
+        label="Test CA", status="DATA", version=uuid.uuid4(), revision=7, uuid=uuid.UUID(CA_UUID))])
+
+    assert smart_client.get_data_model(ca_uuid=CA_UUID).revision == 6
+
+    release_download.set()
+    wait_for_revalidation(smart_client)
+    assert smart_client.get_data_model(ca_uuid=CA_UUID).revision == 7
+
+
+def test_one_refresh_per_key_at_a_time(smart_client, redis_cache, release_download):
+    for _ in range(5):
+        smart_client.get_data_model(ca_uuid=CA_UUID, force=True)
+
+    release_download.set()
+    wait_for_revalidation(smart_client)
+    smart_client.download_datamodel.assert_called_once()
+
+
+def test_without_cached_model_the_caller_waits_for_the_download(smart_client, redis_cache, release_download):
+    redis_cache.get.return_value = None
+    release_download.set()
+
+    assert smart_client.get_data_model(ca_uuid=CA_UUID, force=True).get_category(path="new")
+    assert not smart_client._revalidating
+
+
+def test_failed_background_refresh_keeps_cached_model(smart_client, redis_cache, release_download):
+    smart_client.download_datamodel.side_effect = Exception("Server unreachable")
+
+    assert smart_client.get_data_model(ca_uuid=CA_UUID, force=True).get_category(path="old")
+    wait_for_revalidation(smart_client)
+
+    redis_cache.set.assert_not_called()
+    assert smart_client.get_data_model(ca_uuid=CA_UUID).get_category(path="old")
+
+
+def test_callers_can_opt_out(smart_client, redis_cache, release_download):
+    release_download.set()
+
+    datamodel = smart_client.get_data_model(ca_uuid=CA_UUID, force=True, stale_while_revalidate=False)
+
+    assert datamodel.get_category(path="new")
+    redis_cache.get.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_async_client_refreshes_in_a_background_task(async_redis_cache, make_async_client,
+                                                           downloaded_datamodel):
+    async_redis_cache.get.return_value = CACHED_DATAMODEL
+    smart_client = make_async_client(stale_while_revalidate=True)
+    release_download = asyncio.Event()
+
+    async def download_datamodel(**kwargs):
+        await release_download.wait()
+        return downloaded_datamodel()
+
+    smart_client.download_datamodel.side_effect = download_datamodel
+
+    datamodels = [await smart_client.get_data_model(ca_uuid=CA_UUID, force=True) for _ in range(3)]
+    assert all(datamodel.get_category(path="old") for datamodel in datamodels)
+
+    refresh = smart_client._revalidations[CACHE_KEY]
+    release_download.set()
+    await refresh
+
+    smart_client.download_datamodel.assert_called_once()
+    assert json.loads(async_redis_cache.set.call_args.kwargs["value"])["categories"] == [{"path": "new"}]
+    assert not smart_client._revalidations
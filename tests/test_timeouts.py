@@ -0,0 +1,101 @@
+import httpx
+import pytest
+import respx
+
+from smartconnect import SmartClient, AsyncSmartClient
+from smartconnect.timeouts import TimeoutProfiles, TimeoutTransport
+
+API = "https://fancyplace.smartconservationtools.org/server"
+CA_UUID = "123ac748-6e05-4299-892f-335d21fd4ce6"
+PROFILES = {'metadata': 120.0, 'query': 60.0, 'data': 10.0}
+
+
+def request(method, path):
+    return httpx.Request(method, f"{API}{path}")
+
+
+def test_requests_get_their_profile():
+    profiles = TimeoutProfiles(profiles=PROFILES)
+
+    assert profiles.profile_for(request('GET', f'/api/metadata/datamodel/{CA_UUID}')) == 'metadata'
+    assert profiles.profile_for(request('GET', '/api/query/custom/patrol')) == 'query'
+    assert profiles.profile_for(request('POST', f'/api/data/{CA_UUID}')) == 'data'
+    assert profiles.profile_for(request('GET', '/api/conservationarea')) is None
+    assert profiles.profile_for(request('POST', '/j_security_check')) is None
+
+
+def test_apply_keeps_connect_and_pool_timeouts():
+    post = request('POST', f'/api/data/{CA_UUID}')
+    post.extensions = {'timeout': httpx.Timeout(60.0, connect=3.1, pool=3.1).as_dict()}
+
+    assert TimeoutProfiles(profiles=PROFILES).apply(post) == ('data', 10.0)
+    assert post.extensions['timeout'] == {'connect': 3.1, 'read': 10.0, 'write': 10.0, 'pool': 3.1}
+
+
+def test_adaptive_timeout_follows_latency_percentile():
+    profiles = TimeoutProfiles(profiles=PROFILES, adaptive=True, percentile=90, multiplier=3, min_timeout=0.5,
+                               window_size=10, min_samples=10)
+
+    for latency in range(1, 10):
+        profiles.record('data', latency / 10)
+    assert profiles.timeout('data') == 10.0
+
+    profiles.record('data', 1.0)
+    assert profiles.timeout('data') == pytest.approx(2.7)
+
+    for _ in range(10):
+        profiles.record('data', 0.01)
+    assert profiles.timeout('data') == 0.5
+
+
+def test_adaptive_timeout_grows_back_after_timeouts(mocker):
+    profiles = TimeoutProfiles(profiles=PROFILES, adaptive=True, percentile=50, multiplier=2, min_timeout=0.1,
+                               window_size=10, min_samples=10)
+    for _ in range(10):
+        profiles.record('data', 0.1)
+    assert profiles.timeout('data') == pytest.approx(0.2)
+
+    transport = mocker.Mock(spec=httpx.BaseTransport)
+    transport.handle_request.side_effect = httpx.ReadTimeout("timed out")
+    timeout_transport = TimeoutTransport(transport, profiles)
+    for _ in range(100):
+        with pytest.raises(httpx.ReadTimeout):
+            timeout_transport.handle_request(request('POST', f'/api/data/{CA_UUID}'))
+
+    assert profiles.timeout('data') == 10.0
+
+
+def test_fixed_profiles_ignore_latency():
+    profiles = TimeoutProfiles(profiles=PROFILES, min_samples=1)
+    profiles.record('data', 0.01)
+
+    assert profiles.timeout('data') == 10.0
+
+
+def test_client_applies_data_post_timeout(respx_mock, login, mocker):
+    mocker.patch("smartconnect.timeouts.smart_settings.SMART_DATA_POST_TIMEOUT", 5.0)
+    data = respx_mock.post(f"{API}/api/data/{CA_UUID}").mock(return_value=httpx.Response(200, json={}))
+    home = respx_mock.get(url__regex=r".*/connect/home")
+
+    smart_client = SmartClient(api=API, username="Earthranger", password="afancypassword", timeout_profiles=True)
+    smart_client.post_smart_request(json="{}", ca_uuid=CA_UUID)
+
+    assert data.calls[0].request.extensions['timeout']['read'] == 5.0
+    assert home.calls[0].request.extensions['timeout']['read'] == 60
+
+
+@pytest.mark.asyncio
+async def test_async_client_applies_metadata_timeout(mocker):
+    mocker.patch("smartconnect.timeouts.smart_settings.SMART_METADATA_TIMEOUT", 300.0)
+    async with respx.mock:
+        respx.get(f"{API}/connect/home").respond(status_code=200)
+        respx.post(f"{API}/j_security_check").respond(
+            status_code=302, headers={"set-cookie": "JSESSIONID=abc123; Path=/"})
+        route = respx.get(f"{API}/api/metadata/patrol/{CA_UUID}").respond(status_code=200, json={})
+
+        smart_client = AsyncSmartClient(api=API, username="Earthranger", password="afancypassword",
+                                        timeout_profiles=True)
+        await smart_client.ensure_login()
+        await smart_client._session.get(f"{API}/api/metadata/patrol/{CA_UUID}")
+
+        assert route.calls[0].request.extensions['timeout']['read'] == 300.0
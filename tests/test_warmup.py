@@ -0,0 +1,66 @@
+import httpx
+import pytest
+import respx
+
+from smartconnect import AsyncSmartClient
+
+
+@pytest.fixture
+def server(client_settings):
+    with respx.mock:
+        landing_page = respx.route(url=f"{client_settings['api']}/connect/home").respond(
+            status_code=200, headers={"set-cookie": "JSESSIONID=anonymous; Path=/"})
+        respx.post(f"{client_settings['api']}/j_security_check").respond(
+            status_code=302, headers={"set-cookie": "JSESSIONID=abc123; Path=/"})
+        yield landing_page
+
+
+def heads(route):
+    return [call for call in route.calls if call.request.method == 'HEAD']
+
+
+@pytest.mark.asyncio
+async def test_warmup_opens_connections_and_logs_in(client_settings, server):
+    smart_client = AsyncSmartClient(**client_settings)
+
+    report = await smart_client.warmup(connections=3)
+
+    assert len(heads(server)) == 3
+    assert smart_client._session_id() == "abc123"
+    assert report.connections == 3
+    assert 0 <= report.connect <= report.total
+    assert 0 <= report.login <= report.total
+
+
+@pytest.mark.asyncio
+async def test_warmup_requests_do_not_touch_session_cookies(client_settings, server):
+    smart_client = AsyncSmartClient(**client_settings)
+    await smart_client.ensure_login()
+
+    await smart_client.warmup(connections=2)
+
+    assert smart_client._session_id() == "abc123"
+    assert all('cookie' in call.request.headers for call in heads(server))
+
+
+@pytest.mark.asyncio
+async def test_context_manager_warms_up_when_configured(client_settings, server):
+    async with AsyncSmartClient(**client_settings, warmup_connections=2) as smart_client:
+        assert len(heads(server)) == 2
+        assert smart_client._session_id() == "abc123"
+
+
+@pytest.mark.asyncio
+async def test_context_manager_does_not_warm_up_by_default(client_settings, server):
+    async with AsyncSmartClient(**client_settings) as smart_client:
+        assert server.call_count == 0
+        assert smart_client._session_id() is None
+
+
+@pytest.mark.asyncio
+async def test_warmup_fails_when_server_is_unreachable(client_settings):
+    with respx.mock:
+        respx.route().mock(side_effect=httpx.ConnectError("Connection refused"))
+
+        with pytest.raises(httpx.ConnectError):
+            await AsyncSmartClient(**client_settings).warmup(connections=2)